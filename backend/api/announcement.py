@@ -4,6 +4,9 @@ from notifications.events import NotificationEvent
 import mysql.connector
 import os
 import request_helper
+from auth.middleware import bind_principal
+import etag
+import pagination
 
 # Announcements -----------------------------------------------------------------------------------------
 
@@ -11,6 +14,9 @@ import request_helper
 # -------------------------------------------------------------------------------------------------------
 
 
+# table_version scopes read by get_announcements (see etag.py)
+ANNOUNCEMENT_SCOPES = ('announcement', 'employee', 'role')
+
 def get_announcements(db, request):
     """
     Fetches announcement records based on optional URL query parameters.
@@ -27,6 +33,8 @@ def get_announcements(db, request):
             'title': str,
             'recent_only': int, # 1=True, 0=False
             'timestamp_sort': str, # "Newest", "Oldest"
+            'limit': int, # Page size (optional, keyset pagination)
+            'after': str, # Cursor from a previous page's X-Next-Cursor header
         }
 
         # Validate and parse parameters
@@ -42,11 +50,28 @@ def get_announcements(db, request):
         timestamp_sort = params.get('timestamp_sort')
         recent_only = params.get('recent_only')
 
+        # -----------------------------
+        # Time Sorting Logic
+        # -----------------------------
+        # TIMESTAMP SORTING (default: Newest); announcement_id breaks ties so pages never overlap
+        direction = "ASC" if timestamp_sort == "Oldest" else "DESC"
+        sort_keys = [("a.timestamp", direction), ("a.announcement_id", direction)]
+
+        page, error = pagination.parse(params, sort_keys)
+        if error:
+            return jsonify(error), 400
+
         conn = db
         cursor = conn.cursor(dictionary=True)
 
+        # Conditional GET: answer from the version probe when the client's copy is current
+        clock_format = etag.MINUTE if recent_only == 1 else etag.DAY
+        tag = etag.compute(cursor, request, ANNOUNCEMENT_SCOPES, clock_format)
+        if etag.matches(request, tag):
+            return etag.not_modified(tag)
+
         # Base Query
-        query = """
+        query = f"""
             SELECT 
                 a.announcement_id,
                 a.author_id,
@@ -55,7 +80,7 @@ def get_announcements(db, request):
                 r.role_name,
                 a.title,
                 a.description,
-                DATE_FORMAT(a.timestamp, '%Y-%m-%d %H:%i') AS timestamp
+                DATE_FORMAT(a.timestamp, '%Y-%m-%d %H:%i') AS timestamp{pagination.select_keys(sort_keys)}
             FROM announcement a
             JOIN employee e ON a.author_id = e.employee_id
             JOIN role r ON a.role_id = r.role_id
@@ -86,27 +111,17 @@ def get_announcements(db, request):
             query += " AND a.timestamp >= NOW() - INTERVAL 14 DAY"
 
         # -----------------------------
-        # Time Sorting Logic
+        # Keyset Pagination + Ordering
         # -----------------------------
-        order_clauses = []
-
-        # TIMESTAMP SORTING
-        if timestamp_sort == "Newest":
-            order_clauses.append("a.timestamp DESC")
-        elif timestamp_sort == "Oldest":
-            order_clauses.append("a.timestamp ASC")
-
-        # Default fallback
-        if not order_clauses:
-            order_clauses.append("a.timestamp DESC")
-
-        query += " ORDER BY " + ", ".join(order_clauses)
+        query += page.where(query_params)
+        query += pagination.order_by(sort_keys)
+        query += page.limit_clause(query_params)
 
         # Execute Query
         cursor.execute(query, tuple(query_params))
-        result = cursor.fetchall()
+        result, next_cursor = page.finish(cursor.fetchall())
 
-        return jsonify(result), 200
+        return pagination.add_header(etag.json_response(result, tag), next_cursor), 200
 
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
@@ -159,6 +174,11 @@ def insert_announcement(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'author_id')
+        if error:
+            return jsonify(error), 403
+
         # Extract Parameters
         author_id = fields['author_id']
         title = fields['title']
@@ -177,9 +197,7 @@ def insert_announcement(db, request):
 
         inserted_id = cursor.lastrowid
 
-        conn.commit()
-
-        # Emit notification event
+        # Queue notification event (commits with the insert)
         dispatch_notification(
             db,
             NotificationEvent.ANNOUNCEMENT_CREATED,
@@ -191,6 +209,8 @@ def insert_announcement(db, request):
             }
         )
 
+        conn.commit()
+
         return jsonify({"status": "success", "inserted_id": inserted_id}), 201
 
     except mysql.connector.Error as e:
@@ -237,6 +257,11 @@ def update_announcement(db, request, announcement_id):
         if not fields:
             return jsonify({"status": "error", "message": "No fields provided to update"}), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'author_id', allow_admin=True)
+        if error:
+            return jsonify(error), 403
+
         # Build dynamic SET clause
         set_clause = ", ".join([f"{col} = %s" for col in fields.keys()])
         values = list(fields.values())
@@ -360,6 +385,11 @@ def acknowledge_announcement(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'employee_id')
+        if error:
+            return jsonify(error), 403
+
         # Extract Parameters
         announcement_id = fields['announcement_id']
         employee_id = fields['employee_id']
@@ -0,0 +1,141 @@
+import argparse
+import os
+
+import db_pool
+
+# History Archive ---------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Keeps task and shift small: completed tasks and past shifts older than a horizon are moved (in batches,
+# one transaction each) into task_archive / shift_archive, which have the same columns. worker.py runs
+# archive_all() once a day; GET /task and GET /shift read only the hot tables unless the request passes
+# include_history=1 together with a date range, in which case source() unions in the archive.
+#
+# Shifts that a shift_cover_request points at stay in shift (moving them would cascade-delete the
+# request). Deleting an employee or section still removes their archived rows through the same cascades.
+#
+#   python archive.py --task-days 90 --shift-days 180     # one-off run
+#
+# Environment:
+#   ARCHIVE_TASK_DAYS       Completed tasks due more than this many days ago are archived (default 90, 0 = off)
+#   ARCHIVE_SHIFT_DAYS      Shifts dated more than this many days ago are archived (default 180, 0 = off)
+#   ARCHIVE_BATCH_SIZE      Rows moved per transaction (default 2000)
+
+ARCHIVE_TASK_DAYS = int(os.environ.get("ARCHIVE_TASK_DAYS", 90))
+ARCHIVE_SHIFT_DAYS = int(os.environ.get("ARCHIVE_SHIFT_DAYS", 180))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 2000))
+
+# Columns shared by each hot table and its archive (the archive adds archived_at)
+COLUMNS = {
+    "task": ("task_id", "type", "title", "description", "author_id", "section_id", "due_date", "complete",
+             "recurring_task_id", "timestamp", "last_modified_at", "last_modified_by"),
+    "shift": ("shift_id", "employee_id", "start_time", "date", "section_id", "timestamp", "version"),
+}
+
+
+def source(table, include_history):
+    """
+    Returns what a GET handler should select FROM: the hot table, or hot + archive rows as one derived table.
+    """
+    if not include_history:
+        return table
+
+    columns = ", ".join(COLUMNS[table])
+    return f"(SELECT {columns} FROM {table} UNION ALL SELECT {columns} FROM {table}_archive)"
+
+
+# Moving Rows -------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+def _move(conn, table, key, where, params, batch_size):
+    """
+    Moves rows of table matching where into {table}_archive, batch_size rows per transaction.
+    Returns the number of rows moved.
+    """
+    columns = ", ".join(COLUMNS[table])
+    moved = 0
+
+    cursor = conn.cursor()
+    try:
+        while True:
+            conn.start_transaction()
+            cursor.execute(f"""
+                SELECT {key} FROM {table}
+                WHERE {where}
+                ORDER BY {key}
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (*params, batch_size))
+            ids = [row[0] for row in cursor.fetchall()]
+
+            if not ids:
+                conn.rollback()
+                return moved
+
+            placeholders = ','.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                INSERT INTO {table}_archive ({columns})
+                SELECT {columns} FROM {table} WHERE {key} IN ({placeholders})
+            """, tuple(ids))
+            cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({placeholders})", tuple(ids))
+            conn.commit()
+
+            moved += len(ids)
+            if len(ids) < batch_size:
+                return moved
+    finally:
+        cursor.close()
+
+
+def archive_tasks(conn, days=ARCHIVE_TASK_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Archives completed tasks due more than `days` days ago (task_due_date_complete_idx range).
+    """
+    if days <= 0:
+        return 0
+    return _move(conn, "task", "task_id",
+                 "due_date < CURDATE() - INTERVAL %s DAY AND complete = 1", (days,), batch_size)
+
+
+def archive_shifts(conn, days=ARCHIVE_SHIFT_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Archives shifts dated more than `days` days ago that no cover request references.
+    """
+    if days <= 0:
+        return 0
+    return _move(conn, "shift", "shift_id", """
+        date < CURDATE() - INTERVAL %s DAY
+        AND NOT EXISTS (SELECT 1 FROM shift_cover_request scr WHERE scr.shift_id = shift.shift_id)
+    """, (days,), batch_size)
+
+
+def archive_all(conn):
+    """
+    Runs both archivers with the configured horizons. Returns {table: rows moved}.
+    """
+    return {"task": archive_tasks(conn), "shift": archive_shifts(conn)}
+
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old tasks and shifts into the archive tables")
+    parser.add_argument("--task-days", type=int, default=ARCHIVE_TASK_DAYS)
+    parser.add_argument("--shift-days", type=int, default=ARCHIVE_SHIFT_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    conn = db_pool.get_pool().get_connection()
+    try:
+        tasks = archive_tasks(conn, args.task_days, args.batch_size)
+        shifts = archive_shifts(conn, args.shift_days, args.batch_size)
+    finally:
+        conn.close()
+
+    print(f"Archived {tasks} tasks and {shifts} shifts")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import os
+
+from cache import TTLCache
+
+# Employee Identity Cache -------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Maps a verified email to the employee fields the app keeps in its session. Only those columns are
+# selected (no wage), and a hit skips the database entirely, so a whole shift opening the app at once
+# costs one query per person per IDENTITY_CACHE_TTL instead of one per launch.
+#
+# Entries are checked in-process only. employee.insert_employee / update_employee clear this process's
+# cache on commit (invalidate()); other gunicorn workers re-read an identity once IDENTITY_CACHE_TTL
+# runs out, so a deactivated or demoted employee keeps it there for at most that long. Role writes
+# cannot change an identity (it holds role ids, and roles are never deleted through the API).
+#
+# principal_cache (used by auth/middleware.py) maps a bearer token straight to its identity so an
+# authenticated request never touches MySQL. It is cleared together with the identity cache, and on
+# other workers a principal lasts at most PRINCIPAL_CACHE_TTL.
+#
+# Environment:
+#   IDENTITY_CACHE_SIZE     Identities kept per process (default 1024)
+#   IDENTITY_CACHE_TTL      Seconds an identity is reused before it is re-read (default 60)
+#   PRINCIPAL_CACHE_SIZE    Bearer tokens kept per process (default 4096)
+#   PRINCIPAL_CACHE_TTL     Seconds a token's principal is reused (default 60, never past the token's exp)
+
+IDENTITY_CACHE_SIZE = int(os.environ.get("IDENTITY_CACHE_SIZE", 1024))
+IDENTITY_CACHE_TTL = int(os.environ.get("IDENTITY_CACHE_TTL", 60))
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", 4096))
+PRINCIPAL_CACHE_TTL = int(os.environ.get("PRINCIPAL_CACHE_TTL", 60))
+
+IDENTITY_COLUMNS = (
+    'employee_id', 'first_name', 'last_name', 'email', 'phone_number',
+    'admin', 'super_admin', 'primary_role', 'secondary_role', 'tertiary_role', 'is_active'
+)
+
+identity_cache = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def _key(email):
+    return email.strip().lower()
+
+
+def get_identity(get_db_connection, email):
+    """
+    Returns the active employee's identity record for email, or None if there is none.
+    Misses are not cached, so a newly added employee can sign in immediately.
+    """
+    key = _key(email)
+
+    identity = identity_cache.get(key)
+    if identity is not None:
+        return dict(identity)
+
+    conn = get_db_connection()
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT {', '.join(IDENTITY_COLUMNS)}
+            FROM employee
+            WHERE email = %s AND is_active = 1
+            LIMIT 1;
+        """, (email,))
+        identity = cursor.fetchone()
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+
+    if identity is None:
+        return None
+
+    identity_cache.set(key, identity)
+    return dict(identity)
+
+
+def invalidate():
+    """
+    Drops this process's cached principals and identities (used after an employee write).
+    """
+    principal_cache.clear()
+    identity_cache.clear()
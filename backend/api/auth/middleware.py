@@ -0,0 +1,132 @@
+import hashlib
+import os
+import time
+
+from flask import g, jsonify, request
+
+from . import identity
+from .verify_firebase import verify_id_token
+
+# Request Authentication --------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# A before_request hook resolves the Bearer token (if any) to an employee principal and stores it on
+# flask.g for the handlers (see current_principal()). A token seen before is a principal_cache lookup
+# with no database work; a new token goes through the verified-token and identity caches, so neither a
+# Firebase signature check nor the employee query is repeated per request. Cached principals last at
+# most PRINCIPAL_CACHE_TTL and are dropped when an employee is written (see auth/identity.py).
+#
+# While the app does not send tokens on every call, enforcement is off: requests without a valid token
+# simply get no principal. Set AUTH_REQUIRED=1 to reject them with 401/403 instead.
+#
+# Write handlers call bind_principal() on the body fields naming the employee who is acting, so with a
+# principal those ids come from the token rather than the client:
+#   author_id           POST /task/insert, /task/convert, /announcement/insert, /recurring-task/insert
+#                       (and PATCH of the same resources, where admins may reassign it)
+#   last_modified_by    PATCH /task/update/<id> (set to the principal even when the body omits it)
+#   employee_id         POST /announcement/acknowledge, /tor/insert (admins may file for others)
+#   requested_employee_id / accepted_employee_id
+#                       POST /scr/insert, PATCH /scr/update/<id> (admins may act for others)
+#   user_id             POST /push-token/register, DELETE /push-token/delete
+# A different id is replaced by the principal's (403 when AUTH_REQUIRED=1).
+#
+# Environment:
+#   AUTH_REQUIRED      1 = every route outside PUBLIC_PATHS needs a valid token (default 0)
+
+AUTH_REQUIRED = os.environ.get("AUTH_REQUIRED", "0") == "1"
+
+# Routes that never require a principal
+PUBLIC_PATHS = {"/health", "/auth/firebase-login"}
+
+
+def current_principal():
+    """
+    Returns the identity record of the authenticated employee for this request, or None.
+    """
+    return g.get("principal")
+
+
+def bind_principal(fields, *names, allow_admin=False, fill=False):
+    """
+    Makes the employee-id fields in `names` name the authenticated employee. Without a principal the
+    fields are left as the client sent them. A differing value is replaced by the principal's
+    employee_id, or rejected when AUTH_REQUIRED is on; with allow_admin, admins may name someone else.
+    fill=True also sets fields the body omitted. Returns an error response dict, or None.
+    """
+    principal = current_principal()
+    if principal is None:
+        return None
+
+    own_id = principal["employee_id"]
+    is_admin = bool(principal.get("admin") or principal.get("super_admin"))
+
+    for name in names:
+        if name not in fields:
+            if fill:
+                fields[name] = own_id
+            continue
+
+        if fields[name] is None or fields[name] == own_id or (allow_admin and is_admin):
+            continue
+        if AUTH_REQUIRED:
+            return {"status": "error", "message": f"'{name}' must be the signed-in employee"}
+        fields[name] = own_id
+
+    return None
+
+
+def _resolve(get_db_connection, token):
+    """
+    Returns (principal, None) or (None, (message, status)).
+    """
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    principal = identity.principal_cache.get(key)
+    if principal is not None:
+        return principal, None
+
+    try:
+        claims = verify_id_token(token)
+    except Exception as e:
+        return None, (f"Invalid token: {e}", 401)
+
+    email = claims.get("email")
+    if not email:
+        return None, ("No email on token", 401)
+
+    principal = identity.get_identity(get_db_connection, email)
+    if principal is None:
+        return None, ("Not authorized", 403)
+
+    # Never outlive the token itself
+    ttl = min(claims["exp"] - time.time(), identity.PRINCIPAL_CACHE_TTL)
+    if ttl > 0:
+        identity.principal_cache.set(key, principal, ttl=ttl)
+    return principal, None
+
+
+def init_app(app, get_db_connection):
+    @app.before_request
+    def authenticate_request():
+        g.principal = None
+
+        # CORS preflight never carries credentials
+        if request.method == "OPTIONS":
+            return None
+
+        auth_header = request.headers.get("Authorization", "")
+        token = auth_header.split("Bearer ", 1)[1].strip() if auth_header.startswith("Bearer ") else ""
+
+        if token:
+            principal, error = _resolve(get_db_connection, token)
+        else:
+            principal, error = None, ("Missing Bearer token", 401)
+
+        if principal is not None:
+            g.principal = dict(principal)
+            return None
+
+        if AUTH_REQUIRED and request.path not in PUBLIC_PATHS:
+            message, status = error
+            return jsonify({"status": "error", "message": message}), status
+        return None
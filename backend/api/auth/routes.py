@@ -1,8 +1,15 @@
 from flask import jsonify
 
+from . import identity
+from .middleware import current_principal
 from .verify_firebase import verify_id_token
 
 def firebase_login(get_db_connection, request):
+    # The auth middleware already resolved this request's token
+    principal = current_principal()
+    if principal is not None:
+        return jsonify({"employee": principal}), 200
+
     auth_header = request.headers.get("Authorization", "")
     if not auth_header.startswith("Bearer "):
         return jsonify({"message": "Missing Bearer token"}), 401
@@ -24,25 +31,8 @@ def firebase_login(get_db_connection, request):
     if not email:
         return jsonify({"message": "No email on token"}), 401
 
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT *
-            FROM employee
-            WHERE email = %s AND is_active = 1
-            LIMIT 1
-            """,
-            (email,)
-        )
-        row = cur.fetchone()
-        if not row:
-            return jsonify({"message": "Not authorized"}), 403
-
-        return jsonify({"employee": row}), 200
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+    employee = identity.get_identity(get_db_connection, email)
+    if not employee:
+        return jsonify({"message": "Not authorized"}), 403
+
+    return jsonify({"employee": employee}), 200
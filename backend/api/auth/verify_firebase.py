@@ -1,9 +1,222 @@
-from firebase_admin import auth as admin_auth
+import hashlib
+import os
+import re
+import threading
+import time
+
+import requests
+from google.auth import exceptions as google_exceptions
+from google.auth import jwt as google_jwt
+
+from cache import TTLCache
 from .firebase_admin_init import get_firebase_admin_app
 
+# Firebase ID-Token Verification ------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# A token not seen before is checked by google.auth.jwt.decode (signature against Google's securetoken
+# keys, aud, iat/exp with 10s skew) plus the Firebase-specific checks firebase_admin.auth.verify_id_token
+# adds (RS256, kid, iss, sub, auth_time). Two caches per process sit in front of that:
+#
+#   - PublicKeyCache holds the signing certificates. It honours the Cache-Control max-age Google sends and
+#     refreshes on a background thread shortly before they expire, so requests never wait on the fetch.
+#     An unknown "kid" (key rotation) triggers at most one synchronous refresh per minute.
+#   - token_cache maps sha256(token) to its verified claims until the token's own "exp", so repeated logins
+#     and per-request checks with the same token are a dictionary lookup.
+#
+# Environment:
+#   FIREBASE_PROJECT_ID          Expected audience (default: project of the service account)
+#   FIREBASE_PUBLIC_KEYS_URL     Signing-key endpoint, override to serve locally generated keys
+#   FIREBASE_TOKEN_CACHE_SIZE    Verified tokens kept per process (default 4096)
+#   FIREBASE_TOKEN_CACHE_TTL     Upper bound in seconds on how long a verified token is reused (default 3600)
+
+PUBLIC_KEYS_URL = os.environ.get(
+    "FIREBASE_PUBLIC_KEYS_URL",
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+ISSUER_PREFIX = "https://securetoken.google.com/"
+CLOCK_SKEW_SECONDS = 10
+
+TOKEN_CACHE_SIZE = int(os.environ.get("FIREBASE_TOKEN_CACHE_SIZE", 4096))
+TOKEN_CACHE_TTL = int(os.environ.get("FIREBASE_TOKEN_CACHE_TTL", 3600))
+
+KEY_REFRESH_MARGIN = 300     # Refresh this many seconds before the keys' max-age runs out
+KEY_RETRY_SECONDS = 60       # Back-off after a failed refresh, and minimum gap between kid-miss refreshes
+KEY_DEFAULT_MAX_AGE = 3600   # Used when the response carries no max-age
+
+
+class InvalidTokenError(ValueError):
+    pass
+
+
+class PublicKeyCache:
+    """
+    kid -> signing certificate (PEM). `fetch` returns ({kid: PEM certificate or public key}, max_age_seconds);
+    pass one that returns locally generated keys to verify tokens without network access.
+    """
+
+    def __init__(self, fetch=None, url=PUBLIC_KEYS_URL):
+        self.url = url
+        self._fetch = fetch or self._fetch_http
+        self._certs = {}
+        self._expires_at = 0.0
+        self._last_refresh = float("-inf")
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+        self._stop = threading.Event()
+
+    def _fetch_http(self):
+        response = requests.get(self.url, timeout=10)
+        response.raise_for_status()
+
+        max_age = KEY_DEFAULT_MAX_AGE
+        match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+        if match:
+            max_age = int(match.group(1))
+        return response.json(), max_age
+
+    def refresh(self):
+        keys, max_age = self._fetch()
+
+        with self._lock:
+            self._certs = dict(keys)
+            self._expires_at = time.monotonic() + max_age
+            self._last_refresh = time.monotonic()
+
+    def get(self, kid):
+        """
+        Returns the certificate for kid, or None if Google does not (or no longer) publish it.
+        """
+        cert, fresh, can_refresh = self._lookup(kid)
+        if cert is not None and fresh:
+            return cert
+        if fresh and not can_refresh:
+            return None
+
+        # First use, background refresh fell behind, or a rotated key we have not seen yet
+        with self._refresh_lock:
+            cert, fresh, can_refresh = self._lookup(kid)
+            if (cert is None or not fresh) and (can_refresh or not fresh):
+                self.refresh()
+                cert = self._lookup(kid)[0]
+
+        self._ensure_refresher()
+        return cert
+
+    def _lookup(self, kid):
+        now = time.monotonic()
+        with self._lock:
+            return (
+                self._certs.get(kid),
+                self._expires_at > now,
+                now - self._last_refresh >= KEY_RETRY_SECONDS,
+            )
+
+    def _ensure_refresher(self):
+        # Started lazily so each forked gunicorn worker runs its own thread
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name="firebase-keys", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                wait = self._expires_at - KEY_REFRESH_MARGIN - time.monotonic()
+
+            if wait > 0:
+                self._stop.wait(min(wait, KEY_DEFAULT_MAX_AGE))
+                continue
+
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Firebase public key refresh failed: {e}")
+                self._stop.wait(KEY_RETRY_SECONDS)
+
+    def stop(self):
+        self._stop.set()
+
+
+public_keys = PublicKeyCache()
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE)
+
+_project_id = os.environ.get("FIREBASE_PROJECT_ID")
+
+
+def _get_project_id():
+    global _project_id
+    if not _project_id:
+        _project_id = get_firebase_admin_app().project_id
+    if not _project_id:
+        raise RuntimeError("Missing Firebase project id (set FIREBASE_PROJECT_ID)")
+    return _project_id
+
+
+def _verify(id_token):
+    """
+    Full verification of a token not seen before. Returns its claims or raises InvalidTokenError.
+    """
+    try:
+        header = google_jwt.decode_header(id_token)
+    except (ValueError, TypeError) as e:
+        raise InvalidTokenError(f"Malformed ID token: {e}")
+
+    if header.get("alg") != "RS256":
+        raise InvalidTokenError(f"ID token has incorrect algorithm {header.get('alg')!r}, expected RS256")
+    if not header.get("kid"):
+        raise InvalidTokenError('ID token has no "kid" header')
+
+    cert = public_keys.get(header["kid"])
+    if cert is None:
+        raise InvalidTokenError(f"ID token signed with unknown key {header['kid']!r}")
+
+    project_id = _get_project_id()
+    try:
+        # Signature, aud, iat and exp
+        claims = google_jwt.decode(
+            id_token,
+            certs={header["kid"]: cert},
+            audience=project_id,
+            clock_skew_in_seconds=CLOCK_SKEW_SECONDS,
+        )
+    except (ValueError, google_exceptions.GoogleAuthError) as e:
+        raise InvalidTokenError(str(e))
+
+    subject = claims.get("sub")
+    auth_time = claims.get("auth_time")
+
+    if claims.get("iss") != ISSUER_PREFIX + project_id:
+        raise InvalidTokenError(f'ID token has incorrect "iss" claim {claims.get("iss")!r}')
+    if not isinstance(subject, str) or not subject or len(subject) > 128:
+        raise InvalidTokenError('ID token has an invalid "sub" claim')
+    if not isinstance(auth_time, (int, float)) or auth_time > time.time() + CLOCK_SKEW_SECONDS:
+        raise InvalidTokenError('ID token has a missing or future "auth_time" claim')
+
+    claims["uid"] = subject
+    return claims
+
 
 def verify_id_token(id_token: str) -> dict:
-    get_firebase_admin_app()  # ensure initialized
+    if not id_token or not isinstance(id_token, str):
+        raise InvalidTokenError("ID token must be a non-empty string")
+
+    key = hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+
+    claims = token_cache.get(key)
+    if claims is not None:
+        if claims["exp"] + CLOCK_SKEW_SECONDS >= time.time():
+            return dict(claims)
+        token_cache.pop(key)
+
     # returns decoded claims (trusted)
-    decoded = admin_auth.verify_id_token(id_token, clock_skew_seconds=10)
-    return decoded
+    claims = _verify(id_token)
+
+    ttl = min(claims["exp"] + CLOCK_SKEW_SECONDS - time.time(), TOKEN_CACHE_TTL)
+    if ttl > 0:
+        token_cache.set(key, claims, ttl=ttl)
+    return dict(claims)
@@ -0,0 +1,84 @@
+# Table Version Probe -----------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Triggers in db-setup/triggers.sql bump a counter in `table_version` for every write that can change
+# a cached response. Reading those counters is a primary-key range scan over a handful of rows, so a
+# GET handler can tell whether its data changed without re-running its joined query.
+#
+# A scope's version is the SUM of its slots. Each MySQL connection bumps its own slot (CONNECTION_ID()),
+# so concurrent writers never lock the same counter row. compact(), run by the notification worker,
+# folds the rows of closed connections into slot 0 so the scan stays a handful of rows.
+
+
+def get_versions(cursor, scopes):
+    """
+    Returns a tuple of current versions, one per scope, in the order given.
+    Scopes that have never been written report 0.
+    """
+    versions, _ = probe(cursor, scopes)
+    return versions
+
+
+def probe(cursor, scopes, clock_format='%Y-%m-%d'):
+    """
+    Returns (versions, clock) from a single round trip, where clock is the database's NOW()
+    formatted with clock_format. Responses that filter on CURDATE()/NOW() fold the clock into
+    their cache key so they roll over on the same boundary the query does.
+    """
+    placeholders = ','.join(['%s'] * len(scopes))
+
+    # Derived one-row table keeps the clock row present even when no scope has been written yet
+    cursor.execute(f"""
+        SELECT DATE_FORMAT(NOW(), %s) AS clock, tv.table_name, SUM(tv.version) AS version
+        FROM (SELECT 1) AS now_row
+        LEFT JOIN table_version tv ON tv.table_name IN ({placeholders})
+        GROUP BY tv.table_name
+    """, (clock_format, *scopes))
+
+    clock = None
+    found = {}
+    for row in cursor.fetchall():
+        if not isinstance(row, dict):
+            row = dict(zip(("clock", "table_name", "version"), row))
+        clock = row["clock"]
+        if row["table_name"] is not None:
+            found[row["table_name"]] = int(row["version"])
+
+    return tuple(found.get(scope, 0) for scope in scopes), clock
+
+
+def compact(conn):
+    """
+    Folds the slots of connections that are no longer open into slot 0 and returns the number of rows
+    folded. Each scope's SUM is unchanged, and no open connection's row is touched, so this never waits
+    on a writer.
+    """
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction(isolation_level="READ COMMITTED")
+        cursor.execute("""
+            SELECT table_name, slot, version
+            FROM table_version
+            WHERE slot <> 0
+              AND slot NOT IN (SELECT id FROM information_schema.processlist)
+            FOR UPDATE
+        """)
+        rows = cursor.fetchall()
+
+        folded = {}
+        for table_name, _, version in rows:
+            folded[table_name] = folded.get(table_name, 0) + int(version)
+
+        if rows:
+            cursor.executemany("""
+                DELETE FROM table_version WHERE table_name = %s AND slot = %s
+            """, [(table_name, slot) for table_name, slot, _ in rows])
+            cursor.executemany("""
+                INSERT INTO table_version (table_name, slot, version) VALUES (%s, 0, %s)
+                ON DUPLICATE KEY UPDATE version = version + VALUES(version)
+            """, list(folded.items()))
+
+        conn.commit()
+        return len(rows)
+    finally:
+        cursor.close()
@@ -0,0 +1,417 @@
+import mysql.connector
+import os
+import sys
+import threading
+import time
+
+# MySQL Connection Pool ---------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Bounded pool with checkout/return semantics. Handlers keep calling conn.close() exactly as before,
+# the pooled wrapper just hands the connection back instead of tearing down the TCP session.
+#
+# Environment:
+#   DB_POOL_SIZE            Max open connections per process (default 10)
+#   DB_POOL_TIMEOUT         Seconds a checkout may wait for a free connection (default 10)
+#   DB_POOL_CHECK_AFTER     Idle seconds after which a connection is pinged on checkout (default 5)
+#   DB_POOL_LEAK_SECONDS    Seconds a checkout may be held before it is reported as a leak (default 30)
+
+
+class PoolExhaustedError(Exception):
+    """
+    Raised when no connection becomes available within DB_POOL_TIMEOUT.
+    """
+    pass
+
+
+class PooledConnection:
+    """
+    Proxy around a raw MySQL connection.
+    Every attribute is forwarded to the real connection except close(), which returns it to the pool.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._returned = False
+        self._used = False
+        self.checked_out_at = time.monotonic()
+        self._site = _caller_frame()
+
+    @property
+    def checkout_site(self):
+        """
+        "file:line in function" where the connection was checked out (only formatted for leak reports).
+        """
+        if self._site is None:
+            return "unknown"
+        filename, lineno, name = self._site
+        return f"{os.path.basename(filename)}:{lineno} in {name}"
+
+    def cursor(self, *args, **kwargs):
+        self._used = True
+        cursor = self._raw.cursor(*args, **kwargs)
+        return ObservedCursor(cursor) if _cursor_hooks or _row_hooks else cursor
+
+    def close(self):
+        if self._returned:
+            return
+        self._returned = True
+        self._pool._release(self)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of MySQL connections.
+    Connections are opened lazily up to max_size and re-used in LIFO order so hot connections stay warm.
+    """
+
+    def __init__(self, connect_kwargs, max_size=10, timeout=10.0, check_after=5.0, leak_seconds=30.0):
+        self._connect_kwargs = connect_kwargs
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.leak_seconds = leak_seconds
+
+        self._cond = threading.Condition()
+        self._idle = []         # [(raw_connection, returned_at)]
+        self._in_use = {}       # id(PooledConnection) -> PooledConnection
+        self._created = 0
+        self._local = threading.local()
+
+        # Metrics
+        self._waiters = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._health_check_failures = 0
+        self._leaks = 0
+
+    # -----------------------------
+    # Checkout
+    # -----------------------------
+    def get_connection(self):
+        """
+        Checks out a connection, waiting up to `timeout` seconds when the pool is at capacity.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        raw = None
+        idle_since = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, idle_since = self._idle.pop()
+                    break
+
+                if self._created < self.max_size:
+                    self._created += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolExhaustedError(
+                        f"No database connection available after {self.timeout}s "
+                        f"({len(self._in_use)} in use, {self._waiters} waiting)"
+                    )
+
+                self._waiters += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+        try:
+            if raw is None:
+                raw = self._open()
+            elif time.monotonic() - idle_since >= self.check_after:
+                raw = self._health_check(raw)
+        except Exception:
+            # Give the slot back so other requests can retry the connect
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        conn = PooledConnection(self, raw)
+
+        with self._cond:
+            self._in_use[id(conn)] = conn
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        self._thread_checkouts().append(conn)
+        return conn
+
+    def _open(self):
+        return mysql.connector.connect(**self._connect_kwargs)
+
+    def _health_check(self, raw):
+        """
+        Pings a connection that has been idle for a while; replaces it if the server dropped it.
+        """
+        try:
+            raw.ping(reconnect=False)
+            return raw
+        except Exception:
+            with self._cond:
+                self._health_check_failures += 1
+            _close_quietly(raw)
+            return self._open()
+
+    # -----------------------------
+    # Return
+    # -----------------------------
+    def _release(self, conn):
+        raw = conn._raw
+
+        # End any implicit transaction so the next borrower does not inherit locks or a stale snapshot
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+            reusable = True
+        except Exception:
+            reusable = False
+            _close_quietly(raw)
+
+        with self._cond:
+            self._in_use.pop(id(conn), None)
+            if reusable:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._created -= 1
+            self._cond.notify()
+
+        checkouts = self._thread_checkouts()
+        if conn in checkouts:
+            checkouts.remove(conn)
+
+    def _thread_checkouts(self):
+        if not hasattr(self._local, "checkouts"):
+            self._local.checkouts = []
+        return self._local.checkouts
+
+    # -----------------------------
+    # Leak Detection
+    # -----------------------------
+    def release_thread_connections(self):
+        """
+        Returns every connection the current thread still holds.
+        Called at the end of each request so a handler that forgets conn.close() cannot starve the pool.
+        """
+        leaked = 0
+        for conn in list(self._thread_checkouts()):
+            # Early returns (e.g. a 400 before any query ran) never touched the connection; not a leak
+            if conn._used:
+                leaked += 1
+                with self._cond:
+                    self._leaks += 1
+                print(f"DB pool leak: connection checked out at {conn.checkout_site} was never closed")
+            conn.close()
+        return leaked
+
+    def report_long_checkouts(self):
+        """
+        Logs connections that have been held longer than leak_seconds (e.g. stuck requests).
+        """
+        now = time.monotonic()
+        with self._cond:
+            held = [c for c in self._in_use.values() if now - c.checked_out_at >= self.leak_seconds]
+
+        for conn in held:
+            print(f"DB pool: connection held {now - conn.checked_out_at:.1f}s, checked out at {conn.checkout_site}")
+        return len(held)
+
+    # -----------------------------
+    # Metrics
+    # -----------------------------
+    def metrics(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiters": self._waiters,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._total_wait / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "health_check_failures": self._health_check_failures,
+                "leaks": self._leaks,
+            }
+
+    def close_idle(self):
+        """
+        Closes all idle connections (used on shutdown).
+        """
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+
+        for raw, _ in idle:
+            _close_quietly(raw)
+
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+def _close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+def _caller_frame():
+    """
+    Returns (filename, lineno, function) of the first frame outside this module, or None.
+    Walks frame objects only (no source lookup), so it is cheap enough for every checkout.
+    """
+    frame = sys._getframe(1)
+    for _ in range(8):
+        if frame is None:
+            break
+        code = frame.f_code
+        if not code.co_filename.endswith("db_pool.py"):
+            return code.co_filename, frame.f_lineno, code.co_name
+        frame = frame.f_back
+    return None
+
+
+# Cursor Hooks ------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Diagnostics (EXPLAIN checks, query timing) observe statements by registering a hook; while none is
+# registered, cursors are handed out unwrapped and cost nothing extra.
+
+_cursor_hooks = []
+_row_hooks = []
+
+
+def register_cursor_hook(hook):
+    """
+    hook(statement, params, seconds) is called after every execute()/executemany() on a pooled cursor.
+    Exceptions raised by a hook are logged and swallowed.
+    """
+    if hook not in _cursor_hooks:
+        _cursor_hooks.append(hook)
+    return hook
+
+
+def unregister_cursor_hook(hook):
+    if hook in _cursor_hooks:
+        _cursor_hooks.remove(hook)
+
+
+def register_row_hook(hook):
+    """
+    hook(count) is called with the number of rows each fetchone()/fetchmany()/fetchall() returned.
+    """
+    if hook not in _row_hooks:
+        _row_hooks.append(hook)
+    return hook
+
+
+def unregister_row_hook(hook):
+    if hook in _row_hooks:
+        _row_hooks.remove(hook)
+
+
+class ObservedCursor:
+    """
+    Cursor proxy that reports each statement and its duration to the registered hooks.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            _notify_hooks(operation, params, time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            _notify_hooks(operation, seq_params, time.perf_counter() - started)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        _notify_row_hooks(0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        _notify_row_hooks(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        _notify_row_hooks(len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _notify_hooks(operation, params, seconds):
+    for hook in list(_cursor_hooks):
+        try:
+            hook(operation, params, seconds)
+        except Exception as e:
+            print(f"DB cursor hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+
+def _notify_row_hooks(count):
+    for hook in list(_row_hooks):
+        try:
+            hook(count)
+        except Exception as e:
+            print(f"DB row hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+
+# Process-wide Pool -------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the pool for this process, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    connect_kwargs={
+                        "host": os.environ.get("DB_HOST", "localhost"),
+                        "user": os.environ["DB_USER"],
+                        "password": os.environ["DB_PASSWORD"],
+                        "database": os.environ["DB_NAME"],
+                    },
+                    max_size=int(os.environ.get("DB_POOL_SIZE", 10)),
+                    timeout=float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+                    check_after=float(os.environ.get("DB_POOL_CHECK_AFTER", 5)),
+                    leak_seconds=float(os.environ.get("DB_POOL_LEAK_SECONDS", 30)),
+                )
+    return _pool
@@ -2,12 +2,17 @@ from flask import jsonify
 import mysql.connector
 import os
 import request_helper
+import etag
+from auth import identity
 from typing import List
 
 # GET Employees -----------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
 
 
+# table_version scopes read by get_employees (see etag.py)
+EMPLOYEE_SCOPES = ('employee', 'role')
+
 def get_employees(db, request):
     """
     Fetches employee records based on optional URL query parameters.
@@ -58,6 +63,11 @@ def get_employees(db, request):
         conn = db
         cursor = conn.cursor(dictionary=True)
 
+        # Conditional GET: answer from the version probe when the client's copy is current
+        tag = etag.compute(cursor, request, EMPLOYEE_SCOPES)
+        if etag.matches(request, tag):
+            return etag.not_modified(tag)
+
         # Base Query
         query = """
             SELECT 
@@ -165,7 +175,7 @@ def get_employees(db, request):
         cursor.execute(query, tuple(query_params))
         result = cursor.fetchall()
 
-        return jsonify(result), 200
+        return etag.json_response(result, tag), 200
 
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
@@ -256,6 +266,7 @@ def insert_employee(db, request):
         inserted_id = cursor.lastrowid
 
         conn.commit()
+        identity.invalidate()
 
         return jsonify({"status": "success", "inserted_id": inserted_id}), 201
 
@@ -328,6 +339,9 @@ def update_employee(db, request, employee_id):
         conn.commit()
         rowcount = cursor.rowcount
 
+        # Deactivations, role and admin changes must not keep riding on cached principals
+        identity.invalidate()
+
         #if rowcount == 0:
             #return jsonify({"status": "error", "message": "No employee found with given ID"}), 404
 
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import shutil
+
+# Gunicorn Production Server Config ---------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Used by the api container:  gunicorn -c gunicorn.conf.py main:app
+#
+# Each worker is a separate process with its own DB pool, caches and Firebase app, so nothing
+# module-level is shared across workers. Total MySQL connections = GUNICORN_WORKERS * DB_POOL_SIZE,
+# keep that below the server's max_connections.
+#
+# Environment:
+#   GUNICORN_WORKERS        Worker processes (default 2 * CPUs + 1, WEB_CONCURRENCY also honoured)
+#   GUNICORN_THREADS        Threads per worker (default 4)
+#   GUNICORN_TIMEOUT        Seconds before a silent worker is killed and replaced (default 60)
+#   GUNICORN_RELOAD         1 = restart workers when source files change (development only)
+#   METRICS_ENABLED         0 = no metrics exporter (default 1)
+#   METRICS_ADDRESS         Exporter bind address (default 0.0.0.0)
+#   METRICS_PORT            Exporter port, internal network only (default 9200)
+#   PROMETHEUS_MULTIPROC_DIR  Where workers write their metric samples (default /tmp/tbb-metrics)
+#
+# The master serves /metrics for all workers combined on METRICS_PORT (see metrics.py); it only imports
+# prometheus_client, never the app.
+#
+# Graceful reload in production:  docker kill -s HUP bb-api
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+# Must be set before any worker imports prometheus_client
+if METRICS_ENABLED:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/tbb-metrics")
+
+bind = f"{os.environ.get('BACKEND_ADDRESS', '0.0.0.0')}:{os.environ.get('BACKEND_PORT', '5000')}"
+
+workers = int(os.environ.get("GUNICORN_WORKERS", os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically so slow leaks cannot accumulate
+max_requests = 2000
+max_requests_jitter = 200
+
+reload = os.environ.get("GUNICORN_RELOAD", "0") == "1"
+
+# App is imported in each worker after fork (no preload) so pools, caches and the Firebase app are per-process
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def worker_exit(server, worker):
+    """
+    Closes idle pooled connections when a worker shuts down (reload, max_requests, scale down).
+    """
+    try:
+        import db_pool
+        db_pool.get_pool().close_idle()
+    except Exception as e:
+        print(f"Error closing DB pool on worker exit: {e}")
+
+
+def on_starting(server):
+    """
+    Clears samples left by a previous run so counters start from zero.
+    """
+    if METRICS_ENABLED:
+        metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """
+    Starts the metrics exporter in the master, aggregating every worker's samples.
+    """
+    if not METRICS_ENABLED:
+        return
+
+    from prometheus_client import CollectorRegistry, start_http_server
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+
+    address = os.environ.get("METRICS_ADDRESS", "0.0.0.0")
+    port = int(os.environ.get("METRICS_PORT", 9200))
+    start_http_server(port, addr=address, registry=registry)
+    server.log.info(f"Metrics exporter on {address}:{port}")
+
+
+def child_exit(server, worker):
+    """
+    Drops a dead worker's live gauges (pool state); its counters stay in the totals.
+    """
+    if METRICS_ENABLED:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
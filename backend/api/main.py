@@ -1,9 +1,12 @@
-import mysql.connector
 import os
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import threading
 from auth.routes import firebase_login
+from auth import middleware as auth_middleware
+import db_pool
+import metrics
+import pagination
+import query_debug
 
 # Python SQL Table Handlers
 import role
@@ -17,6 +20,7 @@ import shift
 import shift_cover_request
 import time_off_request
 import push_token
+import sync
 
 # Custom Python Handlers (Joined SQL Tables)
 import schedule
@@ -29,25 +33,44 @@ BACKEND_PORT = os.environ["BACKEND_PORT"]
 
 # Initialize the App
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag", pagination.CURSOR_HEADER])
 
-# Create a global lock
-request_lock = threading.Lock()
+# Function which checks out a MySQL connection from the process-wide pool
+# Handlers still call conn.close(), which returns the connection to the pool
+def get_db_connection():
+    return db_pool.get_pool().get_connection()
 
 
-# Function which creates a MySQL connection
-def get_db_connection():
-    return mysql.connector.connect(
-        host=os.environ.get("DB_HOST", "localhost"),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"]
-    )
+# Per-route latency / DB-time totals, exported on METRICS_PORT (registered first so it times the auth check too)
+metrics.init_app(app)
+
+# Development only (QUERY_DEBUG=1): slow-query log and N+1 detection
+query_debug.init_app(app)
+
+# Resolves the Bearer token (if any) to g.principal before every request
+auth_middleware.init_app(app, get_db_connection)
+
+
+@app.teardown_request
+def release_db_connections(exc):
+    """
+    Returns any connection a handler forgot to close so it cannot leak out of the pool.
+    """
+    db_pool.get_pool().release_thread_connections()
+
+
+@app.errorhandler(db_pool.PoolExhaustedError)
+def handle_pool_exhausted(e):
+    print(f"Database pool exhausted: {e}")
+    return jsonify({"status": "error", "message": "Server busy, please retry"}), 503
 
 
 @app.route('/health')
 def health_check():
-    return {"status": "ok"}
+    pool = db_pool.get_pool()
+    pool_stats = pool.metrics()
+    pool_stats["long_checkouts"] = pool.report_long_checkouts()
+    return {"status": "ok", "db_pool": pool_stats, "schedule_cache": schedule.schedule_cache.stats()}
 
 
 # Auth --------------------------------------------------------------------------------------------------
@@ -77,8 +100,7 @@ def insert_role():
     """
     POST new roles to the 'role' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple role inserts from different clients
-        return role.insert_role(get_db_connection(), request)
+    return role.insert_role(get_db_connection(), request)
 
 
 @app.route('/role/update/<int:role_id>', methods=['PATCH'])
@@ -86,8 +108,7 @@ def update_role(role_id):
     """
     PATCH (Update) roles by id
     """
-    with request_lock:
-        return role.update_role(get_db_connection(), request, role_id)
+    return role.update_role(get_db_connection(), request, role_id)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -109,8 +130,7 @@ def insert_section():
     """
     POST new sections to the 'section' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple section inserts from different clients
-        return section.insert_section(get_db_connection(), request)
+    return section.insert_section(get_db_connection(), request)
 
 
 @app.route('/section/update/<int:section_id>', methods=['PATCH'])
@@ -118,8 +138,7 @@ def update_section(section_id):
     """
     PATCH (Update) sections by id
     """
-    with request_lock:
-        return section.update_section(get_db_connection(), request, section_id)
+    return section.update_section(get_db_connection(), request, section_id)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -140,8 +159,7 @@ def insert_employee():
     """
     POST new employees to the 'employee' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple role inserts from different clients
-        return employee.insert_employee(get_db_connection(), request)
+    return employee.insert_employee(get_db_connection(), request)
 
 
 @app.route('/employee/update/<int:employee_id>', methods=['PATCH'])
@@ -149,8 +167,7 @@ def update_employee(employee_id):
     """
     PATCH (Update) employees by id
     """
-    with request_lock:
-        return employee.update_employee(get_db_connection(), request, employee_id)
+    return employee.update_employee(get_db_connection(), request, employee_id)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -171,16 +188,14 @@ def insert_availability():
     """
     POST new employee availability to the 'availability' table
     """
-    with request_lock:
-        return availability.insert_availability(get_db_connection(), request)
+    return availability.insert_availability(get_db_connection(), request)
 
 @app.route('/availability/update/<int:availability_id>', methods=['PATCH'])
 def update_availability(availability_id):
     """
     PATCH (Update) employee availability by id
     """
-    with request_lock:
-        return availability.update_availability(get_db_connection(), request, availability_id)
+    return availability.update_availability(get_db_connection(), request, availability_id)
 
 
 @app.route('/availability/delete/<int:availability_id>', methods=['DELETE'])
@@ -188,8 +203,7 @@ def delete_availability(availability_id):
     """
     DELETE employee availability by id
     """
-    with request_lock:
-        return availability.delete_availability(get_db_connection(), availability_id)
+    return availability.delete_availability(get_db_connection(), availability_id)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -212,8 +226,7 @@ def insert_recurring_task():
     """
     POST new recurring tasks to the 'recurring_task' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple recurring task inserts from different clients
-        return recurring_task.insert_recurring_task(get_db_connection(), request)
+    return recurring_task.insert_recurring_task(get_db_connection(), request)
 
 
 @app.route('/recurring-task/update/<int:recurring_task_id>', methods=['PATCH'])
@@ -221,8 +234,7 @@ def update_recurring_task(recurring_task_id):
     """
     PATCH (Update) tasks by id
     """
-    with request_lock:
-        return recurring_task.update_recurring_task(get_db_connection(), request, recurring_task_id)
+    return recurring_task.update_recurring_task(get_db_connection(), request, recurring_task_id)
 
 
 @app.route('/recurring-task/delete/<int:recurring_task_id>', methods=['DELETE'])
@@ -230,8 +242,7 @@ def delete_recurring_task(recurring_task_id):
     """
     DELETE recurring task by id
     """
-    with request_lock:
-        return recurring_task.delete_recurring_task(get_db_connection(), recurring_task_id)
+    return recurring_task.delete_recurring_task(get_db_connection(), recurring_task_id)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -253,8 +264,7 @@ def handle_new_task():
     """
     POST new tasks to the 'task' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple task inserts from different clients
-        return task.insert_task(get_db_connection(), request)
+    return task.insert_task(get_db_connection(), request)
 
 
 @app.route('/task/update/<int:task_id>', methods=['PATCH'])
@@ -262,8 +272,7 @@ def update_task(task_id):
     """
     PATCH (Update) tasks by id
     """
-    with request_lock:
-        return task.update_task(get_db_connection(), request, task_id)
+    return task.update_task(get_db_connection(), request, task_id)
 
 
 @app.route('/task/delete/<int:task_id>', methods=['DELETE'])
@@ -271,8 +280,7 @@ def delete_task(task_id):
     """
     DELETE task by id
     """
-    with request_lock:
-        return task.delete_task(get_db_connection(), task_id)
+    return task.delete_task(get_db_connection(), task_id)
 
 
 @app.route('/task/convert', methods=['POST'])
@@ -281,8 +289,7 @@ def convert_task():
     POST route to handle converting Normal Task -> Recurring or Recurring -> Normal.
     Uses a transaction to ensure database integrity.
     """
-    with request_lock:
-        return task.convert_task(get_db_connection(), request)
+    return task.convert_task(get_db_connection(), request)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -304,8 +311,7 @@ def insert_announcement():
     """
     POST new announcements to the 'announcement' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple announcement inserts from different clients
-        return announcement.insert_announcement(get_db_connection(), request)
+    return announcement.insert_announcement(get_db_connection(), request)
 
 
 @app.route('/announcement/update/<int:announcement_id>', methods=['PATCH'])
@@ -313,8 +319,7 @@ def update_announcement(announcement_id):
     """
     PATCH (Update) announcements by id
     """
-    with request_lock:
-        return announcement.update_announcement(get_db_connection(), request, announcement_id)
+    return announcement.update_announcement(get_db_connection(), request, announcement_id)
 
 
 @app.route('/announcement/delete/<int:announcement_id>', methods=['DELETE'])
@@ -322,8 +327,7 @@ def delete_announcement(announcement_id):
     """
     DELETE announcement by id
     """
-    with request_lock:
-        return announcement.delete_announcement(get_db_connection(), announcement_id)
+    return announcement.delete_announcement(get_db_connection(), announcement_id)
 
 
 @app.route('/announcement/acknowledgement', methods=['GET'])
@@ -362,8 +366,23 @@ def insert_shift():
     """
     POST new shifts to the 'shift' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple shift inserts from different clients
-        return shift.insert_shift(get_db_connection(), request)
+    return shift.insert_shift(get_db_connection(), request)
+
+
+@app.route('/shift/publish', methods=['POST'])
+def publish_shifts():
+    """
+    POST a whole schedule (list of shifts) in one transaction
+    """
+    return shift.publish_shifts(get_db_connection(), request)
+
+
+@app.route('/shift/copy-week', methods=['POST'])
+def copy_week():
+    """
+    POST copy one week's shifts onto another week
+    """
+    return shift.copy_week(get_db_connection(), request)
 
 
 @app.route('/shift/update/<int:shift_id>', methods=['PATCH'])
@@ -371,8 +390,7 @@ def update_shift(shift_id):
     """
     PATCH (Update) shifts by id
     """
-    with request_lock:
-        return shift.update_shift(get_db_connection(), request, shift_id)
+    return shift.update_shift(get_db_connection(), request, shift_id)
 
 
 @app.route('/shift/delete/<int:shift_id>', methods=['DELETE'])
@@ -380,8 +398,7 @@ def delete_shift(shift_id):
     """
     DELETE shift by id
     """
-    with request_lock:
-        return shift.delete_shift(get_db_connection(), shift_id)
+    return shift.delete_shift(get_db_connection(), shift_id)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -418,8 +435,7 @@ def insert_shift_cover_request():
     """
     POST new time off requests to the 'shift_cover_request' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple shift inserts from different clients
-        return shift_cover_request.insert_scr(get_db_connection(), request)
+    return shift_cover_request.insert_scr(get_db_connection(), request)
 
 
 @app.route('/scr/update/<int:cover_request_id>', methods=['PATCH'])
@@ -427,8 +443,7 @@ def update_shift_cover_request(cover_request_id):
     """
     PATCH (Update) shift cover requests by id
     """
-    with request_lock:
-        return shift_cover_request.update_scr(get_db_connection(), request, cover_request_id)
+    return shift_cover_request.update_scr(get_db_connection(), request, cover_request_id)
 
 
 @app.route('/scr/delete/<int:cover_request_id>', methods=['DELETE'])
@@ -436,8 +451,7 @@ def delete_shift_cover_request(cover_request_id):
     """
     DELETE shift cover requests by id
     """
-    with request_lock:
-        return shift_cover_request.delete_scr(get_db_connection(), cover_request_id)
+    return shift_cover_request.delete_scr(get_db_connection(), cover_request_id)
 
 
 @app.route("/scr/approve/<int:cover_request_id>", methods=["PATCH"])
@@ -445,8 +459,7 @@ def approve_shift_request(cover_request_id):
     """
     UPDATE ("Approve") shift cover requests by id and UPDATE the targeted shift Record
     """
-    with request_lock:
-        return shift_cover_request.approve_scr(get_db_connection(), cover_request_id)
+    return shift_cover_request.approve_scr(get_db_connection(), cover_request_id)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -468,8 +481,7 @@ def insert_time_off_request():
     """
     POST new time off requests to the 'time_off_request' table
     """
-    with request_lock:  # Serialize concurrent requests to be processed in order for multiple shift inserts from different clients
-        return time_off_request.insert_tor(get_db_connection(), request)
+    return time_off_request.insert_tor(get_db_connection(), request)
 
 
 @app.route('/tor/update/<int:request_id>', methods=['PATCH'])
@@ -477,8 +489,7 @@ def update_time_off_request(request_id):
     """
     PATCH (Update) time off requests by id
     """
-    with request_lock:
-        return time_off_request.update_tor(get_db_connection(), request, request_id)
+    return time_off_request.update_tor(get_db_connection(), request, request_id)
 
 
 @app.route('/tor/delete/<int:request_id>', methods=['DELETE'])
@@ -486,8 +497,21 @@ def delete_time_off_request(request_id):
     """
     DELETE time off requests by id
     """
-    with request_lock:
-        return time_off_request.delete_tor(get_db_connection(), request_id)
+    return time_off_request.delete_tor(get_db_connection(), request_id)
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+# Sync Routes - /sync -----------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+@app.route('/sync', methods=['GET'], strict_slashes=False)
+def get_sync():
+    """
+    GET rows inserted, updated or deleted since the client's per-entity watermarks
+    """
+    return sync.get_sync(get_db_connection(), request)
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -516,11 +540,18 @@ def delete_push_token():
 # -------------------------------------------------------------------------------------------------------
 
 
-for rule in app.url_map.iter_rules():
-    print(rule)
-
-
+# Development server: python main.py
 # App will be available on current host IP using port 5000
 # Ex: http://134.161.225.3:5000
+# Production runs under gunicorn instead (see gunicorn.conf.py and the Dockerfile)
 if __name__ == '__main__':
-    app.run(debug=True, host=BACKEND_ADDRESS, port=int(BACKEND_PORT))
+    for rule in app.url_map.iter_rules():
+        print(rule)
+
+    debug = os.environ.get("FLASK_DEBUG", "1") == "1"
+
+    # With the reloader only the child process serves requests, so only it exports their metrics
+    if metrics.METRICS_ENABLED and (not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        metrics.serve()
+
+    app.run(debug=debug, host=BACKEND_ADDRESS, port=int(BACKEND_PORT))
@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+from prometheus_client import multiprocess
+
+import db_pool
+
+# Request Metrics ---------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Records per route (method + URL rule from main.py): latency, time inside cursor.execute, number of
+# queries, rows fetched, JSON serialization time and time spent queueing notifications
+# (dispatch_notification), in Prometheus format.
+#
+# Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR (prometheus_client
+# multiprocess mode) and the master process serves the sum over all workers, including ones recycled by
+# max_requests, on METRICS_PORT (see gunicorn.conf.py). The dev server (python main.py) serves its own
+# figures on the same port. Either way the exporter listens on its own port on the internal network,
+# never on the public API port.
+#
+# Environment:
+#   METRICS_ENABLED             0 = no instrumentation and no exporter (default 1)
+#   METRICS_LOG_JSON            1 = also print one JSON line per request with its figures (default 0)
+#   METRICS_ADDRESS             Exporter bind address (default 0.0.0.0; the port is not published)
+#   METRICS_PORT                Exporter port (default 9200)
+#   PROMETHEUS_MULTIPROC_DIR    Per-worker sample files, set by gunicorn.conf.py
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+METRICS_LOG_JSON = os.environ.get("METRICS_LOG_JSON", "0") == "1"
+METRICS_ADDRESS = os.environ.get("METRICS_ADDRESS", "0.0.0.0")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9200))
+
+# Latency histogram upper bounds (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ROUTE_LABELS = ("method", "route")
+
+REQUESTS = Counter("tbb_http_requests", "Requests handled, by route and status.", ROUTE_LABELS + ("status",))
+LATENCY = Histogram("tbb_http_request_duration_seconds", "Request latency, by route.", ROUTE_LABELS, buckets=BUCKETS)
+DB_SECONDS = Counter("tbb_db_seconds", "Time spent in cursor.execute, by route.", ROUTE_LABELS)
+DB_QUERIES = Counter("tbb_db_queries", "Statements executed, by route.", ROUTE_LABELS)
+DB_ROWS = Counter("tbb_db_rows", "Rows fetched, by route.", ROUTE_LABELS)
+JSON_SECONDS = Counter("tbb_json_seconds", "Time spent serializing JSON responses, by route.", ROUTE_LABELS)
+DISPATCH_SECONDS = Counter("tbb_dispatch_seconds", "Time spent in dispatch_notification, by route.", ROUTE_LABELS)
+
+# Pool state summed over the live workers; waits are the worst live worker's
+POOL = Gauge("tbb_db_pool", "Connection pool state, summed over live workers.", ("field",),
+             multiprocess_mode="livesum")
+POOL_WAIT = Gauge("tbb_db_pool_wait_ms", "Connection checkout wait, worst live worker.", ("field",),
+                  multiprocess_mode="livemax")
+POOL_WAIT_FIELDS = ("avg_wait_ms", "max_wait_ms")
+
+# Per-request figures; sections (db, json, dispatch) are added to whatever request is running on the thread
+_current = threading.local()
+
+
+# Collection --------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+def _sample():
+    return getattr(_current, "sample", None)
+
+
+def add(name, seconds):
+    """
+    Adds seconds to a timed section (e.g. "dispatch_seconds") of the request running on this thread.
+    """
+    sample = _sample()
+    if sample is not None:
+        sample[name] += seconds
+
+
+@contextmanager
+def timed(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - started)
+
+
+def _on_execute(statement, params, seconds):
+    sample = _sample()
+    if sample is not None:
+        sample["db_seconds"] += seconds
+        sample["queries"] += 1
+
+
+def _on_rows(count):
+    sample = _sample()
+    if sample is not None:
+        sample["rows"] += count
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider, timing every dumps() (jsonify bodies) into the current request.
+    """
+
+    def dumps(self, obj, **kwargs):
+        with timed("json_seconds"):
+            return super().dumps(obj, **kwargs)
+
+
+def _begin_request():
+    _current.sample = {
+        "started": time.perf_counter(),
+        "db_seconds": 0.0,
+        "queries": 0,
+        "rows": 0,
+        "json_seconds": 0.0,
+        "dispatch_seconds": 0.0,
+    }
+
+
+def _record_pool():
+    # Metrics must never fail the request they describe
+    try:
+        for field, value in db_pool.get_pool().metrics().items():
+            (POOL_WAIT if field in POOL_WAIT_FIELDS else POOL).labels(field).set(value)
+    except Exception as e:
+        print(f"Error recording DB pool metrics: {e}")
+
+
+def _end_request(response):
+    sample = _sample()
+    _current.sample = None
+    if sample is None:
+        return response
+
+    elapsed = time.perf_counter() - sample["started"]
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    labels = (request.method, route)
+
+    REQUESTS.labels(*labels, response.status_code).inc()
+    LATENCY.labels(*labels).observe(elapsed)
+    DB_SECONDS.labels(*labels).inc(sample["db_seconds"])
+    DB_QUERIES.labels(*labels).inc(sample["queries"])
+    DB_ROWS.labels(*labels).inc(sample["rows"])
+    JSON_SECONDS.labels(*labels).inc(sample["json_seconds"])
+    DISPATCH_SECONDS.labels(*labels).inc(sample["dispatch_seconds"])
+
+    _record_pool()
+
+    if METRICS_LOG_JSON:
+        print(json.dumps({
+            "method": request.method,
+            "route": route,
+            "status": response.status_code,
+            "ms": round(elapsed * 1000, 3),
+            "db_ms": round(sample["db_seconds"] * 1000, 3),
+            "queries": sample["queries"],
+            "rows": sample["rows"],
+            "json_ms": round(sample["json_seconds"] * 1000, 3),
+            "dispatch_ms": round(sample["dispatch_seconds"] * 1000, 3),
+        }))
+
+    return response
+
+
+# Exposition --------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+def registry():
+    """
+    The registry to expose: every worker's sample files under gunicorn, this process's metrics otherwise.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+
+    combined = CollectorRegistry()
+    multiprocess.MultiProcessCollector(combined)
+    return combined
+
+
+def serve():
+    """
+    Starts the exporter thread on METRICS_ADDRESS:METRICS_PORT.
+    """
+    start_http_server(METRICS_PORT, addr=METRICS_ADDRESS, registry=registry())
+    print(f"Metrics exporter on {METRICS_ADDRESS}:{METRICS_PORT}")
+
+
+def init_app(app):
+    if not METRICS_ENABLED:
+        return
+
+    app.json = TimedJSONProvider(app)
+    db_pool.register_cursor_hook(_on_execute)
+    db_pool.register_row_hook(_on_rows)
+
+    app.before_request(_begin_request)
+    app.after_request(_end_request)
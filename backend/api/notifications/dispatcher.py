@@ -1,3 +1,5 @@
+import json
+import metrics
 from .events import NotificationEvent
 from .handlers.announcementHandler import handle_announcement_created
 from .handlers.taskHandler import handle_task_created
@@ -5,6 +7,7 @@ from .handlers.shiftHandler import (
     handle_shift_created,
     handle_shift_updated,
     handle_shift_deleted,
+    handle_schedule_published,
 )
 from .handlers.shiftCoverHandler import (
     handle_cover_awaiting_approval,
@@ -19,9 +22,26 @@ from .handlers.timeOffHandler import (
 
 
 def dispatch_notification(db, event: NotificationEvent, payload: dict):
+    """
+    Queues a notification event in notification_outbox on the route's connection.
+    Call it BEFORE conn.commit() so the event commits (or rolls back) together with the data change;
+    worker.py delivers it afterwards, keeping push delivery out of request latency.
+    """
+    with metrics.timed("dispatch_seconds"):
+        cursor = db.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO notification_outbox (event, payload)
+                VALUES (%s, %s);
+            """, (event.value, json.dumps(payload, default=str)))
+        finally:
+            cursor.close()
+
+
+def deliver_notification(db, event: NotificationEvent, payload: dict):
     """
     Routes notification events to the correct handler.
-    Receives an existing DB connection from the route.
+    Called by the notification worker with its own DB connection.
     """
 
     # Shift Dispatchers
@@ -34,6 +54,9 @@ def dispatch_notification(db, event: NotificationEvent, payload: dict):
     if event == NotificationEvent.SHIFT_DELETED:
         handle_shift_deleted(db, payload)
 
+    if event == NotificationEvent.SCHEDULE_PUBLISHED:
+        handle_schedule_published(db, payload)
+
     # Shift Cover Dispatchers
     if event == NotificationEvent.SHIFT_COVER_CREATED:
         handle_cover_created(db, payload)
@@ -11,6 +11,7 @@ class NotificationEvent(Enum):
     SHIFT_CREATED = "shift.created"
     SHIFT_UPDATED = "shift.updated"
     SHIFT_DELETED = "shift.deleted"
+    SCHEDULE_PUBLISHED = "schedule.published"
 
     # Shift Cover Events
     SHIFT_COVER_CREATED = "shift_cover.created"
@@ -1,4 +1,4 @@
-from push_notifications import send_push_notification
+from push_notifications import send_push_batch
 
 
 def handle_announcement_created(db, payload: dict):
@@ -32,14 +32,7 @@ def handle_announcement_created(db, payload: dict):
 
     tokens = [row["expo_push_token"] for row in cursor.fetchall()]
 
-    # Send notifications in batches
-    chunk_size = 100
-    for i in range(0, len(tokens), chunk_size):
-        send_push_notification(
-            expo_push_token=tokens[i:i + chunk_size],
-            title="New Announcement",
-            body=title,
-            data={"announcement_id": announcement_id}
-        )
+    # Expo batching (100 tokens per request over a shared session)
+    send_push_batch(tokens, "New Announcement", title, {"announcement_id": announcement_id})
 
     cursor.close()
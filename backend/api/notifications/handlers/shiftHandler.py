@@ -1,4 +1,4 @@
-from notifications.utils.notify import notify_employee
+from notifications.utils.notify import notify_employee, notify_employees
 
 
 def handle_shift_created(db, payload):
@@ -44,3 +44,19 @@ def handle_shift_deleted(db, payload):
             "shift_id": payload["shift_id"]
         }
     )
+
+
+def handle_schedule_published(db, payload):
+    """
+    Sends one notification to each employee with shifts in a published schedule.
+    """
+    notify_employees(
+        db,
+        payload["employee_ids"],
+        "Schedule Posted",
+        f"Your schedule for {payload['start_date']} to {payload['end_date']} is posted.",
+        {
+            "start_date": payload["start_date"],
+            "end_date": payload["end_date"]
+        }
+    )
@@ -1,4 +1,4 @@
-from push_notifications import send_push_notification
+from push_notifications import send_push_batch
 
 
 def handle_task_created(db, payload: dict):
@@ -63,14 +63,7 @@ def handle_task_created(db, payload: dict):
         cursor.close()
         return
 
-    # Expo batching
-    chunk_size = 100
-    for i in range(0, len(tokens), chunk_size):
-        send_push_notification(
-            expo_push_token=tokens[i:i + chunk_size],
-            title="New Task Posted",
-            body=title,
-            data={"task_id": task_id}
-        )
+    # Expo batching (100 tokens per request over a shared session)
+    send_push_batch(tokens, "New Task Posted", title, {"task_id": task_id})
 
     cursor.close()
@@ -0,0 +1,156 @@
+import os
+from push_notifications import fetch_receipts, is_device_not_registered
+
+# Expo Push Receipts ------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Expo answers a send with a ticket per device; whether the message actually reached the device is only
+# known later from its receipt. The notification worker records accepted tickets in push_ticket, polls
+# their receipts once Expo has them, and deletes push_token rows Expo reports as DeviceNotRegistered so
+# later broadcasts stop fanning out to dead devices.
+#
+# None of these functions commit; the caller owns the transaction.
+#
+# Environment:
+#   EXPO_RECEIPT_DELAY_SECONDS   Wait before a ticket's receipt is requested (default 900, Expo suggests ~15 min)
+#   EXPO_RECEIPT_EXPIRE_HOURS    Tickets still without a receipt after this are dropped unpolled (default 24)
+
+RECEIPT_DELAY_SECONDS = int(os.environ.get("EXPO_RECEIPT_DELAY_SECONDS", 900))
+RECEIPT_EXPIRE_HOURS = int(os.environ.get("EXPO_RECEIPT_EXPIRE_HOURS", 24))
+
+
+def record_tickets(db, tickets):
+    """
+    Stores accepted tickets: [(ticket_id, expo_push_token, outbox_id)].
+    """
+    if not tickets:
+        return
+
+    cursor = db.cursor()
+    try:
+        cursor.executemany("""
+            INSERT IGNORE INTO push_ticket (ticket_id, expo_push_token, outbox_id)
+            VALUES (%s, %s, %s);
+        """, tickets)
+    finally:
+        cursor.close()
+
+
+def prune_tokens(db, tokens):
+    """
+    Deletes push tokens that no longer reach a device. Returns the number removed.
+    """
+    tokens = list(tokens)
+    if not tokens:
+        return 0
+
+    cursor = db.cursor()
+    try:
+        placeholders = ','.join(['%s'] * len(tokens))
+        cursor.execute(f"""
+            DELETE FROM push_token
+            WHERE expo_push_token IN ({placeholders});
+        """, tuple(tokens))
+        removed = cursor.rowcount
+    finally:
+        cursor.close()
+
+    if removed:
+        print(f"Pruned {removed} unregistered push token(s)")
+    return removed
+
+
+def poll_receipts(db, limit=1000):
+    """
+    Fetches receipts for due tickets in one bulk request and applies them:
+    ok receipts are dropped, errors are kept with their code, and DeviceNotRegistered prunes the token.
+    Returns a summary dict.
+    """
+    cursor = db.cursor(dictionary=True)
+    try:
+        # Expo has discarded these receipts by now; asking again would only crowd out newer tickets
+        cursor.execute("""
+            DELETE FROM push_ticket
+            WHERE status = 'pending' AND created_at < NOW() - INTERVAL %s HOUR
+            LIMIT 5000;
+        """, (RECEIPT_EXPIRE_HOURS,))
+        expired = cursor.rowcount
+
+        # Never-polled tickets first (NULL sorts first), then the ones polled longest ago, so tickets
+        # whose receipts stay pending cannot starve the rest of a backlog
+        cursor.execute("""
+            SELECT ticket_id, expo_push_token
+            FROM push_ticket
+            WHERE status = 'pending' AND created_at <= NOW() - INTERVAL %s SECOND
+            ORDER BY polled_at, created_at
+            LIMIT %s;
+        """, (RECEIPT_DELAY_SECONDS, limit))
+        tickets = cursor.fetchall()
+
+        summary = {"checked": len(tickets), "ok": 0, "errors": 0, "expired": expired, "pruned": 0}
+        if not tickets:
+            return summary
+
+        receipts = fetch_receipts([t["ticket_id"] for t in tickets])
+
+        delete_ids = []
+        not_ready = []
+        errors = []
+        dead_tokens = set()
+        for ticket in tickets:
+            receipt = receipts.get(ticket["ticket_id"])
+
+            if receipt is None:
+                # Not ready yet; back of the queue
+                not_ready.append(ticket["ticket_id"])
+                continue
+
+            if receipt.get("status") == "ok":
+                delete_ids.append(ticket["ticket_id"])
+                summary["ok"] += 1
+                continue
+
+            code = (receipt.get("details") or {}).get("error") or "Unknown"
+            errors.append((code[:64], ticket["ticket_id"]))
+            summary["errors"] += 1
+            if is_device_not_registered(receipt):
+                dead_tokens.add(ticket["expo_push_token"])
+
+        if delete_ids:
+            placeholders = ','.join(['%s'] * len(delete_ids))
+            cursor.execute(f"""
+                DELETE FROM push_ticket WHERE ticket_id IN ({placeholders});
+            """, tuple(delete_ids))
+
+        if not_ready:
+            placeholders = ','.join(['%s'] * len(not_ready))
+            cursor.execute(f"""
+                UPDATE push_ticket SET polled_at = NOW() WHERE ticket_id IN ({placeholders});
+            """, tuple(not_ready))
+
+        if errors:
+            cursor.executemany("""
+                UPDATE push_ticket
+                SET status = 'error', error = %s, checked_at = NOW()
+                WHERE ticket_id = %s;
+            """, errors)
+    finally:
+        cursor.close()
+
+    summary["pruned"] = prune_tokens(db, dead_tokens)
+    return summary
+
+
+def purge_errors(db, retention_days=7):
+    """
+    Drops error tickets kept for diagnostics once they are older than retention_days.
+    """
+    cursor = db.cursor()
+    try:
+        cursor.execute("""
+            DELETE FROM push_ticket
+            WHERE status = 'error' AND created_at < NOW() - INTERVAL %s DAY
+            LIMIT 5000;
+        """, (retention_days,))
+    finally:
+        cursor.close()
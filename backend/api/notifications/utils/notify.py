@@ -1,35 +1,30 @@
-from push_notifications import send_push_notification
+from push_notifications import send_push_batch
 
 
 def notify_all_employees(db, title, body, data, exclude_employee_id=None):
     # Sends the same notification to every active employee that has a push token.
+    # One query resolves every recipient device; Expo receives them 100 per request.
     cursor = db.cursor(dictionary=True)
     try:
         query = """
-            SELECT employee_id
-            FROM employee
-            WHERE employee.is_active = 1
+            SELECT DISTINCT pt.expo_push_token
+            FROM push_token pt
+            JOIN employee e ON e.employee_id = pt.user_id
+            WHERE e.is_active = 1
         """
         query_params = []
 
         if exclude_employee_id is not None:
-            query += " AND employee.employee_id != %s"
+            query += " AND e.employee_id != %s"
             query_params.append(exclude_employee_id)
 
         cursor.execute(query, tuple(query_params))
-        employees = cursor.fetchall()
-
-        for row in employees:
-            notify_employee(
-                db,
-                row["employee_id"],
-                title,
-                body,
-                data or {}
-            )
+        tokens = [row["expo_push_token"] for row in cursor.fetchall()]
     finally:
         cursor.close()
 
+    send_push_batch(tokens, title, body, data or {})
+
 
 def notify_employee(db, employee_id, title, body, data, exclude_employee_id=None):
     """
@@ -49,13 +44,31 @@ def notify_employee(db, employee_id, title, body, data, exclude_employee_id=None
     tokens = [row["expo_push_token"] for row in cursor.fetchall()]
     cursor.close()
 
-    for token in tokens:
-        send_push_notification(
-            expo_push_token=token,
-            title=title,
-            body=body,
-            data=data or {}
-        )
+    # All of the employee's devices go out in a single Expo request
+    send_push_batch(tokens, title, body, data or {})
+
+
+def notify_employees(db, employee_ids, title, body, data):
+    """
+    Sends the same push notification to every device of the given employees.
+    """
+    if not employee_ids:
+        return
+
+    cursor = db.cursor(dictionary=True)
+
+    # One query for all recipients instead of one notify_employee lookup each
+    placeholders = ','.join(['%s'] * len(employee_ids))
+    cursor.execute(f"""
+        SELECT DISTINCT expo_push_token
+        FROM push_token
+        WHERE user_id IN ({placeholders});
+    """, tuple(employee_ids))
+
+    tokens = [row["expo_push_token"] for row in cursor.fetchall()]
+    cursor.close()
+
+    send_push_batch(tokens, title, body, data or {})
 
 
 def notify_managers(db, title, body, data, exclude_employee_id=None):
@@ -81,10 +94,4 @@ def notify_managers(db, title, body, data, exclude_employee_id=None):
     tokens = [row["expo_push_token"] for row in cursor.fetchall()]
     cursor.close()
 
-    for token in tokens:
-        send_push_notification(
-            expo_push_token=token,
-            title=title,
-            body=body,
-            data=data or {}
-        )
+    send_push_batch(tokens, title, body, data or {})
@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import json
+
+# Keyset Pagination -------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# List endpoints accept optional `limit` and `after` query parameters. Results are ordered by the
+# endpoint's sort keys plus its primary key as a tie-breaker, and the next page starts strictly after the
+# last row's key values, so every page is an index range scan no matter how deep the client has paged.
+#
+# The body stays a plain JSON array; when more rows exist the cursor for the next page is returned in
+# the X-Next-Cursor response header. Without `limit` the endpoint behaves exactly as before.
+#
+# Usage inside a handler:
+#
+#   page, error = pagination.parse(params, sort_keys)
+#   if error: return jsonify(error), 400
+#   query = SELECT ... + pagination.select_keys(sort_keys) + FROM ... WHERE ...
+#   query += page.where(query_params)
+#   query += pagination.order_by(sort_keys) + page.limit_clause(query_params)
+#   rows, next_cursor = page.finish(cursor.fetchall())
+
+PARAM_TYPES = {
+    'limit': int,
+    'after': str,
+}
+
+MAX_LIMIT = 500
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page:
+    def __init__(self, sort_keys, limit, after):
+        self.sort_keys = sort_keys  # [(sql_expression, 'ASC' | 'DESC'), ...]
+        self.limit = limit
+        self.after = after          # key values of the last row already seen, or None
+
+    def where(self, query_params):
+        """
+        Returns the " AND (...)" predicate selecting rows after the cursor.
+        Mixed sort directions are expanded to (k1 > v1) OR (k1 = v1 AND k2 < v2) OR ...
+        """
+        if self.after is None:
+            return ""
+
+        branches = []
+        for i, (expr, direction) in enumerate(self.sort_keys):
+            parts = []
+            for prior_expr, _ in self.sort_keys[:i]:
+                parts.append(f"{prior_expr} = %s")
+            parts.append(f"{expr} {'<' if direction == 'DESC' else '>'} %s")
+            branches.append("(" + " AND ".join(parts) + ")")
+            query_params.extend(self.after[:i + 1])
+
+        return " AND (" + " OR ".join(branches) + ")"
+
+    def limit_clause(self, query_params):
+        if self.limit is None:
+            return ""
+        # One extra row tells us whether another page exists
+        query_params.append(self.limit + 1)
+        return " LIMIT %s"
+
+    def finish(self, rows):
+        """
+        Strips the hidden sort columns and returns (rows, next_cursor or None).
+        """
+        next_cursor = None
+        if self.limit is not None and len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(self.sort_keys, [last[f"_sort_{i}"] for i in range(len(self.sort_keys))])
+
+        for row in rows:
+            for i in range(len(self.sort_keys)):
+                row.pop(f"_sort_{i}", None)
+
+        return rows, next_cursor
+
+
+def parse(params, sort_keys):
+    """
+    Reads `limit` / `after` from already-verified params.
+    Returns (Page, error_response_dict or None).
+    """
+    limit = params.get('limit')
+    after = params.get('after')
+
+    if limit is not None and not (1 <= limit <= MAX_LIMIT):
+        return None, {"status": "error", "message": f"limit must be between 1 and {MAX_LIMIT}"}
+
+    values = None
+    if after is not None:
+        values = decode_cursor(sort_keys, after)
+        if values is None:
+            return None, {"status": "error", "message": "Invalid or stale 'after' cursor for this sort order"}
+
+    return Page(sort_keys, limit, values), None
+
+
+def select_keys(sort_keys):
+    """
+    Extra SELECT columns exposing each sort key so the cursor can be built from the last row.
+    """
+    return "".join(f",\n                {expr} AS _sort_{i}" for i, (expr, _) in enumerate(sort_keys))
+
+
+def order_by(sort_keys):
+    return " ORDER BY " + ", ".join(f"{expr} {direction}" for expr, direction in sort_keys)
+
+
+def add_header(response, next_cursor):
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+    return response
+
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+def encode_cursor(sort_keys, values):
+    payload = {
+        "o": _signature(sort_keys),
+        "v": [v if isinstance(v, (int, float)) or v is None else str(v) for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(sort_keys, cursor):
+    """
+    Returns the cursor's key values, or None if it is malformed or was issued for a different sort order.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+    except (ValueError, TypeError, KeyError):
+        return None
+
+    if payload.get("o") != _signature(sort_keys) or not isinstance(values, list) or len(values) != len(sort_keys):
+        return None
+    return values
+
+
+def _signature(sort_keys):
+    order = ",".join(f"{expr} {direction}" for expr, direction in sort_keys)
+    return hashlib.sha1(order.encode("utf-8")).hexdigest()[:12]
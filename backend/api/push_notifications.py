@@ -1,13 +1,37 @@
+import os
 import requests
+import threading
+from contextlib import contextmanager
 
-# Sends a push notification using Expo's push service
+# Sends push notifications using Expo's push service
+#
+# Environment:
+#   EXPO_API_BASE           Expo API root, override to point at a local stand-in (default https://exp.host/--/api/v2)
+#   EXPO_PUSH_TIMEOUT       Seconds to wait on each Expo request (default 10)
+
+EXPO_API_BASE = os.environ.get("EXPO_API_BASE", "https://exp.host/--/api/v2").rstrip("/")
+EXPO_PUSH_TIMEOUT = float(os.environ.get("EXPO_PUSH_TIMEOUT", 10))
+
+# Expo accepts at most 100 recipients per push request and 1000 ids per receipts request
+EXPO_CHUNK_SIZE = 100
+EXPO_RECEIPT_CHUNK_SIZE = 1000
+
+# One keep-alive session per process so batches reuse the TLS connection to Expo
+_session = requests.Session()
+_session.headers.update({
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+})
+
+# Set while the notification worker is collecting messages (see collect())
+_local = threading.local()
 
 
 def send_push_notification(expo_push_token, title, body, data=None):
     """
     Sends a single push notification to one or multiple devices.
 
-    expo_push_token: String or List of Strings (Expo push tokens)
+    expo_push_token: String or List of Strings (Expo push tokens, at most 100)
     title: Notification title
     body: Notification message body
     data: Optional dictionary sent with the notification
@@ -22,12 +46,154 @@ def send_push_notification(expo_push_token, title, body, data=None):
         "priority": "high"    # Android: Ensures heads-up notification & vibration
     }
 
-    response = requests.post(
-        "https://exp.host/--/api/v2/push/send",
+    response = _session.post(
+        f"{EXPO_API_BASE}/push/send",
         json=payload,
-        headers={"Content-Type": "application/json"}
+        timeout=EXPO_PUSH_TIMEOUT
     )
 
     response_json = response.json()
     print(f"Expo API Response: {response_json}")  # Log the response from Expo
     return response_json
+
+
+def send_push_batch(tokens, title, body, data=None):
+    """
+    Sends the same notification to any number of devices, 100 tokens per Expo request.
+    Duplicate tokens are dropped. A failed chunk is logged and does not stop the remaining chunks.
+
+    Returns a list of Expo responses, one per successfully sent chunk.
+    """
+    unique_tokens = list(dict.fromkeys(t for t in tokens if t))
+
+    batch = getattr(_local, "batch", None)
+    if batch is not None:
+        batch.add(unique_tokens, title, body, data)
+        return []
+
+    responses = []
+    for i in range(0, len(unique_tokens), EXPO_CHUNK_SIZE):
+        chunk = unique_tokens[i:i + EXPO_CHUNK_SIZE]
+        try:
+            responses.append(send_push_notification(chunk, title, body, data))
+        except (requests.RequestException, ValueError) as e:
+            print(f"Expo push failed for {len(chunk)} token(s): {e}")
+
+    return responses
+
+
+# Collected Delivery ------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# The notification worker resolves many outbox events at once. Inside collect(), send_push_batch only
+# records one message per device; flush() then sends them as message arrays of up to 100 per Expo request,
+# so a drain cycle costs a few HTTP calls regardless of how many events or recipients it covered.
+
+
+class PushBatch:
+    def __init__(self):
+        self.current = None     # Key (outbox_id) that messages added now belong to
+        self._messages = []     # [(key, message)]
+        self.tickets = []       # [(ticket_id, token, key)] accepted by Expo, for receipt polling
+        self.dead_tokens = set()  # Tokens Expo rejected outright as DeviceNotRegistered
+
+    def add(self, tokens, title, body, data=None):
+        for token in tokens:
+            self._messages.append((self.current, {
+                "to": token,
+                "title": title,
+                "body": body,
+                "data": data or {},
+                "sound": "default",
+                "priority": "high"
+            }))
+
+    def discard(self, key):
+        """
+        Drops messages collected for key (e.g. its handler failed part way and the event will be retried).
+        """
+        self._messages = [(k, m) for k, m in self._messages if k != key]
+
+    def counts(self):
+        counts = {}
+        for key, _ in self._messages:
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def flush(self):
+        """
+        Sends every collected message. Returns {key: error} for keys with a message in a failed request;
+        a request failure leaves those keys to be retried, per-device errors are reported by Expo receipts.
+        """
+        failed = {}
+        messages, self._messages = self._messages, []
+
+        for i in range(0, len(messages), EXPO_CHUNK_SIZE):
+            chunk = messages[i:i + EXPO_CHUNK_SIZE]
+            try:
+                response = _session.post(
+                    f"{EXPO_API_BASE}/push/send",
+                    json=[m for _, m in chunk],
+                    timeout=EXPO_PUSH_TIMEOUT
+                )
+                response.raise_for_status()
+                response_json = response.json()
+                if response_json.get("errors"):
+                    raise ValueError(f"Expo rejected request: {response_json['errors']}")
+                self._collect_tickets(chunk, response_json.get("data") or [])
+            except (requests.RequestException, ValueError) as e:
+                print(f"Expo push failed for {len(chunk)} message(s): {e}")
+                for key, _ in chunk:
+                    failed[key] = str(e)
+
+        return failed
+
+    def _collect_tickets(self, chunk, tickets):
+        # Expo returns one ticket per message, in request order
+        for (key, message), ticket in zip(chunk, tickets):
+            if ticket.get("status") == "ok" and ticket.get("id"):
+                self.tickets.append((ticket["id"], message["to"], key))
+            elif is_device_not_registered(ticket):
+                self.dead_tokens.add(message["to"])
+
+
+@contextmanager
+def collect():
+    """
+    Routes send_push_batch calls on this thread into a PushBatch until the block exits.
+    """
+    batch = PushBatch()
+    _local.batch = batch
+    try:
+        yield batch
+    finally:
+        _local.batch = None
+
+
+# Receipts ----------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+def fetch_receipts(ticket_ids):
+    """
+    Looks up delivery receipts for ticket ids, 1000 per Expo request.
+    Returns {ticket_id: receipt}; ids Expo does not know yet (or anymore) are absent.
+    """
+    receipts = {}
+    for i in range(0, len(ticket_ids), EXPO_RECEIPT_CHUNK_SIZE):
+        chunk = ticket_ids[i:i + EXPO_RECEIPT_CHUNK_SIZE]
+        response = _session.post(
+            f"{EXPO_API_BASE}/push/getReceipts",
+            json={"ids": chunk},
+            timeout=EXPO_PUSH_TIMEOUT
+        )
+        response.raise_for_status()
+        receipts.update(response.json().get("data") or {})
+    return receipts
+
+
+def is_device_not_registered(ticket_or_receipt):
+    return (
+        ticket_or_receipt.get("status") == "error"
+        and (ticket_or_receipt.get("details") or {}).get("error") == "DeviceNotRegistered"
+    )
@@ -1,6 +1,7 @@
 from flask import jsonify
 import mysql.connector
 import request_helper
+from auth.middleware import bind_principal
 
 # -------------------------------------------------------------------------------------------------------
 # POST Push Token
@@ -39,6 +40,11 @@ def register_push_token(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'user_id')
+        if error:
+            return jsonify(error), 403
+
         # Extract validated values
         user_id = fields['user_id']
         expo_push_token = fields['expo_push_token']
@@ -115,6 +121,11 @@ def delete_push_token(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'user_id')
+        if error:
+            return jsonify(error), 403
+
         # Extract validated values
         user_id = fields['user_id']
         expo_push_token = fields['expo_push_token']
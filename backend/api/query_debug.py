@@ -0,0 +1,151 @@
+import os
+import re
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from flask import request
+
+import db_pool
+
+# Slow-Query Log and N+1 Detector (development) ---------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# With QUERY_DEBUG=1 every pooled cursor is observed:
+#   - a statement slower than SLOW_QUERY_MS is logged with its parameters and the app line that ran it
+#   - when one request (or one track() block, e.g. a notification worker batch) executes the same
+#     statement shape more than N_PLUS_ONE_THRESHOLD times, the shape, count and call sites are logged.
+#     That is the signature of a loop issuing one query per row, such as one token lookup per employee.
+#
+# Responses also carry X-Query-Count so the count is visible from the client / loadtest.
+#
+# Environment:
+#   QUERY_DEBUG             1 = enable (default: on when FLASK_DEBUG=1, otherwise off)
+#   SLOW_QUERY_MS           Slow-query threshold in milliseconds (default 100)
+#   N_PLUS_ONE_THRESHOLD    Repeats of one statement shape per request before it is flagged (default 5)
+
+QUERY_DEBUG = os.environ.get("QUERY_DEBUG", os.environ.get("FLASK_DEBUG", "0")) == "1"
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 100))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", 5))
+
+_IGNORED_FILES = ("db_pool.py", "query_debug.py", "metrics.py")
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"IN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+_current = threading.local()
+
+
+def statement_shape(statement):
+    """
+    Normalizes a statement so calls that differ only in literal values or IN-list length compare equal.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip().rstrip(";")
+
+
+def call_site():
+    """
+    Returns "file:line in function" for the innermost frame of the app (not the pool or a library).
+    """
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        filename = frame.filename
+        if filename.endswith(_IGNORED_FILES) or "site-packages" in filename or filename.startswith("<"):
+            continue
+        return f"{os.path.relpath(filename)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+def _truncate(value, limit=300):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+# Tracking ----------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+def _begin(label):
+    _current.scope = {"label": label, "shapes": {}, "queries": 0, "started": time.perf_counter()}
+
+
+def _finish():
+    """
+    Ends the current scope, logs repeated shapes, and returns the number of statements it ran.
+    """
+    scope = getattr(_current, "scope", None)
+    _current.scope = None
+    if scope is None:
+        return 0
+
+    for shape, (count, sites) in scope["shapes"].items():
+        if count > N_PLUS_ONE_THRESHOLD:
+            print(f"N+1 suspect in {scope['label']}: {count}x {shape[:300]}")
+            for site, site_count in sorted(sites.items(), key=lambda item: -item[1])[:3]:
+                print(f"    {site_count}x from {site}")
+    return scope["queries"]
+
+
+@contextmanager
+def track(label):
+    """
+    Applies the N+1 check to a block outside a Flask request (e.g. one worker batch).
+    Does nothing when QUERY_DEBUG is off.
+    """
+    if not QUERY_DEBUG:
+        yield
+        return
+
+    db_pool.register_cursor_hook(_on_execute)
+    _begin(label)
+    try:
+        yield
+    finally:
+        _finish()
+
+
+def _on_execute(statement, params, seconds):
+    site = None
+
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        site = call_site()
+        print(f"Slow query ({seconds * 1000:.1f}ms) at {site}: {_WHITESPACE.sub(' ', statement).strip()[:500]} "
+              f"params={_truncate(params)}")
+
+    scope = getattr(_current, "scope", None)
+    if scope is None:
+        return
+
+    scope["queries"] += 1
+    shape = statement_shape(statement)
+    count, sites = scope["shapes"].get(shape, (0, {}))
+    # Call sites are only resolved for shapes that repeat, keeping the common path cheap
+    if count >= 1:
+        site = site or call_site()
+        sites[site] = sites.get(site, 0) + 1
+    scope["shapes"][shape] = (count + 1, sites)
+
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+def init_app(app):
+    if not QUERY_DEBUG:
+        return
+
+    db_pool.register_cursor_hook(_on_execute)
+    print(f"Query debug enabled (slow >= {SLOW_QUERY_MS}ms, N+1 > {N_PLUS_ONE_THRESHOLD} repeats)")
+
+    @app.before_request
+    def begin_query_tracking():
+        _begin(f"{request.method} {request.path}")
+
+    @app.after_request
+    def finish_query_tracking(response):
+        response.headers["X-Query-Count"] = str(_finish())
+        return response
@@ -2,6 +2,8 @@ from flask import jsonify
 import mysql.connector
 import os
 import request_helper
+from auth.middleware import bind_principal
+import task_materializer
 
 from datetime import datetime
 
@@ -78,6 +80,7 @@ def get_recurring_tasks(db, request):
                 r.fri,
                 r.sat,
                 r.sun,
+                r.weekday_mask,
                 DATE_FORMAT(r.start_date, '%Y-%m-%d') AS start_date,
                 DATE_FORMAT(r.end_date, '%Y-%m-%d') AS end_date,
                 DATE_FORMAT(r.timestamp, '%Y-%m-%d %H:%i') AS timestamp
@@ -102,7 +105,7 @@ def get_recurring_tasks(db, request):
             query += " AND r.section_id = %s"
             query_params.append(section_id)
 
-        # Day-of-week filters (0 or 1)
+        # Day-of-week filters (0 or 1), answered from the weekday_mask index
         dow_map = {
             'mon': mon,
             'tue': tue,
@@ -113,10 +116,11 @@ def get_recurring_tasks(db, request):
             'sun': sun
         }
 
-        for col, val in dow_map.items():
-            if val in (0, 1):
-                query += f" AND r.{col} = %s"
-                query_params.append(val)
+        set_bits = sum(task_materializer.WEEKDAY_BITS[col] for col, val in dow_map.items() if val == 1)
+        clear_bits = sum(task_materializer.WEEKDAY_BITS[col] for col, val in dow_map.items() if val == 0)
+        if set_bits or clear_bits:
+            query += task_materializer.mask_filter(
+                "r.weekday_mask", task_materializer.masks_matching(set_bits, clear_bits), query_params)
 
         # Date filters
         if start_date:
@@ -183,13 +187,11 @@ def get_recurring_tasks(db, request):
 
 def insert_recurring_task(db, request):
     """
-    Inserts a new record into the "recurring_task" table.
-    Then triggers a mysql stored procedure to migrate
-    today's recurring tasks to the normal "task" table.
+    Inserts a new record into the "recurring_task" table
+    and materializes its upcoming rows in the "task" table.
     """
     conn = None
     cursor = None
-    proc_cursor = None
     try:
         # Define Required Fields
         required_fields = [
@@ -215,6 +217,11 @@ def insert_recurring_task(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'author_id')
+        if error:
+            return jsonify(error), 403
+
         title = fields['title']
         description = fields['description']
         author_id = fields['author_id']
@@ -252,12 +259,10 @@ def insert_recurring_task(db, request):
             
 
         inserted_id = cursor.lastrowid
-        
-        conn.commit()
 
-        # Call the Stored Procedure to insert today's recurring tasks into 'task' table
-        proc_cursor = conn.cursor(dictionary=True)
-        proc_cursor.callproc("insert_recurring_tasks_procedure")
+        # Today's (and the horizon's) rows for this template only, committed with the template
+        task_materializer.materialize(conn, recurring_task_id=inserted_id)
+
         conn.commit()
 
         return jsonify({"status": "success", "inserted_id": inserted_id}), 200
@@ -273,8 +278,6 @@ def insert_recurring_task(db, request):
     finally:
         if cursor:
             cursor.close()
-        if proc_cursor:
-            proc_cursor.close()
         if conn:
             conn.close()
 
@@ -321,6 +324,11 @@ def update_recurring_task(db, request, recurring_task_id):
         if not fields:
             return jsonify({"status": "error", "message": "No fields provided to update"}), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'author_id', allow_admin=True)
+        if error:
+            return jsonify(error), 403
+
         # Validate day-of-week flags
         dow_fields = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
         for dow in dow_fields:
@@ -355,12 +363,17 @@ def update_recurring_task(db, request, recurring_task_id):
         """
 
         cursor.execute(query, tuple(values))
-        conn.commit()
         rowcount = cursor.rowcount
 
         if rowcount == 0:
+            conn.rollback()
             return jsonify({"status": "error", "message": "No recurring task found with given ID"}), 404
 
+        # Regenerate the untouched upcoming rows from the edited template
+        task_materializer.refresh_template(conn, recurring_task_id)
+
+        conn.commit()
+
         return jsonify({"status": "success", "updated_rows": rowcount}), 200
 
     except mysql.connector.Error as e:
@@ -404,6 +417,9 @@ def delete_recurring_task(db, recurring_task_id):
         if not result:
             return jsonify({"status": "error", "message": "Recurring Task not found"}), 404
 
+        # Drop its untouched upcoming rows (they would otherwise stay behind as one-off tasks)
+        task_materializer.discard_future(conn, recurring_task_id)
+
         # Delete the recurring task
         cursor.execute(
             "DELETE FROM recurring_task WHERE recurring_task_id = %s",
@@ -2,9 +2,26 @@ from flask import jsonify
 import mysql.connector
 import os
 import request_helper
+from cache import TTLCache
+import etag
+from data_version import probe
 from datetime import datetime, timedelta
 from typing import List
 
+# Schedule Cache ----------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Each entry stores the table versions it was built from. A lookup re-reads those versions (one tiny
+# indexed query) and only reuses the entry when nothing it depends on has been written since, so every
+# worker sees a write on its very next request. The TTL just bounds memory for ranges nobody asks for again.
+
+SCHEDULE_SCOPES = ('shift', 'availability', 'time_off_accepted', 'employee_roster', 'role', 'section')
+
+schedule_cache = TTLCache(
+    maxsize=int(os.environ.get("SCHEDULE_CACHE_SIZE", 128)),
+    ttl=float(os.environ.get("SCHEDULE_CACHE_TTL", 300))
+)
+
 # GET Schedule Data -------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
 
@@ -63,154 +80,226 @@ def get_schedule_data(db, request):
     if params.get("is_today") == "1":
         start_date = end_date = datetime.today().strftime('%Y-%m-%d')
 
+    if not start_date or not end_date:
+        return jsonify({"status": "error", "message": "start_date and end_date are required (or is_today=1)"}), 400
+
+    try:
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid date range format. Expected YYYY-MM-DD."}), 400
+
+    if end_dt < start_dt:
+        return jsonify({"status": "error", "message": "end_date must be on or after start_date"}), 400
+
     cursor = None
     try:
         cursor = db.cursor(dictionary=True)
 
-        # 1. Fetch Employee and Base Availability
-        emp_query = """
-            SELECT 
-                e.employee_id, 
-                CONCAT(e.first_name, ' ', e.last_name) AS full_name,
-                e.primary_role, 
-                r.role_name AS primary_role_name,
-                a.day_of_week,
-                a.is_available,
-                TIME_FORMAT(a.start_time, '%h:%i %p') AS avail_start,
-                TIME_FORMAT(a.end_time, '%h:%i %p') AS avail_end
-            FROM employee e
-            INNER JOIN role r ON e.primary_role = r.role_id
-            LEFT JOIN availability a ON e.employee_id = a.employee_id
-            WHERE e.is_active = 1
-        """
-        
-        emp_filters = []
-        emp_params = []
-        if role_ids:
-            emp_filters.append(f"e.primary_role IN ({','.join(['%s']*len(role_ids))})")
-            emp_params.extend(role_ids)
-        if full_name:
-            emp_filters.append("CONCAT(e.first_name, ' ', e.last_name) LIKE %s")
-            emp_params.append(f"%{full_name}%")
-        
-        if emp_filters:
-            emp_query += " AND " + " AND ".join(emp_filters)
-        
-        emp_query += " ORDER BY e.last_name ASC"
-        cursor.execute(emp_query, tuple(emp_params))
-        emp_rows = cursor.fetchall()
-
-        employees = {}
-        for row in emp_rows:
-            eid = row["employee_id"]
-            if eid not in employees:
-                employees[eid] = {
-                    "employee_id": eid,
-                    "full_name": row["full_name"],
-                    "primary_role": row["primary_role"],
-                    "primary_role_name": row["primary_role_name"],
-                    "availability_map": {}, 
-                    "days": [] 
-                }
-            if row["day_of_week"]:
-                is_all_day = 1 if (row['avail_start'] is None and row['avail_end'] is None and row['is_available'] == 1) else 0
-                employees[eid]["availability_map"][row["day_of_week"]] = {
-                    "is_available": row["is_available"],
-                    "start_time": row['avail_start'],
-                    "end_time": row['avail_end'],
-                    "all_day": is_all_day
-                }
-
-        # 2. Fetch Time Off Separately (Independent of Shifts)
-        # This ensures time off shows up even on days with no shifts.
-        time_off_query = """
-            SELECT employee_id, start_date, end_date
-            FROM time_off_request
-            WHERE status = 'Accepted'
-            AND (start_date <= %s AND end_date >= %s)
-        """
-        cursor.execute(time_off_query, (end_date, start_date))
-        time_off_rows = cursor.fetchall()
-
-        # 3. Fetch Shift Data
-        data_query = """
-            SELECT 
-                s.employee_id, s.shift_id, s.section_id, sec.section_name,
-                TIME_FORMAT(s.start_time, '%h:%i %p') AS start_time,
-                DATE_FORMAT(s.date, '%Y-%m-%d') AS date
-            FROM shift s
-            LEFT JOIN section sec ON s.section_id = sec.section_id
-            WHERE s.date BETWEEN %s AND %s
-        """
-        data_params = [start_date, end_date]
-        if section_ids:
-            data_query += f" AND s.section_id IN ({','.join(['%s']*len(section_ids))})"
-            data_params.extend(section_ids)
-
-        cursor.execute(data_query, tuple(data_params))
-        shift_rows = cursor.fetchall()
-
-        # Map shifts
-        shift_map = {}
-        for s in shift_rows:
-            key = (s['employee_id'], s['date'])
-            shift_map[key] = {
-                "shift_id": s["shift_id"],
-                "start_time": s["start_time"],
-                "section_id": s["section_id"],
-                "section_name": s["section_name"]
-            }
+        versions, clock = probe(cursor, SCHEDULE_SCOPES)
+
+        # Conditional GET: same probe doubles as the ETag seed
+        tag = etag.from_versions(request, versions, clock)
+        if etag.matches(request, tag):
+            return etag.not_modified(tag)
+
+        cache_key = (start_dt, end_dt, tuple(sorted(section_ids)), tuple(sorted(role_ids)), full_name)
 
-        # 4. Build the Days List
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-        num_days = (end_dt - start_dt).days + 1
-
-        for eid in employees:
-            for i in range(num_days):
-                current_date = start_dt + timedelta(days=i)
-                date_str = current_date.strftime('%Y-%m-%d')
-                day_name = current_date.strftime('%A')
-                day_index = (current_date.weekday() + 1) % 7 + 1 
-                
-                # Check for Approved Time Off
-                time_off_val = 0
-                for tor in time_off_rows:
-                    if tor['employee_id'] == eid:
-                        # tor dates are likely 'date' objects from MySQL connector
-                        if tor['start_date'].strftime('%Y-%m-%d') <= date_str <= tor['end_date'].strftime('%Y-%m-%d'):
-                            time_off_val = 1
-                            break
-
-                # Get Shift (Single object or None)
-                shift_output = shift_map.get((eid, date_str))
-
-                # Get Availability
-                base_avail = employees[eid]["availability_map"].get(day_name, {
-                    "is_available": 1, 
-                    "start_time": None,
-                    "end_time": None,
-                    "all_day": 1
-                })
-
-                employees[eid]["days"].append({
-                    "date": date_str,
-                    "day_name": day_name,
-                    "day_index": day_index,
-                    "shift": shift_output,
-                    "availability": base_avail,
-                    "time_off_approved": time_off_val
-                })
-            
-            if "availability_map" in employees[eid]:
-                del employees[eid]["availability_map"]
-
-        return jsonify(list(employees.values())), 200
+        cached = schedule_cache.get(cache_key)
+        if cached is not None and cached[0] == versions:
+            return etag.json_response(cached[1], tag), 200
+
+        result = build_schedule(cursor, start_dt, end_dt, section_ids, role_ids, full_name)
+        schedule_cache.set(cache_key, (versions, result))
+
+        return etag.json_response(result, tag), 200
 
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
         if cursor: cursor.close()
+        db.close()
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+# Schedule Assembly -------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+# Indexed by date.weekday() (0 = Monday ... 6 = Sunday)
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+WEEKDAY_INDEX = {name: i for i, name in enumerate(WEEKDAY_NAMES)}
+
+# Used when an employee has no availability row for a weekday
+DEFAULT_AVAILABILITY = {
+    "is_available": 1,
+    "start_time": None,
+    "end_time": None,
+    "all_day": 1
+}
+
+
+def build_date_table(start_dt, end_dt):
+    """
+    Formats every date in the range once.
+    Returns a list of (date_str, day_name, day_index, weekday) where
+    day_index is 1 (Sun)...7 (Sat) to match MySQL DAYOFWEEK() and weekday is date.weekday().
+    """
+    num_days = (end_dt - start_dt).days + 1
+    table = []
+    for i in range(num_days):
+        current = start_dt + timedelta(days=i)
+        weekday = current.weekday()
+        table.append((current.strftime('%Y-%m-%d'), WEEKDAY_NAMES[weekday], (weekday + 1) % 7 + 1, weekday))
+    return table
+
+
+def build_time_off_index(time_off_rows, start_dt, num_days):
+    """
+    Marks approved time off per employee as a bytearray over the day offsets of the range,
+    so the grid can test a day with a single index instead of rescanning every request.
+    """
+    index = {}
+    for tor in time_off_rows:
+        first = max((tor['start_date'] - start_dt).days, 0)
+        last = min((tor['end_date'] - start_dt).days, num_days - 1)
+        if first > last:
+            continue
+
+        marks = index.get(tor['employee_id'])
+        if marks is None:
+            marks = index[tor['employee_id']] = bytearray(num_days)
+        marks[first:last + 1] = b'\x01' * (last - first + 1)
+    return index
+
+
+def build_schedule(cursor, start_dt, end_dt, section_ids, role_ids, full_name):
+    """
+    Runs the three schedule queries and assembles the per-employee day grid.
+    Work is proportional to the size of the output: each lookup inside the grid loop is a
+    list/dict index into structures precomputed once per request.
+    """
+    start_date = start_dt.strftime('%Y-%m-%d')
+    end_date = end_dt.strftime('%Y-%m-%d')
 
+    # 1. Fetch Employee and Base Availability
+    emp_query = """
+        SELECT 
+            e.employee_id, 
+            CONCAT(e.first_name, ' ', e.last_name) AS full_name,
+            e.primary_role, 
+            r.role_name AS primary_role_name,
+            a.day_of_week,
+            a.is_available,
+            TIME_FORMAT(a.start_time, '%h:%i %p') AS avail_start,
+            TIME_FORMAT(a.end_time, '%h:%i %p') AS avail_end
+        FROM employee e
+        INNER JOIN role r ON e.primary_role = r.role_id
+        LEFT JOIN availability a ON e.employee_id = a.employee_id
+        WHERE e.is_active = 1
+    """
+    
+    emp_filters = []
+    emp_params = []
+    if role_ids:
+        emp_filters.append(f"e.primary_role IN ({','.join(['%s']*len(role_ids))})")
+        emp_params.extend(role_ids)
+    if full_name:
+        emp_filters.append("CONCAT(e.first_name, ' ', e.last_name) LIKE %s")
+        emp_params.append(f"%{full_name}%")
+    
+    if emp_filters:
+        emp_query += " AND " + " AND ".join(emp_filters)
+    
+    emp_query += " ORDER BY e.last_name ASC"
+    cursor.execute(emp_query, tuple(emp_params))
+    emp_rows = cursor.fetchall()
+
+    # Employees in query order, each with availability keyed by weekday index
+    employees = {}
+    availability = {}
+    for row in emp_rows:
+        eid = row["employee_id"]
+        if eid not in employees:
+            employees[eid] = {
+                "employee_id": eid,
+                "full_name": row["full_name"],
+                "primary_role": row["primary_role"],
+                "primary_role_name": row["primary_role_name"],
+                "days": []
+            }
+            availability[eid] = [DEFAULT_AVAILABILITY] * 7
+        if row["day_of_week"]:
+            is_all_day = 1 if (row['avail_start'] is None and row['avail_end'] is None and row['is_available'] == 1) else 0
+            availability[eid][WEEKDAY_INDEX[row["day_of_week"]]] = {
+                "is_available": row["is_available"],
+                "start_time": row['avail_start'],
+                "end_time": row['avail_end'],
+                "all_day": is_all_day
+            }
+
+    # 2. Fetch Time Off Separately (Independent of Shifts)
+    # This ensures time off shows up even on days with no shifts.
+    time_off_query = """
+        SELECT employee_id, start_date, end_date
+        FROM time_off_request
+        WHERE status = 'Accepted'
+        AND (start_date <= %s AND end_date >= %s)
+    """
+    cursor.execute(time_off_query, (end_date, start_date))
+    time_off_rows = cursor.fetchall()
+
+    # 3. Fetch Shift Data
+    data_query = """
+        SELECT 
+            s.employee_id, s.shift_id, s.section_id, sec.section_name,
+            TIME_FORMAT(s.start_time, '%h:%i %p') AS start_time,
+            DATE_FORMAT(s.date, '%Y-%m-%d') AS date
+        FROM shift s
+        LEFT JOIN section sec ON s.section_id = sec.section_id
+        WHERE s.date BETWEEN %s AND %s
+    """
+    data_params = [start_date, end_date]
+    if section_ids:
+        data_query += f" AND s.section_id IN ({','.join(['%s']*len(section_ids))})"
+        data_params.extend(section_ids)
+
+    cursor.execute(data_query, tuple(data_params))
+    shift_rows = cursor.fetchall()
+
+    # Map shifts
+    shift_map = {}
+    for s in shift_rows:
+        key = (s['employee_id'], s['date'])
+        shift_map[key] = {
+            "shift_id": s["shift_id"],
+            "start_time": s["start_time"],
+            "section_id": s["section_id"],
+            "section_name": s["section_name"]
+        }
+
+    # 4. Build the Days List from the precomputed tables
+    date_table = build_date_table(start_dt, end_dt)
+    time_off_index = build_time_off_index(time_off_rows, start_dt, len(date_table))
+    no_time_off = bytes(len(date_table))
+
+    for eid, emp in employees.items():
+        emp_availability = availability[eid]
+        emp_time_off = time_off_index.get(eid, no_time_off)
+        days = emp["days"]
+
+        for i, (date_str, day_name, day_index, weekday) in enumerate(date_table):
+            days.append({
+                "date": date_str,
+                "day_name": day_name,
+                "day_index": day_index,
+                "shift": shift_map.get((eid, date_str)),
+                "availability": emp_availability[weekday],
+                "time_off_approved": emp_time_off[i]
+            })
+
+    return list(employees.values())
+
+# -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
-# -------------------------------------------------------------------------------------------------------
\ No newline at end of file
@@ -4,16 +4,24 @@ from notifications.events import NotificationEvent
 import mysql.connector
 import os
 import request_helper
-from datetime import datetime
+import etag
+import archive
+from datetime import datetime, timedelta
 
 # GET Shifts --------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
 
 
+# table_version scopes read by get_shifts (see etag.py)
+SHIFT_SCOPES = ('shift', 'employee', 'role', 'section')
+
 def get_shifts(db, request):
     """
     Fetches shift records based on optional URL query parameters.
     If no parameters are provided, returns all shifts (equivalent to SELECT * FROM shift).
+
+    Shifts past the archive horizon live in shift_archive (see archive.py); include_history=1
+    with a start_date/end_date range (or date) reads them too.
     """
     conn = None
     cursor = None
@@ -32,6 +40,7 @@ def get_shifts(db, request):
             'is_today': int,  # 1=True, 0=False
             'next_shift': int,  # 1=True, 0=False
             'next_count': int,  # Max number of upcoming shifts to return
+            'include_history': int,  # 1=True: also read archived shifts (needs a date range)
         }
 
         # Validate and parse parameters
@@ -54,12 +63,23 @@ def get_shifts(db, request):
         next_count = params.get('next_count') or 1
         if next_count < 1:
             next_count = 1
+        include_history = params.get('include_history') == 1
+
+        # The archive is only read for an explicit range, never for an open-ended list
+        if include_history and not (date or (start_date and end_date)):
+            return jsonify({"error": "include_history needs start_date and end_date (or date)."}), 400
 
         conn = db
         cursor = conn.cursor(dictionary=True)
 
+        # Conditional GET: answer from the version probe when the client's copy is current
+        clock_format = etag.MINUTE if (str(next_shift) == "1" and employee_id) else etag.DAY
+        tag = etag.compute(cursor, request, SHIFT_SCOPES, clock_format)
+        if etag.matches(request, tag):
+            return etag.not_modified(tag)
+
         # Base Query
-        query = """
+        query = f"""
             SELECT
                 sh.shift_id,
                 sh.employee_id,
@@ -73,8 +93,9 @@ def get_shifts(db, request):
                 DATE_FORMAT(sh.date, '%Y-%m-%d') AS date,
                 DATE_FORMAT(sh.date, '%W') AS day_name,
                 DAYOFWEEK(sh.date) AS day_index,
-                DATE_FORMAT(sh.timestamp, '%Y-%m-%d %H:%i') AS timestamp
-            FROM shift sh
+                DATE_FORMAT(sh.timestamp, '%Y-%m-%d %H:%i') AS timestamp,
+                sh.version
+            FROM {archive.source('shift', include_history)} sh
             JOIN employee e ON sh.employee_id = e.employee_id
             LEFT JOIN role pr ON e.primary_role = pr.role_id
             JOIN section se ON se.section_id = sh.section_id
@@ -101,7 +122,7 @@ def get_shifts(db, request):
 
             cursor.execute(query, tuple(query_params))
             result = cursor.fetchall()
-            return jsonify(result), 200
+            return etag.json_response(result, tag), 200
 
         # -----------------------------
         # Build Dynamic Query
@@ -174,7 +195,7 @@ def get_shifts(db, request):
         cursor.execute(query, tuple(query_params))
         result = cursor.fetchall()
 
-        return jsonify(result), 200
+        return etag.json_response(result, tag), 200
 
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
@@ -242,8 +263,6 @@ def insert_shift(db, request):
 
         inserted_id = cursor.lastrowid
 
-        conn.commit()
-
         dispatch_notification(
             db,
             NotificationEvent.SHIFT_CREATED,
@@ -253,6 +272,8 @@ def insert_shift(db, request):
             }
         )
 
+        conn.commit()
+
         return jsonify({"status": "success", "inserted_id": inserted_id}), 201
 
     except mysql.connector.Error as e:
@@ -273,6 +294,417 @@ def insert_shift(db, request):
 # -------------------------------------------------------------------------------------------------------
 
 
+# POST Shift Batch (publish a schedule) ----------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+# Upper bound on shifts per publish request (a week for a large staff fits comfortably)
+MAX_PUBLISH_SHIFTS = 1000
+
+# Accepted start_time formats (stored as TIME)
+START_TIME_FORMATS = ("%H:%M", "%H:%M:%S")
+
+
+def _parse_start_time(value):
+    """
+    Returns value as 'HH:MM:SS', or raises ValueError if it is not HH:MM / HH:MM:SS.
+    """
+    for time_format in START_TIME_FORMATS:
+        try:
+            return datetime.strptime(str(value), time_format).strftime("%H:%M:%S")
+        except ValueError:
+            continue
+    raise ValueError(f"invalid start_time: {value!r}")
+
+def publish_shifts(db, request):
+    """
+    Inserts a whole schedule (e.g. one week) in a single transaction.
+
+    Body: {"shifts": [{"employee_id", "start_time", "date", "section_id"}, ...]}
+
+    Double-booking and approved time-off conflicts are checked for the whole batch up front, so
+    the response lists every conflict (409) instead of failing on the first trigger. Each affected
+    employee gets one "schedule posted" notification rather than one per shift.
+    """
+    conn = None
+    cursor = None
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('shifts'), list) or not data['shifts']:
+            return jsonify({"status": "error", "message": "Body must contain a non-empty 'shifts' list"}), 400
+
+        if len(data['shifts']) > MAX_PUBLISH_SHIFTS:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {MAX_PUBLISH_SHIFTS} shifts can be published at once"
+            }), 400
+
+        # Validate every shift the same way insert_shift validates one
+        rows = []
+        seen = set()
+        for index, item in enumerate(data['shifts']):
+            if not isinstance(item, dict):
+                return jsonify({"status": "error", "message": f"shifts[{index}] must be an object"}), 400
+
+            for field in ('employee_id', 'start_time', 'date', 'section_id'):
+                if item.get(field) is None:
+                    return jsonify({
+                        "status": "error",
+                        "message": f"shifts[{index}]: Missing required field: '{field}'"
+                    }), 400
+
+            try:
+                employee_id = int(item['employee_id'])
+                section_id = int(item['section_id'])
+                shift_date = datetime.strptime(str(item['date']), "%Y-%m-%d").date()
+                start_time = _parse_start_time(item['start_time'])
+            except (ValueError, TypeError):
+                return jsonify({
+                    "status": "error",
+                    "message": f"shifts[{index}]: employee_id and section_id must be int, date YYYY-MM-DD, "
+                               f"start_time HH:MM"
+                }), 400
+
+            if (employee_id, shift_date) in seen:
+                return jsonify({
+                    "status": "error",
+                    "message": f"shifts[{index}]: employee {employee_id} appears twice on {shift_date}"
+                }), 400
+            seen.add((employee_id, shift_date))
+
+            rows.append((employee_id, start_time, shift_date, section_id))
+
+        employee_ids = sorted({row[0] for row in rows})
+        start_date = min(row[2] for row in rows)
+        end_date = max(row[2] for row in rows)
+        employee_placeholders = ','.join(['%s'] * len(employee_ids))
+
+        conn = db
+        cursor = conn.cursor(dictionary=True)
+
+        conn.start_transaction()
+
+        # Existing shifts for the same employees in the window (locked so nothing slips in before the insert)
+        cursor.execute(f"""
+            SELECT employee_id, date, shift_id
+            FROM shift
+            WHERE employee_id IN ({employee_placeholders})
+              AND date BETWEEN %s AND %s
+            FOR UPDATE;
+        """, (*employee_ids, start_date, end_date))
+        booked = {(row["employee_id"], row["date"]): row["shift_id"] for row in cursor.fetchall()}
+
+        # Approved time off overlapping the window
+        cursor.execute(f"""
+            SELECT employee_id, start_date, end_date
+            FROM time_off_request
+            WHERE employee_id IN ({employee_placeholders})
+              AND status = 'Accepted'
+              AND start_date <= %s
+              AND end_date >= %s;
+        """, (*employee_ids, end_date, start_date))
+        time_off = {}
+        for row in cursor.fetchall():
+            time_off.setdefault(row["employee_id"], []).append((row["start_date"], row["end_date"]))
+
+        conflicts = []
+        for employee_id, start_time, shift_date, section_id in rows:
+            if (employee_id, shift_date) in booked:
+                conflicts.append({
+                    "employee_id": employee_id,
+                    "date": shift_date.isoformat(),
+                    "reason": "Employee already has a shift on this date",
+                    "shift_id": booked[(employee_id, shift_date)]
+                })
+            elif any(start <= shift_date <= end for start, end in time_off.get(employee_id, [])):
+                conflicts.append({
+                    "employee_id": employee_id,
+                    "date": shift_date.isoformat(),
+                    "reason": "Employee has approved time off for this date"
+                })
+
+        if conflicts:
+            conn.rollback()
+            return jsonify({
+                "status": "error",
+                "message": "Schedule has conflicts; nothing was published",
+                "conflicts": conflicts
+            }), 409
+
+        # executemany turns this into one multi-row INSERT
+        cursor.executemany("""
+            INSERT INTO shift (employee_id, start_time, date, section_id)
+            VALUES (%s, %s, %s, %s)
+        """, rows)
+        inserted = cursor.rowcount
+
+        # Resolve the new ids through (employee_id, date), which is unique. Rows that were there before
+        # the insert (booked, still locked) are excluded explicitly rather than relying on any conflict
+        # having aborted the batch.
+        cursor.execute(f"""
+            SELECT shift_id, employee_id, date
+            FROM shift
+            WHERE employee_id IN ({employee_placeholders})
+              AND date BETWEEN %s AND %s
+            ORDER BY date, employee_id;
+        """, (*employee_ids, start_date, end_date))
+        booked_ids = set(booked.values())
+        inserted_rows = [
+            row for row in cursor.fetchall()
+            if (row["employee_id"], row["date"]) in seen and row["shift_id"] not in booked_ids
+        ]
+        inserted_ids = [row["shift_id"] for row in inserted_rows]
+
+        # Notify the employees who actually got a new shift
+        dispatch_notification(
+            db,
+            NotificationEvent.SCHEDULE_PUBLISHED,
+            {
+                "employee_ids": sorted({row["employee_id"] for row in inserted_rows}),
+                "start_date": start_date,
+                "end_date": end_date
+            }
+        )
+
+        conn.commit()
+
+        return jsonify({"status": "success", "inserted": inserted, "inserted_ids": inserted_ids}), 201
+
+    except mysql.connector.Error as e:
+        # Conflicts the up-front check cannot see: a racing insert on employee_date_idx or a trigger SIGNAL
+        if e.errno in (1062, 1644):
+            conn.rollback()
+            reason = e.msg if e.errno == 1644 else "Employee already has a shift on this date"
+            return jsonify({
+                "status": "error",
+                "message": f"Schedule has conflicts; nothing was published ({reason})"
+            }), 409
+
+        # Unknown employee_id or section_id
+        if e.errno == 1452:
+            conn.rollback()
+            return jsonify({
+                "status": "error",
+                "message": "Every employee_id and section_id must exist; nothing was published"
+            }), 400
+
+        print(f"Database error: {e}")
+        return jsonify({"status": "error", "message": "Database error occurred"}), 500
+
+    except Exception as e:
+        print(f"Error occurred: {e}")
+        return jsonify({"status": "error", "message": "An unexpected error occurred"}), 500
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+# POST Copy Week ---------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+def copy_week(db, request):
+    """
+    Clones the 7 days starting at source_week_start onto the 7 days starting at target_week_start
+    with one INSERT ... SELECT. Optional section_id copies a single section.
+
+    Shifts are skipped (and listed under "skipped") when the employee is inactive, already works
+    the target date, has approved time off then, or is unavailable per their availability.
+    dry_run=true returns the report without inserting anything.
+
+    Like publish_shifts, the target week is locked for the employees being copied before the
+    report is built, so a concurrent insert cannot turn a reported copy into a trigger error.
+    """
+    conn = None
+    cursor = None
+    skipped = []
+    try:
+        # Define Required Fields
+        required_fields = ['source_week_start', 'target_week_start']
+
+        # Define Expected Field Types
+        field_types = {
+            'source_week_start': str,  # YYYY-MM-DD
+            'target_week_start': str,  # YYYY-MM-DD
+            'section_id': int,         # Optional: copy one section only
+            'dry_run': bool,           # Optional: report only
+        }
+
+        # Validate the fields in JSON body
+        fields, error = request_helper.verify_body(request, field_types, required_fields)
+        if error:
+            return jsonify(error), 400
+
+        try:
+            source_start = datetime.strptime(fields['source_week_start'], "%Y-%m-%d").date()
+            target_start = datetime.strptime(fields['target_week_start'], "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"status": "error", "message": "Week starts must be YYYY-MM-DD"}), 400
+
+        # Whole weeks only, so every copied shift keeps its weekday (and the availability row that applies)
+        offset = (target_start - source_start).days
+        if offset == 0 or offset % 7 != 0:
+            return jsonify({
+                "status": "error",
+                "message": "target_week_start must be a whole number of weeks from source_week_start"
+            }), 400
+
+        section_id = fields.get('section_id')
+        dry_run = fields.get('dry_run') or False
+        source_end = source_start + timedelta(days=6)
+
+        # Source shifts of the week, with the availability row for their weekday
+        source = """
+            FROM shift s
+            JOIN employee e ON e.employee_id = s.employee_id
+            LEFT JOIN availability a
+                ON a.employee_id = s.employee_id
+                AND a.day_of_week = DAYNAME(s.date)
+            WHERE s.date BETWEEN %s AND %s
+        """
+        source_params = [source_start, source_end]
+        if section_id is not None:
+            source += " AND s.section_id = %s"
+            source_params.append(section_id)
+
+        # Why a source shift can't be copied (NULL = it can)
+        conflict = """
+            CASE
+                WHEN e.is_active = 0 THEN 'Employee is inactive'
+                WHEN EXISTS (
+                    SELECT 1 FROM shift t
+                    WHERE t.employee_id = s.employee_id
+                      AND t.date = DATE_ADD(s.date, INTERVAL %s DAY)
+                ) THEN 'Employee already has a shift on this date'
+                WHEN EXISTS (
+                    SELECT 1 FROM time_off_request tor
+                    WHERE tor.employee_id = s.employee_id
+                      AND tor.status = 'Accepted'
+                      AND DATE_ADD(s.date, INTERVAL %s DAY) BETWEEN tor.start_date AND tor.end_date
+                ) THEN 'Employee has approved time off for this date'
+                WHEN a.is_available = 0 THEN 'Employee is unavailable on this day'
+                WHEN a.start_time IS NOT NULL AND s.start_time < a.start_time
+                    THEN 'Shift starts before the employee is available'
+                WHEN a.end_time IS NOT NULL AND s.start_time >= a.end_time
+                    THEN 'Shift starts after the employee is available'
+            END
+        """
+        conflict_params = [offset, offset]
+
+        conn = db
+        cursor = conn.cursor(dictionary=True)
+
+        target_end = target_start + timedelta(days=6)
+
+        conn.start_transaction()
+
+        # Employees with a shift to copy (the target week is locked for these)
+        cursor.execute(f"""
+            SELECT DISTINCT s.employee_id
+            {source};
+        """, tuple(source_params))
+        source_employee_ids = [row["employee_id"] for row in cursor.fetchall()]
+
+        booked = set()
+        if source_employee_ids:
+            employee_placeholders = ','.join(['%s'] * len(source_employee_ids))
+
+            # Existing target-week shifts for the same employees (locked so nothing slips in before the insert)
+            cursor.execute(f"""
+                SELECT shift_id
+                FROM shift
+                WHERE employee_id IN ({employee_placeholders})
+                  AND date BETWEEN %s AND %s
+                FOR UPDATE;
+            """, (*source_employee_ids, target_start, target_end))
+            booked = {row["shift_id"] for row in cursor.fetchall()}
+
+        cursor.execute(f"""
+            SELECT
+                s.shift_id,
+                s.employee_id,
+                CONCAT(e.first_name, ' ', e.last_name) AS employee_name,
+                DATE_FORMAT(DATE_ADD(s.date, INTERVAL %s DAY), '%Y-%m-%d') AS date,
+                {conflict} AS reason
+            {source}
+            ORDER BY s.date, s.employee_id;
+        """, (offset, *conflict_params, *source_params))
+        report = cursor.fetchall()
+
+        skipped = [row for row in report if row["reason"] is not None]
+
+        if dry_run or len(skipped) == len(report):
+            conn.rollback()
+            return jsonify({
+                "status": "success",
+                "inserted": 0,
+                "would_insert": len(report) - len(skipped),
+                "skipped": skipped
+            }), 200
+
+        cursor.execute(f"""
+            INSERT INTO shift (employee_id, start_time, date, section_id)
+            SELECT s.employee_id, s.start_time, DATE_ADD(s.date, INTERVAL %s DAY), s.section_id
+            {source}
+              AND ({conflict}) IS NULL;
+        """, (offset, *source_params, *conflict_params))
+        inserted = cursor.rowcount
+
+        # Notify whoever actually got a new shift: target-week rows that weren't there before the insert
+        cursor.execute(f"""
+            SELECT shift_id, employee_id
+            FROM shift
+            WHERE employee_id IN ({employee_placeholders})
+              AND date BETWEEN %s AND %s;
+        """, (*source_employee_ids, target_start, target_end))
+        employee_ids = sorted({row["employee_id"] for row in cursor.fetchall() if row["shift_id"] not in booked})
+
+        if employee_ids:
+            dispatch_notification(
+                db,
+                NotificationEvent.SCHEDULE_PUBLISHED,
+                {
+                    "employee_ids": employee_ids,
+                    "start_date": target_start,
+                    "end_date": target_end
+                }
+            )
+
+        conn.commit()
+
+        return jsonify({"status": "success", "inserted": inserted, "skipped": skipped}), 201
+
+    except mysql.connector.Error as e:
+        # Duplicate (employee_id, date) or a shift trigger's SIGNAL: nothing was copied
+        if e.errno in (1062, 1644):
+            conn.rollback()
+            return jsonify({
+                "status": "error",
+                "message": "Target week changed while copying; nothing was copied",
+                "skipped": skipped
+            }), 409
+
+        print(f"Database error: {e}")
+        return jsonify({"status": "error", "message": "Database error occurred"}), 500
+
+    except Exception as e:
+        print(f"Error occurred: {e}")
+        return jsonify({"status": "error", "message": "An unexpected error occurred"}), 500
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
 # PATCH Shift -------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
 
@@ -281,6 +713,9 @@ def update_shift(db, request, shift_id):
     Updates an existing shift record (partial update).
     shift_id comes from the URL.
     Other fields (employee_id, start_time, date, section_id) are optional.
+
+    If 'version' is provided the update only applies when it matches the
+    current row version (optimistic concurrency), otherwise 409 is returned.
     """
     conn = None
     cursor = None
@@ -291,12 +726,16 @@ def update_shift(db, request, shift_id):
             'start_time': str,   # HH:MM or HH:MM:SS
             'date': str,         # YYYY-MM-DD
             'section_id': int,
+            'version': int,      # Optional: version the client last read
         }
 
         # Validate the fields in JSON body (only optional fields here)
         fields, error = request_helper.verify_body(request, field_types, [])
         if error:
             return jsonify(error), 400
+
+        expected_version = fields.pop('version', None)
+
         if not fields:
             return jsonify({"status": "error", "message": "No fields provided to update"}), 400
 
@@ -309,26 +748,36 @@ def update_shift(db, request, shift_id):
         conn = db
         cursor = conn.cursor(dictionary=True)
 
-        # Grab employee id before update
+        conn.start_transaction()
+
+        # Lock the shift row so concurrent edits of the same shift are serialized
         cursor.execute(
-            "SELECT employee_id FROM shift WHERE shift_id = %s",
+            "SELECT employee_id, version FROM shift WHERE shift_id = %s FOR UPDATE",
             (shift_id,)
         )
         shift = cursor.fetchone()
 
         if not shift:
+            conn.rollback()
             return jsonify({"status": "error", "message": "No shift found with given ID"}), 404
 
+        if expected_version is not None and expected_version != shift["version"]:
+            conn.rollback()
+            return jsonify({
+                "status": "error",
+                "message": "Shift was modified by another request",
+                "current_version": shift["version"]
+            }), 409
+
         employee_id = shift["employee_id"]
 
         query = f"""
             UPDATE shift
-            SET {set_clause}
+            SET {set_clause}, version = version + 1
             WHERE shift_id = %s;
         """
 
         cursor.execute(query, tuple(values))
-        conn.commit()
         rowcount = cursor.rowcount
 
         #if rowcount == 0:
@@ -343,6 +792,8 @@ def update_shift(db, request, shift_id):
             }
         )
 
+        conn.commit()
+
         return jsonify({"status": "success", "updated_rows": rowcount}), 200
 
     except mysql.connector.Error as e:
@@ -376,18 +827,20 @@ def delete_shift(db, shift_id):
         conn = db
         cursor = conn.cursor(dictionary=True)
 
-        # Check if shift exists
+        conn.start_transaction()
+
+        # Check if shift exists (and lock it until the delete commits)
         cursor.execute(
-            "SELECT shift_id, employee_id FROM shift WHERE shift_id = %s",
+            "SELECT shift_id, employee_id FROM shift WHERE shift_id = %s FOR UPDATE",
             (shift_id,)
         )
         shift = cursor.fetchone()
 
         if not shift:
+            conn.rollback()
             return jsonify({"status": "error", "message": "Shift not found"}), 404
 
         cursor.execute("DELETE FROM shift WHERE shift_id = %s", (shift_id,))
-        conn.commit()
 
         dispatch_notification(
             db,
@@ -398,6 +851,8 @@ def delete_shift(db, shift_id):
             }
         )
 
+        conn.commit()
+
         return jsonify({"status": "success", "message": "Shift deleted"}), 200
 
     except mysql.connector.Error as e:
@@ -4,6 +4,9 @@ from notifications.events import NotificationEvent
 import mysql.connector
 import os
 import request_helper
+from auth.middleware import bind_principal
+import etag
+import pagination
 from datetime import datetime
 from typing import List
 
@@ -11,6 +14,9 @@ from typing import List
 # -------------------------------------------------------------------------------------------------------
 
 
+# table_version scopes read by get_scr (see etag.py)
+SCR_SCOPES = ('shift_cover_request', 'shift', 'employee', 'role', 'section')
+
 def get_scr(db, request):
     """
     Fetches SCR records based on optional URL query parameters.
@@ -32,7 +38,9 @@ def get_scr(db, request):
             'requested_tertiary_role': int,
             'status': List[str],
             'date_sort': str,  # "Newest" or "Oldest" - Sorts by date in relation to the current day
-            'timestamp_sort': str  # "Newest" or "Oldest" - Sorts by timestamp
+            'timestamp_sort': str,  # "Newest" or "Oldest" - Sorts by timestamp
+            'limit': int,  # Page size (optional, keyset pagination)
+            'after': str  # Cursor from a previous page's X-Next-Cursor header
         }
 
         # Validate and parse parameters
@@ -53,11 +61,45 @@ def get_scr(db, request):
         date_sort = params.get("date_sort")
         timestamp_sort = params.get("timestamp_sort")
 
+        # -----------------------------
+        # Time Sorting Logic
+        # -----------------------------
+        sort_keys = []
+
+        # AGE SORTING FIRST (scr.shift_date is the shift's date copied by triggers, so pages are an
+        # index range scan on scr_shift_date_idx instead of a sort across the shift join)
+        if date_sort == "Newest":
+            sort_keys.append(("scr.shift_date", "DESC"))
+        elif date_sort == "Oldest":
+            sort_keys.append(("scr.shift_date", "ASC"))
+
+        # TIMESTAMP SORTING SECOND
+        if timestamp_sort == "Newest":
+            sort_keys.append(("scr.timestamp", "DESC"))
+        elif timestamp_sort == "Oldest":
+            sort_keys.append(("scr.timestamp", "ASC"))
+
+        # Default fallback
+        if not sort_keys:
+            sort_keys.append(("scr.shift_date", "DESC"))
+
+        # cover_request_id breaks ties so pages never overlap
+        sort_keys.append(("scr.cover_request_id", sort_keys[-1][1]))
+
+        page, error = pagination.parse(params, sort_keys)
+        if error:
+            return jsonify(error), 400
+
         conn = db
         cursor = conn.cursor(dictionary=True)
 
+        # Conditional GET: answer from the version probe when the client's copy is current
+        tag = etag.compute(cursor, request, SCR_SCOPES)
+        if etag.matches(request, tag):
+            return etag.not_modified(tag)
+
         # Base Query
-        query = """
+        query = f"""
             SELECT
                 scr.cover_request_id,
                 scr.shift_id,
@@ -82,7 +124,8 @@ def get_scr(db, request):
                 TIME_FORMAT(s.start_time, '%h:%i %p') AS shift_start,
 
                 DATE_FORMAT(scr.timestamp, '%Y-%m-%d %H:%i') AS timestamp,
-                scr.status
+                scr.status,
+                scr.version{pagination.select_keys(sort_keys)}
             FROM shift_cover_request scr
             JOIN employee requester ON scr.requested_employee_id = requester.employee_id
             LEFT JOIN employee accepter ON scr.accepted_employee_id = accepter.employee_id
@@ -147,33 +190,17 @@ def get_scr(db, request):
             query_params.extend(role_values)
 
         # -----------------------------
-        # Time Sorting Logic
+        # Keyset Pagination + Ordering
         # -----------------------------
-        order_clauses = []
-
-        # AGE SORTING FIRST
-        if date_sort == "Newest":
-            order_clauses.append("s.date DESC")
-        elif date_sort == "Oldest":
-            order_clauses.append("s.date ASC")
-
-        # TIMESTAMP SORTING SECOND
-        if timestamp_sort == "Newest":
-            order_clauses.append("scr.timestamp DESC")
-        elif timestamp_sort == "Oldest":
-            order_clauses.append("scr.timestamp ASC")
-
-        # Default fallback
-        if not order_clauses:
-            order_clauses.append("s.date DESC")
-
-        query += " ORDER BY " + ", ".join(order_clauses)
+        query += page.where(query_params)
+        query += pagination.order_by(sort_keys)
+        query += page.limit_clause(query_params)
 
         # Execute Query
         cursor.execute(query, tuple(query_params))
-        result = cursor.fetchall()
+        result, next_cursor = page.finish(cursor.fetchall())
 
-        return jsonify(result), 200
+        return pagination.add_header(etag.json_response(result, tag), next_cursor), 200
 
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
@@ -222,6 +249,11 @@ def insert_scr(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'requested_employee_id', allow_admin=True)
+        if error:
+            return jsonify(error), 403
+
         # Extract Parameters
         requested_employee_id = fields['requested_employee_id']
         shift_id = fields['shift_id']
@@ -238,12 +270,7 @@ def insert_scr(db, request):
 
         inserted_id = cursor.lastrowid
 
-        conn.commit()
-
-        # Sends notifications to all employees on SCR Insert.
-        cursor.close()
-        cursor = None
-
+        # Queues notifications to all employees on SCR Insert.
         dispatch_notification(
             db,
             NotificationEvent.SHIFT_COVER_CREATED,
@@ -255,8 +282,17 @@ def insert_scr(db, request):
             }
         )
 
+        conn.commit()
+
         return jsonify({"status": "success", "inserted_id": inserted_id}), 201
 
+    except mysql.connector.IntegrityError as e:
+        # Unique key on (shift_id, requested_employee_id, is_open) rejects duplicate open requests
+        if e.errno == 1062:
+            return jsonify({"status": "error", "message": "An open cover request already exists for this shift"}), 409
+        print(f"Database error: {e}")
+        return jsonify({"status": "error", "message": "Database error occurred"}), 500
+
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
         return jsonify({"status": "error", "message": "Database error occurred"}), 500
@@ -283,6 +319,9 @@ def update_scr(db, request, cover_request_id):
     Updates an existing shift_cover_request record (partial update).
     cover_request_id comes from the URL.
     Other fields (accepted_employee_id, shift_id, status) are optional.
+
+    If 'version' is provided the update only applies when it matches the
+    current row version (optimistic concurrency), otherwise 409 is returned.
     """
     conn = None
     cursor = None
@@ -292,12 +331,21 @@ def update_scr(db, request, cover_request_id):
             'accepted_employee_id': int,
             'shift_id': int,
             'status': str,
+            'version': int,  # Optional: version the client last read
         }
 
         # Validate the fields in JSON body (only optional fields here)
         fields, error = request_helper.verify_body(request, field_types, [])
         if error:
             return jsonify(error), 400
+
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'accepted_employee_id', allow_admin=True)
+        if error:
+            return jsonify(error), 403
+
+        expected_version = fields.pop('version', None)
+
         if not fields:
             return jsonify({"status": "error", "message": "No fields provided to update"}), 400
 
@@ -310,20 +358,26 @@ def update_scr(db, request, cover_request_id):
         conn = db
         cursor = conn.cursor(dictionary=True)
 
+        conn.start_transaction()
+
         # Fetch current state BEFORE update (needed for notifications)
+        # FOR UPDATE serializes concurrent writers on this request only
         cursor.execute("""
             SELECT
                 status,
                 requested_employee_id,
                 accepted_employee_id,
-                shift_id
+                shift_id,
+                version
             FROM shift_cover_request
             WHERE cover_request_id = %s
+            FOR UPDATE
         """, (cover_request_id,))
 
         current = cursor.fetchone()
 
         if not current:
+            conn.rollback()
             cursor.close()  # Clean up before return
             return jsonify({"status": "error", "message": "Shift cover request not found"}), 404
 
@@ -331,58 +385,75 @@ def update_scr(db, request, cover_request_id):
         requested_employee_id = current["requested_employee_id"]
         shift_id = current["shift_id"]
 
+        if expected_version is not None and expected_version != current["version"]:
+            conn.rollback()
+            return jsonify({
+                "status": "error",
+                "message": "Shift cover request was modified by another request",
+                "current_version": current["version"]
+            }), 409
+
+        # Only a Pending request can be picked up; a second employee racing to accept loses here
+        if fields.get("status") == "Awaiting Approval" and old_status != "Pending":
+            conn.rollback()
+            return jsonify({
+                "status": "error",
+                "message": f"Shift cover request is already '{old_status}'",
+                "current_version": current["version"]
+            }), 409
+
         query = f"""
             UPDATE shift_cover_request
-            SET {set_clause}
+            SET {set_clause}, version = version + 1
             WHERE cover_request_id = %s;
         """
         cursor.execute(query, tuple(values))
-        conn.commit()
         rowcount = cursor.rowcount
 
-        # CRITICAL FIX: Close cursor immediately.
-        # This frees the connection so 'notify_employee' can open a new cursor without crashing.
-        cursor.close()
-        cursor = None
-
         if rowcount == 0:
+            conn.rollback()
             return jsonify({"status": "error", "message": "No shift found with given ID"}), 404
 
-        # Dispatch notifications ONLY if status changed
+        # Queue notifications ONLY if status changed (committed together with the update)
         new_status = fields.get("status")
 
         if new_status and new_status != old_status:
-            try:
-                if new_status == "Awaiting Approval":
-                    actor_employee_id = fields.get("accepted_employee_id")
-
-                    dispatch_notification(
-                        db,
-                        NotificationEvent.SHIFT_COVER_AWAITING_APPROVAL,
-                        {
-                            "cover_request_id": cover_request_id,
-                            "shift_id": shift_id,
-                            "actor_employee_id": actor_employee_id
-                        }
-                    )
-
-                elif new_status == "Denied":
-                    dispatch_notification(
-                        db,
-                        NotificationEvent.SHIFT_COVER_DENIED,
-                        {
-                            "cover_request_id": cover_request_id,
-                            "shift_id": shift_id,
-                            "requesting_employee_id": requested_employee_id,
-                            "accepted_employee_id": current["accepted_employee_id"]
-                        }
-                    )
-            except Exception as e:
-                # Log the error, but do not fail the request since the DB update succeeded
-                print(f"Notification Error in update_scr: {e}")
+            if new_status == "Awaiting Approval":
+                actor_employee_id = fields.get("accepted_employee_id")
+
+                dispatch_notification(
+                    db,
+                    NotificationEvent.SHIFT_COVER_AWAITING_APPROVAL,
+                    {
+                        "cover_request_id": cover_request_id,
+                        "shift_id": shift_id,
+                        "actor_employee_id": actor_employee_id
+                    }
+                )
+
+            elif new_status == "Denied":
+                dispatch_notification(
+                    db,
+                    NotificationEvent.SHIFT_COVER_DENIED,
+                    {
+                        "cover_request_id": cover_request_id,
+                        "shift_id": shift_id,
+                        "requesting_employee_id": requested_employee_id,
+                        "accepted_employee_id": current["accepted_employee_id"]
+                    }
+                )
+
+        conn.commit()
 
         return jsonify({"status": "success", "updated_rows": rowcount}), 200
 
+    except mysql.connector.IntegrityError as e:
+        # Reopening, or moving the request onto another shift, can collide with scr_one_open_per_requester
+        if e.errno == 1062:
+            return jsonify({"status": "error", "message": "An open cover request already exists for this shift"}), 409
+        print(f"Database error: {e}")
+        return jsonify({"status": "error", "message": "Database error occurred"}), 500
+
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
         return jsonify({"status": "error", "message": "Database error occurred"}), 500
@@ -414,14 +485,17 @@ def delete_scr(db, cover_request_id):
         conn = db
         cursor = conn.cursor(dictionary=True)
 
-        # Check if shift cover request exists
+        conn.start_transaction()
+
+        # Check if shift cover request exists (and lock it until the delete commits)
         cursor.execute(
-            "SELECT cover_request_id FROM shift_cover_request WHERE cover_request_id = %s",
+            "SELECT cover_request_id FROM shift_cover_request WHERE cover_request_id = %s FOR UPDATE",
             (cover_request_id,)
         )
         result = cursor.fetchone()
 
         if not result:
+            conn.rollback()
             return jsonify({"status": "error", "message": "Shift cover request not found"}), 404
 
         # Delete the shift cover request
@@ -455,50 +529,87 @@ def delete_scr(db, cover_request_id):
 
 
 def approve_scr(db, cover_request_id):
+    """
+    Approves a shift cover request and reassigns the shift in one transaction.
+
+    Locks are taken cover request first, then its shift (the same order as update_scr), so the
+    shift_id read under the request's lock is the shift that gets reassigned. Two approvals of
+    different requests for one shift can still deadlock on the auto-denial; the loser gets 409.
+    """
     conn = db
     cursor = conn.cursor(dictionary=True)
 
     try:
+        conn.start_transaction()
 
-        # Get shift cover request details
+        # Lock the cover request; its shift_id cannot change until commit
         cursor.execute("""
             SELECT 
                 scr.shift_id, 
                 scr.requested_employee_id, 
-                scr.accepted_employee_id 
+                scr.accepted_employee_id,
+                scr.status,
+                scr.version
             FROM shift_cover_request scr
             WHERE scr.cover_request_id = %s
+            FOR UPDATE
         """, (cover_request_id,))
 
         row = cursor.fetchone()
 
         if not row:
+            conn.rollback()
             cursor.close()  # Close before return
+            conn.close()
             return jsonify({"error": "Shift cover request not found"}), 404
 
+        # Then the shift it references
+        cursor.execute(
+            "SELECT shift_id FROM shift WHERE shift_id = %s FOR UPDATE",
+            (row["shift_id"],)
+        )
+        cursor.fetchone()
+
+        # Checked with both locks held (it may have been resolved while we waited for the first)
+        if row["status"] in ("Accepted", "Denied"):
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            return jsonify({
+                "status": "error",
+                "message": f"Shift cover request is already '{row['status']}'",
+                "current_version": row["version"]
+            }), 409
+
         shift_id = row["shift_id"]
         accepted_employee_id = row["accepted_employee_id"]
         requested_employee_id = row["requested_employee_id"]
 
-        # Update status to Accepted
+        # Update status to Accepted (the version read under the lock must still be current)
         cursor.execute("""
             UPDATE shift_cover_request
-            SET status = 'Accepted' 
-            WHERE cover_request_id = %s
-        """, (cover_request_id,))
+            SET status = 'Accepted', version = version + 1
+            WHERE cover_request_id = %s AND version = %s
+        """, (cover_request_id, row["version"]))
+
+        if cursor.rowcount == 0:
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            return jsonify({"status": "error", "message": "Shift cover request was modified by another request"}), 409
 
         #  Assign the shift to the new employee
         # NOTE: If accepted_employee_id is None (Open Shift), this sets shift.employee_id to NULL.
         cursor.execute("""
             UPDATE shift
-            SET employee_id = %s
+            SET employee_id = %s, version = version + 1
             WHERE shift_id = %s
         """, (accepted_employee_id, shift_id))
 
         # Deny other pending requests for the same shift
         cursor.execute("""
             UPDATE shift_cover_request 
-            SET status = 'Denied'
+            SET status = 'Denied', version = version + 1
             WHERE shift_id = %s 
             AND cover_request_id != %s 
             AND status = 'Pending'
@@ -515,22 +626,7 @@ def approve_scr(db, cover_request_id):
 
         denied_requests = cursor.fetchall()
 
-        conn.commit()
-
-        cursor.close()
-
-    except Exception as e:
-        conn.rollback()
-        if cursor:
-            cursor.close()
-        print(f"Database Error in approve_scr: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
-
-    # ---  NOTIFICATIONS (Isolated) ---
-    # We do this outside the main Try/Except so a notification failure
-    # doesn't make the API return a 500 error for a successful DB update.
-    try:
-        # Notify Approval
+        # Queue notifications in the same transaction as the approval
         dispatch_notification(
             db,
             NotificationEvent.SHIFT_COVER_ACCEPTED,
@@ -555,9 +651,29 @@ def approve_scr(db, cover_request_id):
                 }
             )
 
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+    except mysql.connector.Error as e:
+        conn.rollback()
+        if cursor:
+            cursor.close()
+        conn.close()
+        # Deadlock with a concurrent approval of another request for this shift, which denies this one
+        if e.errno == 1213:
+            return jsonify({"status": "error", "message": "Shift was approved for another request"}), 409
+        print(f"Database Error in approve_scr: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
     except Exception as e:
-        # Log notification error, but don't fail the request
-        print(f"Notification Error: {e}")
+        conn.rollback()
+        if cursor:
+            cursor.close()
+        conn.close()
+        print(f"Database Error in approve_scr: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
 
     return jsonify({"status": "success", "message": "Shift request approved"}), 200
 
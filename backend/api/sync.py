@@ -0,0 +1,365 @@
+from flask import jsonify
+from datetime import datetime
+import mysql.connector
+import base64
+import json
+import os
+import request_helper
+import pagination
+
+# Incremental Sync - /sync ------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Lets the app keep a local copy of shifts, tasks, announcements, cover requests and time off requests
+# and refresh it with only what changed:
+#
+#   GET /sync?shift=<watermark>&task=<watermark>&announcement=&scr=&tor=
+#
+# Each entity named in the query string is synced; an empty value (or 0) asks for a full snapshot, and no
+# entities at all means every entity from scratch. For each one the response carries
+#
+#   {"upserts": [rows shaped like the list endpoint], "deletes": [ids], "watermark": "...",
+#    "more": bool, "reset": bool}
+#
+# and the client stores "watermark" to send next time. Upserts are rows whose updated_at column moved past
+# the watermark (keyset on updated_at + primary key, so each call is an index range scan); deletes come
+# from sync_tombstone, which AFTER DELETE triggers fill. "more" means the page was full: call again
+# straight away. "reset" means the watermark is older than the tombstone retention (or an employee,
+# section or role was deleted, whose cascades leave no per-row tombstones): the client drops its copy of
+# that entity and applies the upserts as a fresh snapshot.
+#
+# Watermarks never advance past NOW() - SYNC_LAG_SECONDS, so a transaction that commits a little after it
+# stamped updated_at is still picked up; rows inside that window are simply sent again, and clients apply
+# upserts and deletes idempotently. Joined names (author, section_name, ...) are current as of the row's
+# last change; renames of an employee, section or role do not re-send every row that mentions them.
+#
+# Environment:
+#   SYNC_MAX_ROWS           Upserts (and deletes) returned per entity per call (default 500)
+#   SYNC_LAG_SECONDS        How far behind NOW() a watermark stays (default 5)
+#   SYNC_TOMBSTONE_DAYS     Tombstones are kept this long; older watermarks get reset (default 30)
+
+SYNC_MAX_ROWS = int(os.environ.get("SYNC_MAX_ROWS", 500))
+SYNC_LAG_SECONDS = int(os.environ.get("SYNC_LAG_SECONDS", 5))
+SYNC_TOMBSTONE_DAYS = int(os.environ.get("SYNC_TOMBSTONE_DAYS", 30))
+
+# Tombstone written when a delete or key change cascades into rows no per-row tombstone covers (see triggers.sql)
+RESET_ENTITY = "*"
+
+# Query parameter -> (sync_tombstone.entity, updated_at column, primary key column, SELECT columns, FROM clause)
+ENTITIES = {
+    "shift": ("shift", "sh.updated_at", "sh.shift_id", """
+                sh.shift_id,
+                sh.employee_id,
+                e.first_name,
+                e.last_name,
+                e.primary_role,
+                pr.role_name AS primary_role_name,
+                sh.section_id,
+                se.section_name,
+                TIME_FORMAT(sh.start_time, '%h:%i %p') AS start_time,
+                DATE_FORMAT(sh.date, '%Y-%m-%d') AS date,
+                DATE_FORMAT(sh.date, '%W') AS day_name,
+                DAYOFWEEK(sh.date) AS day_index,
+                DATE_FORMAT(sh.timestamp, '%Y-%m-%d %H:%i') AS timestamp,
+                sh.version""", """
+            FROM shift sh
+            JOIN employee e ON sh.employee_id = e.employee_id
+            LEFT JOIN role pr ON e.primary_role = pr.role_id
+            JOIN section se ON se.section_id = sh.section_id"""),
+
+    "task": ("task", "t.updated_at", "t.task_id", """
+                t.task_id,
+                t.type,
+                t.title,
+                t.description,
+                t.author_id,
+                CONCAT(e.first_name, ' ', e.last_name) AS author,
+                t.section_id,
+                s.section_name,
+                DATE_FORMAT(t.due_date, '%Y-%m-%d') AS due_date,
+                t.complete,
+                t.recurring_task_id,
+                t.last_modified_by,
+                t.last_modified_at,
+                CONCAT(lm.first_name, ' ', lm.last_name) AS last_modified_name,
+                DATE_FORMAT(t.timestamp, '%Y-%m-%d %H:%i') AS timestamp""", """
+            FROM task t
+            JOIN employee e ON t.author_id = e.employee_id
+            JOIN section s ON t.section_id = s.section_id
+            LEFT JOIN employee lm ON t.last_modified_by = lm.employee_id"""),
+
+    "announcement": ("announcement", "a.updated_at", "a.announcement_id", """
+                a.announcement_id,
+                a.author_id,
+                CONCAT(e.first_name, ' ', e.last_name) AS author,
+                a.role_id,
+                r.role_name,
+                a.title,
+                a.description,
+                DATE_FORMAT(a.timestamp, '%Y-%m-%d %H:%i') AS timestamp""", """
+            FROM announcement a
+            JOIN employee e ON a.author_id = e.employee_id
+            JOIN role r ON a.role_id = r.role_id"""),
+
+    "scr": ("shift_cover_request", "scr.updated_at", "scr.cover_request_id", """
+                scr.cover_request_id,
+                scr.shift_id,
+                scr.accepted_employee_id,
+                scr.requested_employee_id,
+                requester.first_name AS requested_first_name,
+                requester.last_name AS requested_last_name,
+                requester.primary_role AS requested_primary_role,
+                accepter.first_name AS accepted_first_name,
+                accepter.last_name AS accepted_last_name,
+                accepter.primary_role AS accepted_primary_role,
+                requester_role.role_name AS requested_primary_role_name,
+                accepter_role.role_name AS accepted_primary_role_name,
+                sec.section_id AS section_id,
+                sec.section_name AS section_name,
+                DATE_FORMAT(s.date, '%Y-%m-%d') AS shift_date,
+                TIME_FORMAT(s.start_time, '%h:%i %p') AS shift_start,
+                DATE_FORMAT(scr.timestamp, '%Y-%m-%d %H:%i') AS timestamp,
+                scr.status,
+                scr.version""", """
+            FROM shift_cover_request scr
+            JOIN employee requester ON scr.requested_employee_id = requester.employee_id
+            LEFT JOIN employee accepter ON scr.accepted_employee_id = accepter.employee_id
+            JOIN shift s ON scr.shift_id = s.shift_id
+            JOIN role requester_role ON requester.primary_role = requester_role.role_id
+            LEFT JOIN role accepter_role ON accepter.primary_role = accepter_role.role_id
+            JOIN section sec ON s.section_id = sec.section_id"""),
+
+    "tor": ("time_off_request", "tor.updated_at", "tor.request_id", """
+                tor.request_id,
+                tor.employee_id,
+                e.primary_role,
+                pr.role_name AS primary_role_name,
+                e.first_name,
+                e.last_name,
+                DATE_FORMAT(tor.start_date, '%Y-%m-%d') AS start_date,
+                DATE_FORMAT(tor.end_date, '%Y-%m-%d') AS end_date,
+                tor.reason,
+                tor.status,
+                DATE_FORMAT(tor.timestamp, '%Y-%m-%d %H:%i') AS timestamp""", """
+            FROM time_off_request tor
+            JOIN employee e ON tor.employee_id = e.employee_id
+            LEFT JOIN role pr ON e.primary_role = pr.role_id"""),
+}
+
+
+# Watermarks --------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# A watermark is opaque to the client (base64url JSON, like pagination cursors):
+#   "k"   (updated_at, id) of the last row already sent, or null before the first row
+#   "d"   highest sync_tombstone id already applied (tombstone ids are global, so one counter serves
+#         both the entity's deletes and the reset check)
+#   "at"  when it was issued, for the retention check
+
+class Watermark:
+    def __init__(self, key, tombstone_id, issued_at):
+        self.key = key                    # (datetime, int) or None
+        self.tombstone_id = tombstone_id
+        self.issued_at = issued_at        # datetime
+
+
+def encode_watermark(watermark):
+    payload = {
+        "k": None if watermark.key is None else [watermark.key[0].isoformat(" "), watermark.key[1]],
+        "d": watermark.tombstone_id,
+        "at": watermark.issued_at.isoformat(" "),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_watermark(token):
+    """
+    Returns the Watermark, or None if the token is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        key = payload["k"]
+        if key is not None:
+            key = (datetime.fromisoformat(key[0]), int(key[1]))
+        return Watermark(key, int(payload["d"]), datetime.fromisoformat(payload["at"]))
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        return None
+
+
+# Sync --------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+def _sync_entity(cursor, name, watermark, clock, limit):
+    """
+    Returns one entity's {"upserts", "deletes", "watermark", "more", "reset"} after watermark
+    (None = full snapshot).
+    """
+    entity, updated_column, key_column, columns, from_clause = ENTITIES[name]
+    safe_at, horizon, tombstone_floor = clock
+
+    reset = False
+    if watermark is not None:
+        if watermark.issued_at < horizon:
+            reset = True
+        else:
+            cursor.execute(
+                "SELECT 1 FROM sync_tombstone WHERE entity = %s AND tombstone_id > %s LIMIT 1",
+                (RESET_ENTITY, watermark.tombstone_id)
+            )
+            reset = cursor.fetchone() is not None
+        if reset:
+            watermark = None
+
+    # Upserts: rows changed after the watermark's (updated_at, id), oldest change first
+    sort_keys = [(updated_column, "ASC"), (key_column, "ASC")]
+    page = pagination.Page(sort_keys, limit, None if watermark is None or watermark.key is None
+                           else [watermark.key[0].isoformat(" "), watermark.key[1]])
+
+    query_params = []
+    query = f"SELECT {columns}{pagination.select_keys(sort_keys)}{from_clause}\n            WHERE 1 = 1"
+    query += page.where(query_params)
+    query += pagination.order_by(sort_keys)
+    query += page.limit_clause(query_params)
+
+    cursor.execute(query, tuple(query_params))
+    rows = cursor.fetchall()
+    more_rows = len(rows) > limit
+    rows = rows[:limit]
+
+    previous_key = None if watermark is None else watermark.key
+    key = previous_key
+    if rows:
+        last_key = (rows[-1]["_sort_0"], rows[-1]["_sort_1"])
+        if more_rows:
+            # Page through without waiting; the lag guard applies to the tail of the stream
+            key = last_key
+        else:
+            key = min(last_key, (safe_at, 0))
+            if previous_key is not None:
+                key = max(key, previous_key)
+    for row in rows:
+        row.pop("_sort_0", None)
+        row.pop("_sort_1", None)
+
+    # Deletes: a snapshot needs none, it only has to start after the tombstones that already exist
+    deletes = []
+    more_deletes = False
+    if watermark is None:
+        tombstone_id = tombstone_floor
+    else:
+        cursor.execute("""
+            SELECT tombstone_id, entity_id
+            FROM sync_tombstone
+            WHERE entity = %s AND tombstone_id > %s
+            ORDER BY tombstone_id
+            LIMIT %s
+        """, (entity, watermark.tombstone_id, limit + 1))
+        tombstones = cursor.fetchall()
+        more_deletes = len(tombstones) > limit
+        tombstones = tombstones[:limit]
+        deletes = [t["entity_id"] for t in tombstones]
+
+        if more_deletes:
+            tombstone_id = tombstones[-1]["tombstone_id"]
+        else:
+            tombstone_id = max(watermark.tombstone_id, tombstone_floor)
+
+    return {
+        "upserts": rows,
+        "deletes": deletes,
+        "watermark": encode_watermark(Watermark(key, tombstone_id, safe_at)),
+        "more": more_rows or more_deletes,
+        "reset": reset,
+    }
+
+
+def get_sync(db, request):
+    """
+    Returns what changed in each requested entity since the client's watermark (see the module comment).
+    """
+    conn = None
+    cursor = None
+    try:
+        # Expected Parameter Types (one watermark per entity)
+        param_types = {name: str for name in ENTITIES}
+        param_types['limit'] = int  # Rows per entity (optional, default SYNC_MAX_ROWS)
+
+        # Validate and parse parameters
+        params, error = request_helper.verify_params(request, param_types)
+        if error:
+            return jsonify(error), 400
+
+        limit = params.get('limit', SYNC_MAX_ROWS)
+        if not (1 <= limit <= SYNC_MAX_ROWS):
+            return jsonify({"status": "error", "message": f"limit must be between 1 and {SYNC_MAX_ROWS}"}), 400
+
+        # An entity named with an empty value is a snapshot, so presence is read from the raw query string
+        names = [name for name in ENTITIES if name in request.args] or list(ENTITIES)
+
+        watermarks = {}
+        for name in names:
+            token = params.get(name)
+            if token is None or token == "0":
+                watermarks[name] = None
+                continue
+            watermarks[name] = decode_watermark(token)
+            if watermarks[name] is None:
+                return jsonify({"status": "error", "message": f"Invalid watermark for '{name}'"}), 400
+
+        conn = db
+        cursor = conn.cursor(dictionary=True)
+
+        # One clock for every entity: the lag-guarded "now", the retention horizon and the newest
+        # tombstone older than the lag (the floor a snapshot's delete counter starts from)
+        cursor.execute("""
+            SELECT
+                NOW(6) - INTERVAL %s SECOND AS safe_at,
+                NOW(6) - INTERVAL %s DAY AS horizon,
+                COALESCE((
+                    SELECT tombstone_id FROM sync_tombstone
+                    WHERE deleted_at < NOW(6) - INTERVAL %s SECOND
+                    ORDER BY tombstone_id DESC
+                    LIMIT 1
+                ), 0) AS tombstone_floor
+        """, (SYNC_LAG_SECONDS, SYNC_TOMBSTONE_DAYS, SYNC_LAG_SECONDS))
+        row = cursor.fetchone()
+        clock = (row["safe_at"], row["horizon"], row["tombstone_floor"])
+
+        result = {name: _sync_entity(cursor, name, watermarks[name], clock, limit) for name in names}
+        return jsonify(result), 200
+
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}")
+        return jsonify({"status": "error", "message": "Database error occurred"}), 500
+
+    except Exception as e:
+        print(f"Error occurred: {e}")
+        return jsonify({"status": "error", "message": "An unexpected error occurred"}), 500
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+def purge_tombstones(conn, days=SYNC_TOMBSTONE_DAYS):
+    """
+    Deletes tombstones past the retention window (watermarks that old are reset anyway). Does not commit.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            DELETE FROM sync_tombstone
+            WHERE deleted_at < NOW(6) - INTERVAL %s DAY
+            LIMIT 5000
+        """, (days,))
+        return cursor.rowcount
+    finally:
+        cursor.close()
@@ -4,18 +4,129 @@ from notifications.events import NotificationEvent
 import mysql.connector
 import os
 import request_helper
+from auth.middleware import bind_principal
+import task_materializer
+import archive
+import etag
+import pagination
 from datetime import datetime
 
 # GET Requests ------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
 
 
+# table_version scopes read by get_tasks (see etag.py)
+TASK_SCOPES = ('task', 'employee', 'section')
+
+# Longest date window expand_recurring accepts (one query, no pagination)
+MAX_EXPAND_DAYS = 92
+
+
+def _due_date_filter(column, past, today, future):
+    """
+    Returns the " AND ..." predicate for the past / today / future flags, applied to column.
+    """
+    if past == 0 and today == 0 and future == 0:
+        return ""
+    elif past == 1 and today == 1:
+        return f" AND {column} <= CURDATE()"
+    elif today == 1 and future == 1:
+        return f" AND {column} >= CURDATE()"
+    elif past == 1:
+        return f" AND {column} < CURDATE()"
+    elif today == 1:
+        return f" AND {column} = CURDATE()"
+    elif future == 1:
+        return f" AND {column} > CURDATE()"
+    return ""
+
+
+def _expanded_query(real_query, real_params, window_start, window_end, direction,
+                    author_id, section_id, past, today, future, include_virtual):
+    """
+    Returns (query, params) merging the filtered task rows of the window with virtual rows for
+    recurring dates (today onwards) that have not been materialized, in one sorted result.
+    """
+    query = """
+        WITH RECURSIVE calendar (day) AS (
+            SELECT CAST(%s AS DATE)
+            UNION ALL
+            SELECT day + INTERVAL 1 DAY FROM calendar WHERE day < %s
+        )
+        SELECT * FROM (
+    """
+    params = [window_start, window_end]
+
+    # real_query already holds the window's due_date filter
+    query += real_query
+    params += real_params
+
+    if include_virtual:
+        query += """
+            UNION ALL
+            SELECT
+                NULL AS task_id,
+                rt.type,
+                rt.title,
+                rt.description,
+                rt.author_id,
+                CONCAT(e.first_name, ' ', e.last_name) AS author,
+                rt.section_id,
+                s.section_name,
+                DATE_FORMAT(calendar.day, '%Y-%m-%d') AS due_date,
+                0 AS complete,
+                rt.recurring_task_id,
+                NULL AS last_modified_by,
+                NULL AS last_modified_at,
+                NULL AS last_modified_name,
+                DATE_FORMAT(rt.timestamp, '%Y-%m-%d %H:%i') AS timestamp,
+                1 AS is_virtual
+            FROM recurring_task rt
+            JOIN calendar
+                ON calendar.day BETWEEN GREATEST(rt.start_date, CURDATE()) AND COALESCE(rt.end_date, calendar.day)
+                AND rt.weekday_mask & (1 << (DAYOFWEEK(calendar.day) - 1))
+            JOIN employee e ON rt.author_id = e.employee_id
+            JOIN section s ON rt.section_id = s.section_id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM task m
+                WHERE m.recurring_task_id = rt.recurring_task_id AND m.due_date = calendar.day
+            )
+        """
+
+        # Only templates recurring on a weekday inside the window reach the calendar join
+        bits = task_materializer.weekday_bits(window_start, window_end)
+        query += task_materializer.mask_filter("rt.weekday_mask", task_materializer.masks_with_any(bits), params)
+
+        if author_id is not None:
+            query += " AND rt.author_id = %s"
+            params.append(author_id)
+
+        if section_id is not None:
+            query += " AND rt.section_id = %s"
+            params.append(section_id)
+
+        query += _due_date_filter("calendar.day", past, today, future)
+
+    query += f"""
+        ) AS merged
+        ORDER BY due_date ASC, is_virtual ASC, timestamp {direction}, task_id {direction}
+    """
+    return query, tuple(params)
+
+
 def get_tasks(db, request):
     """
     Fetches task records based on optional URL query parameters.
     If no parameters are provided, returns all tasks (equivalent to SELECT * FROM task)
     Expects parameters in the URL. 
 
+    Completed tasks past the archive horizon live in task_archive (see archive.py); include_history=1
+    with a start_date/end_date range (or due_date) reads them too.
+
+    With expand_recurring=1 and a start_date/end_date window (or due_date), upcoming dates of
+    recurring templates that have no task row yet are merged in as virtual rows (task_id null,
+    is_virtual 1), sorted by due date. Pagination does not apply to expanded lists.
+
     IMPORTANT: Used for getting records in the "task" table
     """
     conn = None
@@ -32,7 +143,13 @@ def get_tasks(db, request):
             'future': int, # 1=True, 0=False
             'recurring': int, # 1=True, 0=False
             'due_date': str, # YYYY-MM-DD
+            'expand_recurring': int, # 1=True: include not-yet-materialized recurring dates
+            'start_date': str, # YYYY-MM-DD (due_date range; the expand_recurring window)
+            'end_date': str, # YYYY-MM-DD (due_date range; the expand_recurring window)
+            'include_history': int, # 1=True: also read archived tasks (needs a date range)
             'timestamp_sort': str, # "Newest", "Oldest"
+            'limit': int, # Page size (optional, keyset pagination)
+            'after': str, # Cursor from a previous page's X-Next-Cursor header
         }
 
         # Validate and parse parameters
@@ -50,13 +167,68 @@ def get_tasks(db, request):
         future = params.get('future')
         recurring = params.get('recurring')
         due_date = params.get('due_date')
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
+        expand_recurring = params.get('expand_recurring') == 1
+        include_history = params.get('include_history') == 1
         timestamp_sort = params.get('timestamp_sort')
 
+        # -----------------------------
+        # Time Sorting Logic
+        # -----------------------------
+        # TIMESTAMP SORTING (default: Newest); task_id breaks ties so pages never overlap
+        direction = "ASC" if timestamp_sort == "Oldest" else "DESC"
+        sort_keys = [("t.timestamp", direction), ("t.task_id", direction)]
+
+        page, error = pagination.parse(params, sort_keys)
+        if error:
+            return jsonify(error), 400
+
+        if due_date:
+            # Validate date format -> 'YYYY-MM-DD'
+            try:
+                datetime.strptime(due_date, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({"error": "Invalid due_date format. Expected YYYY-MM-DD."}), 400
+
+        for value in (start_date, end_date):
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    return jsonify({"error": "Invalid start_date/end_date format. Expected YYYY-MM-DD."}), 400
+
+        # The archive is only read for an explicit range, never for an open-ended list
+        if include_history and not (due_date or (start_date and end_date)):
+            return jsonify({"error": "include_history needs start_date and end_date (or due_date)."}), 400
+
+        if expand_recurring:
+            if page.limit is not None or page.after is not None:
+                return jsonify({"error": "limit/after cannot be combined with expand_recurring; narrow the date window instead."}), 400
+
+            try:
+                window_start = datetime.strptime(start_date or due_date or '', '%Y-%m-%d').date()
+                window_end = datetime.strptime(end_date or due_date or '', '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({"error": "expand_recurring needs start_date and end_date (or due_date) as YYYY-MM-DD."}), 400
+
+            if window_end < window_start or (window_end - window_start).days >= MAX_EXPAND_DAYS:
+                return jsonify({"error": f"The expand_recurring window must span 1 to {MAX_EXPAND_DAYS} days."}), 400
+
         conn = db
         cursor = conn.cursor(dictionary=True)
 
+        # Conditional GET: answer from the version probe when the client's copy is current
+        scopes = TASK_SCOPES + ('recurring_task',) if expand_recurring else TASK_SCOPES
+        tag = etag.compute(cursor, request, scopes)
+        if etag.matches(request, tag):
+            return etag.not_modified(tag)
+
+        # Expanded lists carry is_virtual instead of the hidden pagination keys
+        extra_columns = ",\n                0 AS is_virtual" if expand_recurring else pagination.select_keys(sort_keys)
+
         # Base Query
-        query = """
+        query = f"""
             SELECT 
                 t.task_id,
                 t.type,
@@ -72,8 +244,8 @@ def get_tasks(db, request):
                 t.last_modified_by,
                 t.last_modified_at,
                 CONCAT(lm.first_name, ' ', lm.last_name) AS last_modified_name,
-                DATE_FORMAT(t.timestamp, '%Y-%m-%d %H:%i') AS timestamp
-            FROM task t
+                DATE_FORMAT(t.timestamp, '%Y-%m-%d %H:%i') AS timestamp{extra_columns}
+            FROM {archive.source('task', include_history)} t
             JOIN employee e ON t.author_id = e.employee_id
             JOIN section s ON t.section_id = s.section_id
             LEFT JOIN employee lm ON t.last_modified_by = lm.employee_id
@@ -100,21 +272,7 @@ def get_tasks(db, request):
             query_params.append(complete)
 
         # Date filters
-        if past == 1 and today == 1 and future == 1:
-            # everything
-            pass  # no filter, since all dates are included
-        if past == 0 and today == 0 and future == 0:
-            pass
-        elif past == 1 and today == 1:
-            query += " AND t.due_date <= CURDATE()"
-        elif today == 1 and future == 1:
-            query += " AND t.due_date >= CURDATE()"
-        elif past == 1:
-            query += " AND t.due_date < CURDATE()"
-        elif today == 1:
-            query += " AND t.due_date = CURDATE()"
-        elif future == 1:
-            query += " AND t.due_date > CURDATE()"
+        query += _due_date_filter("t.due_date", past, today, future)
 
         if recurring == 1:
             query += " AND t.recurring_task_id IS NOT NULL"
@@ -122,37 +280,37 @@ def get_tasks(db, request):
             query += " AND t.recurring_task_id IS NULL"
 
         if due_date:
-            # Validate date format -> 'YYYY-MM-DD'
-            try:
-                datetime.strptime(due_date, '%Y-%m-%d')
-            except ValueError:
-                return jsonify({"error": "Invalid due_date format. Expected YYYY-MM-DD."}), 400
-
             query += " AND t.due_date = %s"
             query_params.append(due_date)
-        
-        # -----------------------------
-        # Time Sorting Logic
-        # -----------------------------
-        order_clauses = []
-        
-        # TIMESTAMP SORTING
-        if timestamp_sort == "Newest":
-            order_clauses.append("t.timestamp DESC")
-        elif timestamp_sort == "Oldest":
-            order_clauses.append("t.timestamp ASC")
 
-        # Default fallback
-        if not order_clauses:
-            order_clauses.append("t.timestamp DESC")
+        if start_date:
+            query += " AND t.due_date >= %s"
+            query_params.append(start_date)
 
-        query += " ORDER BY " + ", ".join(order_clauses)
+        if end_date:
+            query += " AND t.due_date <= %s"
+            query_params.append(end_date)
+
+        if expand_recurring:
+            cursor.execute(*_expanded_query(
+                query, query_params, window_start, window_end, direction,
+                author_id, section_id, past, today, future,
+                include_virtual=(task_id is None and complete != 1 and recurring != 0)
+            ))
+            return etag.json_response(cursor.fetchall(), tag), 200
+
+        # -----------------------------
+        # Keyset Pagination + Ordering
+        # -----------------------------
+        query += page.where(query_params)
+        query += pagination.order_by(sort_keys)
+        query += page.limit_clause(query_params)
 
         # Execute Query
         cursor.execute(query, tuple(query_params))
-        result = cursor.fetchall()
+        result, next_cursor = page.finish(cursor.fetchall())
 
-        return jsonify(result), 200
+        return pagination.add_header(etag.json_response(result, tag), next_cursor), 200
 
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
@@ -172,6 +330,10 @@ def get_tasks(db, request):
 # -------------------------------------------------------------------------------------------------------
 
 
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
 # POST Task ---------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
 
@@ -202,6 +364,11 @@ def insert_task(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'author_id')
+        if error:
+            return jsonify(error), 403
+
         title = fields['title']
         description = fields['description']
         author_id = fields['author_id']
@@ -219,9 +386,7 @@ def insert_task(db, request):
 
         inserted_id = cursor.lastrowid
 
-        conn.commit()
-
-        # Emit Notification Event
+        # Queue Notification Event (commits with the insert)
         dispatch_notification(
             db,
             NotificationEvent.TASK_CREATED,
@@ -231,6 +396,8 @@ def insert_task(db, request):
             }
         )
 
+        conn.commit()
+
         return jsonify({"status": "success", "inserted_id": inserted_id}), 201
 
     except mysql.connector.Error as e:
@@ -281,6 +448,12 @@ def update_task(db, request, task_id):
         if not fields:
             return jsonify({"status": "error", "message": "No fields provided to update"}), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'author_id', allow_admin=True)
+        error = error or bind_principal(fields, 'last_modified_by', fill=True)
+        if error:
+            return jsonify(error), 403
+
         # Validate 'complete' is 0 or 1
         if 'complete' in fields:
             if fields['complete'] not in (0, 1):
@@ -412,6 +585,11 @@ def convert_task(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'author_id')
+        if error:
+            return jsonify(error), 403
+
         direction = fields['direction']
         conn = db
         cursor = conn.cursor(dictionary=True)
@@ -444,12 +622,17 @@ def convert_task(db, request):
             """
             cursor.execute(sql_link, (new_recurring_id, fields['title'], fields['description'], fields['section_id'], fields['task_id']))
 
+            # 3. Generate the template's upcoming rows (the linked task already covers its own date)
+            task_materializer.materialize(conn, recurring_task_id=new_recurring_id)
+
         elif direction == 'to_normal':
             # --- RECURRING -> NORMAL ---
             if 'recurring_task_id' not in fields or 'due_date' not in fields:
                 return jsonify({"error": "recurring_task_id and due_date are required"}), 400
 
-            # 1. Deduplication check
+            # 1. Drop the template's untouched upcoming rows, then deduplicate against what is left
+            task_materializer.discard_future(conn, fields['recurring_task_id'])
+
             sql_check = "SELECT task_id FROM task WHERE recurring_task_id = %s AND due_date = %s LIMIT 1"
             cursor.execute(sql_check, (fields['recurring_task_id'], fields['due_date']))
             existing_task = cursor.fetchone()
@@ -477,6 +660,7 @@ def convert_task(db, request):
         return jsonify({"status": "error", "message": str(e)}), 500
     finally:
         if cursor: cursor.close()
+        if conn: conn.close()
 
 # -------------------------------------------------------------------------------------------------------
 # -------------------------------------------------------------------------------------------------------
@@ -0,0 +1,172 @@
+import argparse
+import os
+from datetime import date, timedelta
+
+import db_pool
+
+# Recurring Task Materializer ---------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Turns recurring_task templates into task rows for today and the next RECURRING_TASK_HORIZON_DAYS days
+# with one INSERT ... SELECT over a generated calendar. Replaces the hourly MySQL event and
+# insert_recurring_tasks_procedure:
+#   - worker.py runs materialize() once a day (and when it starts)
+#   - recurring_task.py materializes a single template when it is created or edited, and drops its
+#     untouched future rows when it is edited or deleted
+#
+# The unique key (recurring_task_id, due_date) on task makes every run idempotent: dates that already
+# have their row are skipped, so runs can repeat or overlap safely.
+#
+#   python task_materializer.py --horizon 14     # one-off run, e.g. after importing templates
+#
+# Environment:
+#   RECURRING_TASK_HORIZON_DAYS     Days after today to pre-generate (default 2)
+
+HORIZON_DAYS = int(os.environ.get("RECURRING_TASK_HORIZON_DAYS", 2))
+
+# The calendar is a recursive CTE; MySQL's default cte_max_recursion_depth is 1000
+MAX_HORIZON_DAYS = 365
+
+# recurring_task.weekday_mask (stored generated column) has one bit per weekday in DAYOFWEEK() order
+WEEKDAY_BITS = {'sun': 1, 'mon': 2, 'tue': 4, 'wed': 8, 'thu': 16, 'fri': 32, 'sat': 64}
+ALL_MASKS = range(128)
+
+
+# Weekday Masks -----------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# A bit test (weekday_mask & 32) can't use an index, but there are only 128 possible masks, so a weekday
+# filter is sent as the IN list of masks that satisfy it, which MySQL answers with index range lookups
+# (recurring_task_weekday_idx, or recurring_task_section_weekday_idx together with a section).
+
+def weekday_bits(start, end):
+    """
+    Bits of every weekday between start and end (inclusive).
+    """
+    bits = 0
+    for offset in range(min((end - start).days + 1, 7)):
+        # isoweekday() % 7 is DAYOFWEEK() - 1 (Sunday = 0)
+        bits |= 1 << ((start + timedelta(days=offset)).isoweekday() % 7)
+    return bits
+
+
+def masks_with_any(bits):
+    """
+    Masks recurring on at least one of the weekdays in bits.
+    """
+    return [mask for mask in ALL_MASKS if mask & bits]
+
+
+def masks_matching(set_bits, clear_bits=0):
+    """
+    Masks recurring on every weekday in set_bits and on none in clear_bits.
+    """
+    return [mask for mask in ALL_MASKS if mask & set_bits == set_bits and not mask & clear_bits]
+
+
+def mask_filter(column, masks, query_params):
+    """
+    Returns " AND column IN (...)" for masks (nothing when every mask qualifies).
+    """
+    masks = list(masks)
+    if len(masks) == len(ALL_MASKS):
+        return ""
+    if not masks:
+        return " AND 1 = 0"
+    query_params.extend(masks)
+    return f" AND {column} IN ({','.join(['%s'] * len(masks))})"
+
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+def materialize(conn, horizon_days=None, recurring_task_id=None):
+    """
+    Inserts the missing task rows from CURDATE() through CURDATE() + horizon_days, for every template
+    or only recurring_task_id. Does not commit. Returns the number of rows inserted.
+    """
+    horizon_days = HORIZON_DAYS if horizon_days is None else horizon_days
+    horizon_days = max(0, min(int(horizon_days), MAX_HORIZON_DAYS))
+
+    # IGNORE only ever skips (recurring_task_id, due_date) duplicates here: every selected row comes from
+    # an existing template, so its author and section foreign keys hold
+    query = """
+        INSERT IGNORE INTO task (title, description, author_id, section_id, due_date, recurring_task_id)
+        WITH RECURSIVE calendar (day) AS (
+            SELECT CURDATE()
+            UNION ALL
+            SELECT day + INTERVAL 1 DAY FROM calendar WHERE day < CURDATE() + INTERVAL %s DAY
+        )
+        SELECT rt.title, rt.description, rt.author_id, rt.section_id, calendar.day, rt.recurring_task_id
+        FROM recurring_task rt
+        JOIN calendar
+            ON calendar.day >= rt.start_date
+            AND (rt.end_date IS NULL OR calendar.day <= rt.end_date)
+            AND rt.weekday_mask & (1 << (DAYOFWEEK(calendar.day) - 1))
+        WHERE 1 = 1
+    """
+    params = [horizon_days]
+
+    if recurring_task_id is not None:
+        query += " AND rt.recurring_task_id = %s"
+        params.append(recurring_task_id)
+    else:
+        # Only templates recurring inside the window (a day of slack either side for the app / DB clock)
+        today = date.today()
+        bits = weekday_bits(today - timedelta(days=1), today + timedelta(days=horizon_days + 1))
+        query += mask_filter("rt.weekday_mask", masks_with_any(bits), params)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, tuple(params))
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def discard_future(conn, recurring_task_id):
+    """
+    Deletes a template's pre-generated rows after today that nobody has completed or edited, so an
+    edited template can be re-materialized and a deleted one leaves no orphans. Does not commit.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            DELETE FROM task
+            WHERE recurring_task_id = %s
+              AND due_date > CURDATE()
+              AND complete = 0
+              AND last_modified_by IS NULL
+        """, (recurring_task_id,))
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def refresh_template(conn, recurring_task_id, horizon_days=None):
+    """
+    Re-generates one template's upcoming rows after it was edited. Does not commit.
+    """
+    discard_future(conn, recurring_task_id)
+    return materialize(conn, horizon_days, recurring_task_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize recurring task templates into task rows")
+    parser.add_argument("--horizon", type=int, default=HORIZON_DAYS, help="Days after today to generate")
+    parser.add_argument("--recurring-task-id", type=int, help="Only this template")
+    args = parser.parse_args()
+
+    conn = db_pool.get_pool().get_connection()
+    try:
+        inserted = materialize(conn, args.horizon, args.recurring_task_id)
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"Inserted {inserted} task rows (horizon {args.horizon} days)")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,9 @@ from notifications.events import NotificationEvent
 import mysql.connector
 import os
 import request_helper
+from auth.middleware import bind_principal
+import etag
+import pagination
 from datetime import datetime
 from typing import List
 
@@ -11,6 +14,9 @@ from typing import List
 # -------------------------------------------------------------------------------------------------------
 
 
+# table_version scopes read by get_tor (see etag.py)
+TOR_SCOPES = ('time_off_request', 'employee', 'role')
+
 def get_tor(db, request):
     """
     Fetches TOR records based on optional URL query parameters.
@@ -31,7 +37,9 @@ def get_tor(db, request):
             'reason': str,
             'status': List[str],
             'date_sort': str,  # "Newest" or "Oldest" - Sorts by date in relation to the current day
-            'timestamp_sort': str  # "Newest" or "Oldest" - Sorts by timestamp
+            'timestamp_sort': str,  # "Newest" or "Oldest" - Sorts by timestamp
+            'limit': int,  # Page size (optional, keyset pagination)
+            'after': str  # Cursor from a previous page's X-Next-Cursor header
         }
 
         # Validate and parse parameters
@@ -52,11 +60,44 @@ def get_tor(db, request):
         date_sort = params.get("date_sort")
         timestamp_sort = params.get("timestamp_sort")
 
+        # -----------------------------
+        # Time Sorting Logic
+        # -----------------------------
+        sort_keys = []
+
+        # AGE SORTING FIRST
+        if date_sort == "Newest":
+            sort_keys.append(("tor.start_date", "DESC"))
+        elif date_sort == "Oldest":
+            sort_keys.append(("tor.start_date", "ASC"))
+
+        # TIMESTAMP SORTING SECOND
+        if timestamp_sort == "Newest":
+            sort_keys.append(("tor.timestamp", "DESC"))
+        elif timestamp_sort == "Oldest":
+            sort_keys.append(("tor.timestamp", "ASC"))
+
+        # Default fallback
+        if not sort_keys:
+            sort_keys.append(("tor.start_date", "DESC"))
+
+        # request_id breaks ties so pages never overlap
+        sort_keys.append(("tor.request_id", sort_keys[-1][1]))
+
+        page, error = pagination.parse(params, sort_keys)
+        if error:
+            return jsonify(error), 400
+
         conn = db
         cursor = conn.cursor(dictionary=True)
 
+        # Conditional GET: answer from the version probe when the client's copy is current
+        tag = etag.compute(cursor, request, TOR_SCOPES)
+        if etag.matches(request, tag):
+            return etag.not_modified(tag)
+
         # Base Query
-        query = """
+        query = f"""
             SELECT
                 tor.request_id,
                 tor.employee_id,
@@ -68,7 +109,7 @@ def get_tor(db, request):
                 DATE_FORMAT(tor.end_date, '%Y-%m-%d') AS end_date,
                 tor.reason,
                 tor.status,
-                DATE_FORMAT(tor.timestamp, '%Y-%m-%d %H:%i') AS timestamp
+                DATE_FORMAT(tor.timestamp, '%Y-%m-%d %H:%i') AS timestamp{pagination.select_keys(sort_keys)}
             FROM time_off_request tor
             JOIN employee e ON tor.employee_id = e.employee_id
             LEFT JOIN role pr ON e.primary_role = pr.role_id
@@ -149,33 +190,17 @@ def get_tor(db, request):
             query_params.extend(role_values)
 
         # -----------------------------
-        # Time Sorting Logic
+        # Keyset Pagination + Ordering
         # -----------------------------
-        order_clauses = []
-
-        # AGE SORTING FIRST
-        if date_sort == "Newest":
-            order_clauses.append("tor.start_date DESC")
-        elif date_sort == "Oldest":
-            order_clauses.append("tor.start_date ASC")
-
-        # TIMESTAMP SORTING SECOND
-        if timestamp_sort == "Newest":
-            order_clauses.append("tor.timestamp DESC")
-        elif timestamp_sort == "Oldest":
-            order_clauses.append("tor.timestamp ASC")
-
-        # Default fallback
-        if not order_clauses:
-            order_clauses.append("tor.start_date DESC")
-
-        query += " ORDER BY " + ", ".join(order_clauses)
+        query += page.where(query_params)
+        query += pagination.order_by(sort_keys)
+        query += page.limit_clause(query_params)
 
         # Execute Query
         cursor.execute(query, tuple(query_params))
-        result = cursor.fetchall()
+        result, next_cursor = page.finish(cursor.fetchall())
 
-        return jsonify(result), 200
+        return pagination.add_header(etag.json_response(result, tag), next_cursor), 200
 
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
@@ -225,6 +250,11 @@ def insert_tor(db, request):
         if error:
             return jsonify(error), 400
 
+        # The acting employee comes from the token when there is one (see auth/middleware.py)
+        error = bind_principal(fields, 'employee_id', allow_admin=True)
+        if error:
+            return jsonify(error), 403
+
         # Extract Parameters
         employee_id = fields['employee_id']
         start_date = fields['start_date']
@@ -243,27 +273,20 @@ def insert_tor(db, request):
 
         inserted_id = cursor.lastrowid
 
-        conn.commit()
-
-        # Close cursor immediately before notifications
-        cursor.close()
-        cursor = None
-
-        # --- NOTIFICATION TRIGGER ---
-        try:
-            dispatch_notification(
-                db,
-                NotificationEvent.TIME_OFF_CREATED,
-                {
-                    "request_id": inserted_id,
-                    "employee_id": employee_id,
-                    "actor_employee_id": employee_id
-                }
-            )
-        except Exception as e:
-            print(f"Notification Error: {e}")
+        # --- NOTIFICATION TRIGGER (queued in the same transaction) ---
+        dispatch_notification(
+            db,
+            NotificationEvent.TIME_OFF_CREATED,
+            {
+                "request_id": inserted_id,
+                "employee_id": employee_id,
+                "actor_employee_id": employee_id
+            }
+        )
         # ----------------------------
 
+        conn.commit()
+
         return jsonify({"status": "success", "inserted_id": inserted_id}), 201
 
     except mysql.connector.Error as e:
@@ -318,10 +341,11 @@ def update_tor(db, request, request_id):
 
         # --- FETCH CURRENT DETAILS (Needed for notifications) ---
         cursor.execute(
-            "SELECT status, employee_id FROM time_off_request WHERE request_id = %s", (request_id,))
+            "SELECT status, employee_id FROM time_off_request WHERE request_id = %s FOR UPDATE", (request_id,))
         current = cursor.fetchone()
 
         if not current:
+            conn.rollback()
             cursor.close()
             return jsonify({"status": "error", "message": "Time Off Request not found"}), 404
 
@@ -336,42 +360,36 @@ def update_tor(db, request, request_id):
         """
 
         cursor.execute(query, tuple(values))
-        conn.commit()
         rowcount = cursor.rowcount
 
-        # Close cursor immediately before notifications
-        cursor.close()
-        cursor = None
-
         if rowcount == 0:
+            conn.rollback()
             return jsonify({"status": "error", "message": "No shift found with given ID"}), 404
 
-        # --- NOTIFICATION TRIGGERS ---
+        # --- NOTIFICATION TRIGGERS (queued in the same transaction) ---
         new_status = fields.get("status")
 
         if new_status and new_status != old_status:
-            try:
-                event = None
-                if new_status == "Accepted":
-                    event = NotificationEvent.TIME_OFF_APPROVED
-                elif new_status == "Denied":
-                    event = NotificationEvent.TIME_OFF_DENIED
-
-                if event:
-                    dispatch_notification(
-                        db,
-                        event,
-                        {
-                            "request_id": request_id,
-                            "employee_id": employee_id,
-                            "status": new_status
-                        }
-                    )
-            except Exception as e:
-                # Log the error, but do not fail the request
-                print(f"Notification Error in update_tor: {e}")
+            event = None
+            if new_status == "Accepted":
+                event = NotificationEvent.TIME_OFF_APPROVED
+            elif new_status == "Denied":
+                event = NotificationEvent.TIME_OFF_DENIED
+
+            if event:
+                dispatch_notification(
+                    db,
+                    event,
+                    {
+                        "request_id": request_id,
+                        "employee_id": employee_id,
+                        "status": new_status
+                    }
+                )
         # -----------------------------
 
+        conn.commit()
+
         return jsonify({"status": "success", "updated_rows": rowcount}), 200
 
     except mysql.connector.Error as e:
@@ -0,0 +1,361 @@
+import json
+import os
+import random
+import signal
+import threading
+import time
+
+import archive
+import data_version
+import db_pool
+import push_notifications
+import query_debug
+import sync
+import task_materializer
+from notifications import receipts
+from notifications.dispatcher import deliver_notification
+from notifications.events import NotificationEvent
+
+# Notification Worker -----------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Drains notification_outbox outside the API process:   python worker.py
+#
+# Each delivery thread claims a batch of due events with FOR UPDATE SKIP LOCKED (so threads and replicas
+# never pick the same row), resolves recipients through the normal notification handlers, sends every
+# resulting device message in shared Expo requests, then records per-event status. Failed events are
+# retried with exponential backoff until NOTIFY_MAX_ATTEMPTS, after which they are marked 'failed'.
+# Expo tickets from each send are stored and their receipts polled later (notifications/receipts.py).
+#
+# The maintenance thread also materializes recurring tasks (task_materializer.py) and moves old tasks and
+# shifts into the archive tables (archive.py) once a day, purges /sync tombstones past their retention
+# (sync.py) every hour, and folds table_version rows of closed connections (data_version.py) every 10
+# minutes.
+#
+# Environment:
+#   NOTIFY_WORKER_THREADS   Delivery threads (default 2)
+#   NOTIFY_BATCH_SIZE       Events claimed per cycle (default 50)
+#   NOTIFY_POLL_SECONDS     Sleep when the outbox is empty (default 1)
+#   NOTIFY_MAX_ATTEMPTS     Attempts before an event is marked failed (default 8)
+#   NOTIFY_BACKOFF_BASE     Seconds before the first retry, doubled per attempt (default 5)
+#   NOTIFY_BACKOFF_MAX      Cap on the retry delay in seconds (default 900)
+#   NOTIFY_STALE_SECONDS    A 'processing' row older than this is returned to the queue (default 300)
+#   NOTIFY_RETENTION_DAYS   Sent events and error receipts are purged after this many days (default 7)
+#   RECEIPT_POLL_SECONDS    Interval between Expo receipt polls (default 60)
+
+WORKER_THREADS = int(os.environ.get("NOTIFY_WORKER_THREADS", 2))
+BATCH_SIZE = int(os.environ.get("NOTIFY_BATCH_SIZE", 50))
+POLL_SECONDS = float(os.environ.get("NOTIFY_POLL_SECONDS", 1))
+MAX_ATTEMPTS = int(os.environ.get("NOTIFY_MAX_ATTEMPTS", 8))
+BACKOFF_BASE = float(os.environ.get("NOTIFY_BACKOFF_BASE", 5))
+BACKOFF_MAX = float(os.environ.get("NOTIFY_BACKOFF_MAX", 900))
+STALE_SECONDS = int(os.environ.get("NOTIFY_STALE_SECONDS", 300))
+RETENTION_DAYS = int(os.environ.get("NOTIFY_RETENTION_DAYS", 7))
+RECEIPT_POLL_SECONDS = int(os.environ.get("RECEIPT_POLL_SECONDS", 60))
+
+
+# Outbox Delivery ---------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+def claim_batch(conn, limit):
+    """
+    Marks up to `limit` due events as 'processing' and returns them.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction()
+        cursor.execute("""
+            SELECT outbox_id, event, payload, attempts
+            FROM notification_outbox
+            WHERE status = 'pending' AND available_at <= NOW()
+            ORDER BY available_at, outbox_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (limit,))
+        rows = cursor.fetchall()
+
+        if rows:
+            placeholders = ','.join(['%s'] * len(rows))
+            cursor.execute(f"""
+                UPDATE notification_outbox
+                SET status = 'processing', locked_at = NOW(), attempts = attempts + 1
+                WHERE outbox_id IN ({placeholders})
+            """, tuple(row["outbox_id"] for row in rows))
+
+        conn.commit()
+    finally:
+        cursor.close()
+
+    for row in rows:
+        row["attempts"] += 1
+    return rows
+
+
+def deliver_batch(conn, rows):
+    """
+    Runs the handlers for every claimed event and sends the collected messages together.
+    Returns ({outbox_id: messages_sent}, {outbox_id: error}, PushBatch with the Expo tickets).
+    """
+    failed = {}
+
+    with push_notifications.collect() as batch:
+        for row in rows:
+            outbox_id = row["outbox_id"]
+            batch.current = outbox_id
+            try:
+                payload = row["payload"]
+                if isinstance(payload, (bytes, bytearray)):
+                    payload = payload.decode("utf-8")
+                if isinstance(payload, str):
+                    payload = json.loads(payload)
+
+                deliver_notification(conn, NotificationEvent(row["event"]), payload)
+            except Exception as e:
+                batch.discard(outbox_id)
+                failed[outbox_id] = f"{type(e).__name__}: {e}"
+
+        # Handlers only read; end their snapshot before the (slow) HTTP calls
+        conn.rollback()
+
+        counts = batch.counts()
+        failed.update(batch.flush())
+
+    sent = {
+        row["outbox_id"]: counts.get(row["outbox_id"], 0)
+        for row in rows if row["outbox_id"] not in failed
+    }
+    return sent, failed, batch
+
+
+def record_results(conn, rows, sent, failed):
+    cursor = conn.cursor()
+    try:
+        if sent:
+            cursor.executemany("""
+                UPDATE notification_outbox
+                SET status = 'sent', delivered_at = NOW(), messages = %s, last_error = NULL
+                WHERE outbox_id = %s
+            """, [(messages, outbox_id) for outbox_id, messages in sent.items()])
+
+        attempts = {row["outbox_id"]: row["attempts"] for row in rows}
+        for outbox_id, error in failed.items():
+            if attempts[outbox_id] >= MAX_ATTEMPTS:
+                cursor.execute("""
+                    UPDATE notification_outbox
+                    SET status = 'failed', last_error = %s
+                    WHERE outbox_id = %s
+                """, (error[:1000], outbox_id))
+            else:
+                cursor.execute("""
+                    UPDATE notification_outbox
+                    SET status = 'pending', available_at = NOW() + INTERVAL %s SECOND, last_error = %s
+                    WHERE outbox_id = %s
+                """, (backoff_seconds(attempts[outbox_id]), error[:1000], outbox_id))
+
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def backoff_seconds(attempts):
+    """
+    Exponential backoff with +/-20% jitter so a burst of failures does not retry in lockstep.
+    """
+    delay = BACKOFF_BASE * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+    return int(max(1, min(delay, BACKOFF_MAX)))
+
+
+def drain_once(pool):
+    """
+    Processes one batch. Returns the number of events claimed.
+    """
+    conn = pool.get_connection()
+    try:
+        rows = claim_batch(conn, BATCH_SIZE)
+        if not rows:
+            return 0
+
+        with query_debug.track(f"notification batch ({len(rows)} events)"):
+            sent, failed, batch = deliver_batch(conn, rows)
+
+        # Committed together with the outbox status below
+        receipts.record_tickets(conn, batch.tickets)
+        receipts.prune_tokens(conn, batch.dead_tokens)
+        record_results(conn, rows, sent, failed)
+
+        for outbox_id, error in failed.items():
+            print(f"Notification {outbox_id} failed: {error}")
+        return len(rows)
+    finally:
+        conn.close()
+
+
+# Maintenance -------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+def reclaim_stale(pool):
+    """
+    Returns events whose worker died mid-delivery to the queue.
+    """
+    conn = pool.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE notification_outbox
+            SET status = 'pending', available_at = NOW()
+            WHERE status = 'processing' AND locked_at < NOW() - INTERVAL %s SECOND
+        """, (STALE_SECONDS,))
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def purge_sent(pool):
+    conn = pool.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM notification_outbox
+            WHERE status = 'sent' AND delivered_at < NOW() - INTERVAL %s DAY
+            LIMIT 5000
+        """, (RETENTION_DAYS,))
+        cursor.close()
+        receipts.purge_errors(conn, RETENTION_DAYS)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def poll_receipts(pool):
+    """
+    Applies Expo receipts for tickets that are old enough to have one; prunes dead tokens.
+    """
+    conn = pool.get_connection()
+    try:
+        summary = receipts.poll_receipts(conn)
+        conn.commit()
+        if summary["checked"]:
+            print(f"Expo receipts: {summary}")
+    finally:
+        conn.close()
+
+
+def materialize_recurring_tasks(pool):
+    """
+    Generates task rows for every recurring template up to the horizon (runs at start-up, then daily).
+    """
+    conn = pool.get_connection()
+    try:
+        inserted = task_materializer.materialize(conn)
+        conn.commit()
+        print(f"Recurring tasks: {inserted} rows materialized")
+    finally:
+        conn.close()
+
+
+def archive_history(pool):
+    """
+    Moves completed tasks and past shifts beyond the archive horizons out of the hot tables.
+    """
+    conn = pool.get_connection()
+    try:
+        moved = archive.archive_all(conn)
+        if any(moved.values()):
+            print(f"Archived: {moved}")
+    finally:
+        conn.close()
+
+
+def purge_tombstones(pool):
+    """
+    Drops /sync tombstones older than SYNC_TOMBSTONE_DAYS.
+    """
+    conn = pool.get_connection()
+    try:
+        sync.purge_tombstones(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def compact_versions(pool):
+    """
+    Folds table_version counters of closed connections into slot 0.
+    """
+    conn = pool.get_connection()
+    try:
+        data_version.compact(conn)
+    finally:
+        conn.close()
+
+
+# (interval seconds, job) run by the maintenance thread
+PERIODIC_JOBS = [
+    (60, reclaim_stale),
+    (RECEIPT_POLL_SECONDS, poll_receipts),
+    (3600, purge_sent),
+    (86400, materialize_recurring_tasks),
+    (86400, archive_history),
+    (3600, purge_tombstones),
+    (600, compact_versions),
+]
+
+
+# -------------------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+
+
+def delivery_loop(pool, stop):
+    while not stop.is_set():
+        try:
+            claimed = drain_once(pool)
+        except Exception as e:
+            print(f"Notification worker error: {e}")
+            claimed = 0
+
+        # Keep draining while there is a backlog, otherwise poll
+        if claimed < BATCH_SIZE:
+            stop.wait(POLL_SECONDS)
+
+
+def maintenance_loop(pool, stop):
+    next_run = {job: 0.0 for _, job in PERIODIC_JOBS}
+    while not stop.is_set():
+        now = time.monotonic()
+        for interval, job in PERIODIC_JOBS:
+            if now >= next_run[job]:
+                next_run[job] = now + interval
+                try:
+                    job(pool)
+                except Exception as e:
+                    print(f"Worker job {job.__name__} failed: {e}")
+        stop.wait(1)
+
+
+def main():
+    pool = db_pool.get_pool()
+    stop = threading.Event()
+
+    def shutdown(signum, frame):
+        print("Notification worker stopping...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    threads = [threading.Thread(target=delivery_loop, args=(pool, stop), name=f"notify-{i}")
+               for i in range(WORKER_THREADS)]
+    threads.append(threading.Thread(target=maintenance_loop, args=(pool, stop), name="maintenance"))
+
+    for thread in threads:
+        thread.start()
+    print(f"Notification worker started ({WORKER_THREADS} delivery threads)")
+
+    for thread in threads:
+        thread.join()
+    pool.close_idle()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,8 @@
 USE thebrownbottle;
 
 -- -----------------------------------------------------
--- Event: add_recurring_tasks
+-- Event: add_recurring_tasks (retired)
 -- -----------------------------------------------------
+-- Recurring tasks are materialized by the notification worker (api/task_materializer.py),
+-- once a day and whenever a template is created or edited.
 DROP EVENT IF EXISTS add_recurring_tasks_event;
-
-CREATE EVENT add_recurring_tasks_event
-ON SCHEDULE EVERY 1 HOUR
-STARTS CURRENT_TIMESTAMP
-DO CALL insert_recurring_tasks_procedure();
@@ -0,0 +1,52 @@
+-- -----------------------------------------------------
+-- Migration 001: row-level concurrency control
+-- -----------------------------------------------------
+-- Apply to databases created before the global API lock was removed.
+-- Fresh databases get the same objects from tbb-schema.sql and triggers.sql.
+--
+--   mysql -u root -p thebrownbottle < migrations/001_row_concurrency.sql
+
+USE thebrownbottle;
+
+-- Optimistic versioning
+ALTER TABLE `shift`
+  ADD COLUMN `version` INT UNSIGNED NOT NULL DEFAULT 1;
+
+ALTER TABLE `shift_cover_request`
+  ADD COLUMN `version` INT UNSIGNED NOT NULL DEFAULT 1,
+  ADD COLUMN `is_open` TINYINT(1) NULL DEFAULT 1;
+
+-- Backfill the open flag, then resolve duplicate open requests (keep the newest) so the unique key can be built
+UPDATE `shift_cover_request`
+SET `is_open` = IF(`status` IN ('Pending', 'Awaiting Approval'), 1, NULL);
+
+UPDATE `shift_cover_request` older
+JOIN `shift_cover_request` newer
+  ON newer.shift_id = older.shift_id
+  AND newer.requested_employee_id = older.requested_employee_id
+  AND newer.is_open = 1
+  AND newer.cover_request_id > older.cover_request_id
+SET older.status = 'Denied', older.is_open = NULL
+WHERE older.is_open = 1;
+
+ALTER TABLE `shift_cover_request`
+  ADD UNIQUE INDEX `scr_one_open_per_requester` (`shift_id`, `requested_employee_id`, `is_open`);
+
+DROP TRIGGER IF EXISTS scr_set_open_flag_insert;
+DROP TRIGGER IF EXISTS scr_set_open_flag_update;
+
+DELIMITER $$
+CREATE TRIGGER scr_set_open_flag_insert
+BEFORE INSERT ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    SET NEW.is_open = IF(NEW.status IN ('Pending', 'Awaiting Approval'), 1, NULL);
+END$$
+
+CREATE TRIGGER scr_set_open_flag_update
+BEFORE UPDATE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    SET NEW.is_open = IF(NEW.status IN ('Pending', 'Awaiting Approval'), 1, NULL);
+END$$
+DELIMITER ;
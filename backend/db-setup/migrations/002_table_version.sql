@@ -0,0 +1,182 @@
+-- -----------------------------------------------------
+-- Migration 002: table_version change counters
+-- -----------------------------------------------------
+-- Backs the /schedule cache: GET handlers compare these counters instead of re-running
+-- their queries. Fresh databases get the same objects from tbb-schema.sql and triggers.sql.
+--
+--   mysql -u root -p thebrownbottle < migrations/002_table_version.sql
+
+USE thebrownbottle;
+
+CREATE TABLE IF NOT EXISTS `table_version` (
+  `table_name` VARCHAR(64) NOT NULL,
+  `slot` TINYINT UNSIGNED NOT NULL,
+  `version` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  PRIMARY KEY (`table_name`, `slot`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
+DROP TRIGGER IF EXISTS shift_bump_version_insert;
+DROP TRIGGER IF EXISTS shift_bump_version_update;
+DROP TRIGGER IF EXISTS shift_bump_version_delete;
+DROP TRIGGER IF EXISTS availability_bump_version_insert;
+DROP TRIGGER IF EXISTS availability_bump_version_update;
+DROP TRIGGER IF EXISTS availability_bump_version_delete;
+DROP TRIGGER IF EXISTS time_off_bump_version_insert;
+DROP TRIGGER IF EXISTS time_off_bump_version_update;
+DROP TRIGGER IF EXISTS time_off_bump_version_delete;
+DROP TRIGGER IF EXISTS employee_bump_version_insert;
+DROP TRIGGER IF EXISTS employee_bump_version_update;
+DROP TRIGGER IF EXISTS employee_bump_version_delete;
+DROP TRIGGER IF EXISTS role_bump_version_update;
+DROP TRIGGER IF EXISTS role_bump_version_delete;
+DROP TRIGGER IF EXISTS section_bump_version_update;
+DROP TRIGGER IF EXISTS section_bump_version_delete;
+
+-- -----------------------------------------------------
+-- Event: bump table_version for schedule cache scopes
+-- -----------------------------------------------------
+-- Scopes read by GET /schedule: shift, availability, time_off_accepted, employee_roster, role, section.
+-- time_off_accepted only moves when accepted time off changes, employee_roster only when
+-- fields shown on the schedule (active flag, role, name) change.
+DELIMITER $$
+CREATE TRIGGER shift_bump_version_insert
+AFTER INSERT ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', NEW.shift_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER shift_bump_version_update
+AFTER UPDATE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', NEW.shift_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER shift_bump_version_delete
+AFTER DELETE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', OLD.shift_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_insert
+AFTER INSERT ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', NEW.employee_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_update
+AFTER UPDATE ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', NEW.employee_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_delete
+AFTER DELETE ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', OLD.employee_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_version_insert
+AFTER INSERT ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'Accepted' THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', NEW.request_id % 8, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER time_off_bump_version_update
+AFTER UPDATE ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF (NEW.status != OLD.status
+        OR (NEW.status = 'Accepted' AND (NEW.start_date != OLD.start_date OR NEW.end_date != OLD.end_date OR NEW.employee_id != OLD.employee_id))) THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', NEW.request_id % 8, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER time_off_bump_version_delete
+AFTER DELETE ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF OLD.status = 'Accepted' THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', OLD.request_id % 8, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER employee_bump_version_insert
+AFTER INSERT ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', NEW.employee_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_version_update
+AFTER UPDATE ON employee
+FOR EACH ROW
+BEGIN
+    IF (NEW.is_active != OLD.is_active
+        OR NEW.primary_role != OLD.primary_role
+        OR NEW.first_name != OLD.first_name
+        OR NEW.last_name != OLD.last_name) THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', NEW.employee_id % 8, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER employee_bump_version_delete
+AFTER DELETE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', OLD.employee_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER role_bump_version_update
+AFTER UPDATE ON role
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('role', NEW.role_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER role_bump_version_delete
+AFTER DELETE ON role
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('role', OLD.role_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER section_bump_version_update
+AFTER UPDATE ON section
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('section', NEW.section_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER section_bump_version_delete
+AFTER DELETE ON section
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('section', OLD.section_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
@@ -0,0 +1,148 @@
+-- -----------------------------------------------------
+-- Migration 003: list endpoint ETag scopes
+-- -----------------------------------------------------
+-- Adds table_version scopes for employee, time_off_request, task, announcement and
+-- shift_cover_request so GET list endpoints can answer If-None-Match without running their query.
+-- Requires migration 002.
+--
+--   mysql -u root -p thebrownbottle < migrations/003_list_etag_versions.sql
+
+USE thebrownbottle;
+
+DROP TRIGGER IF EXISTS employee_bump_list_version_insert;
+DROP TRIGGER IF EXISTS employee_bump_list_version_update;
+DROP TRIGGER IF EXISTS employee_bump_list_version_delete;
+DROP TRIGGER IF EXISTS time_off_bump_list_version_insert;
+DROP TRIGGER IF EXISTS time_off_bump_list_version_update;
+DROP TRIGGER IF EXISTS time_off_bump_list_version_delete;
+DROP TRIGGER IF EXISTS task_bump_version_insert;
+DROP TRIGGER IF EXISTS task_bump_version_update;
+DROP TRIGGER IF EXISTS task_bump_version_delete;
+DROP TRIGGER IF EXISTS announcement_bump_version_insert;
+DROP TRIGGER IF EXISTS announcement_bump_version_update;
+DROP TRIGGER IF EXISTS announcement_bump_version_delete;
+DROP TRIGGER IF EXISTS scr_bump_version_insert;
+DROP TRIGGER IF EXISTS scr_bump_version_update;
+DROP TRIGGER IF EXISTS scr_bump_version_delete;
+
+DELIMITER $$
+CREATE TRIGGER employee_bump_list_version_insert
+AFTER INSERT ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', NEW.employee_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_list_version_update
+AFTER UPDATE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', NEW.employee_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_list_version_delete
+AFTER DELETE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', OLD.employee_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_insert
+AFTER INSERT ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', NEW.request_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_update
+AFTER UPDATE ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', NEW.request_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_delete
+AFTER DELETE ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', OLD.request_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_insert
+AFTER INSERT ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', NEW.task_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_update
+AFTER UPDATE ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', NEW.task_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_delete
+AFTER DELETE ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', OLD.task_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_insert
+AFTER INSERT ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', NEW.announcement_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_update
+AFTER UPDATE ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', NEW.announcement_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_delete
+AFTER DELETE ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', OLD.announcement_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_insert
+AFTER INSERT ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', NEW.cover_request_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_update
+AFTER UPDATE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', NEW.cover_request_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_delete
+AFTER DELETE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', OLD.cover_request_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
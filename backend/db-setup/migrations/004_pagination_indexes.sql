@@ -0,0 +1,17 @@
+-- -----------------------------------------------------
+-- Migration 004: keyset pagination indexes
+-- -----------------------------------------------------
+-- Lets paged GET /task, /announcement, /scr and /tor read each page as an index range scan.
+-- InnoDB appends the primary key to every secondary index, so (timestamp) also serves the
+-- (timestamp, id) tie-breaker order.
+--
+--   mysql -u root -p thebrownbottle < migrations/004_pagination_indexes.sql
+
+USE thebrownbottle;
+
+ALTER TABLE `task` ADD INDEX `task_timestamp_idx` (`timestamp`);
+ALTER TABLE `announcement` ADD INDEX `announcement_timestamp_idx` (`timestamp`);
+ALTER TABLE `shift_cover_request` ADD INDEX `scr_timestamp_idx` (`timestamp`);
+ALTER TABLE `time_off_request`
+  ADD INDEX `tor_start_date_idx` (`start_date`),
+  ADD INDEX `tor_timestamp_idx` (`timestamp`);
@@ -0,0 +1,26 @@
+-- -----------------------------------------------------
+-- Migration 005: notification outbox
+-- -----------------------------------------------------
+-- Write handlers now queue push notifications here instead of sending them inline;
+-- the notification-worker service delivers them.
+--
+--   mysql -u root -p thebrownbottle < migrations/005_notification_outbox.sql
+
+USE thebrownbottle;
+
+CREATE TABLE IF NOT EXISTS `notification_outbox` (
+  `outbox_id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  `event` VARCHAR(64) NOT NULL,
+  `payload` JSON NOT NULL,
+  `status` ENUM('pending', 'processing', 'sent', 'failed') NOT NULL DEFAULT 'pending',
+  `attempts` SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  `available_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `locked_at` DATETIME NULL DEFAULT NULL,
+  `delivered_at` DATETIME NULL DEFAULT NULL,
+  `messages` INT UNSIGNED NULL DEFAULT NULL,
+  `last_error` VARCHAR(1000) NULL DEFAULT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`outbox_id`),
+  INDEX `outbox_claim_idx` (`status`, `available_at`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
@@ -0,0 +1,21 @@
+-- -----------------------------------------------------
+-- Migration 006: Expo push tickets
+-- -----------------------------------------------------
+-- Lets the notification worker poll Expo receipts and prune unregistered push tokens.
+--
+--   mysql -u root -p thebrownbottle < migrations/006_push_ticket.sql
+
+USE thebrownbottle;
+
+CREATE TABLE IF NOT EXISTS `push_ticket` (
+  `ticket_id` VARCHAR(64) NOT NULL,
+  `expo_push_token` VARCHAR(255) NOT NULL,
+  `outbox_id` BIGINT UNSIGNED NULL DEFAULT NULL,
+  `status` ENUM('pending', 'error') NOT NULL DEFAULT 'pending',
+  `error` VARCHAR(64) NULL DEFAULT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `checked_at` DATETIME NULL DEFAULT NULL,
+  PRIMARY KEY (`ticket_id`),
+  INDEX `push_ticket_poll_idx` (`status`, `created_at`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
@@ -0,0 +1,28 @@
+-- -----------------------------------------------------
+-- Migration 007: composite indexes for the list filters
+-- -----------------------------------------------------
+-- Matches the WHERE / ORDER BY shapes the GET handlers build so each list is an index range scan:
+--   task                 due_date (today/past/future) + complete, ordered by timestamp
+--   announcement         role_id, ordered by timestamp
+--   shift                date range + section_id (schedule, shift lists)
+--   shift_cover_request  status IN (...), ordered by timestamp
+--   time_off_request     employee_id + status + date range; status ordered by start_date
+--
+-- The new time_off_request / announcement indexes lead with the foreign key column, so MySQL drops the
+-- index it created implicitly for fk_employee_id / fk_role.
+--
+-- Verify with:  python backend/perf/explain_indexes.py
+--
+--   mysql -u root -p thebrownbottle < migrations/007_query_indexes.sql
+
+USE thebrownbottle;
+
+ALTER TABLE `task` ADD INDEX `task_due_date_complete_idx` (`due_date`, `complete`, `timestamp`);
+ALTER TABLE `announcement` ADD INDEX `announcement_role_timestamp_idx` (`role_id`, `timestamp`);
+ALTER TABLE `shift` ADD INDEX `shift_date_section_idx` (`date`, `section_id`);
+ALTER TABLE `shift_cover_request` ADD INDEX `scr_status_timestamp_idx` (`status`, `timestamp`);
+ALTER TABLE `time_off_request`
+  ADD INDEX `tor_employee_status_dates_idx` (`employee_id`, `status`, `start_date`, `end_date`),
+  ADD INDEX `tor_status_start_date_idx` (`status`, `start_date`);
+
+ANALYZE TABLE `task`, `announcement`, `shift`, `shift_cover_request`, `time_off_request`;
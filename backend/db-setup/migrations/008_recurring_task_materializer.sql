@@ -0,0 +1,25 @@
+-- -----------------------------------------------------
+-- Migration 008: recurring tasks materialized by the API tier
+-- -----------------------------------------------------
+-- api/task_materializer.py (run daily by worker.py and on template create/edit) replaces the hourly
+-- add_recurring_tasks_event and insert_recurring_tasks_procedure. Its inserts are de-duplicated by a
+-- unique (recurring_task_id, due_date) key, so any existing duplicates are removed first (the oldest
+-- row of each pair is kept). The unique key leads with recurring_task_id and takes over from
+-- fk_task_recurring_task_idx for the foreign key.
+--
+--   mysql -u root -p thebrownbottle < migrations/008_recurring_task_materializer.sql
+
+USE thebrownbottle;
+
+DROP EVENT IF EXISTS add_recurring_tasks_event;
+DROP PROCEDURE IF EXISTS insert_recurring_tasks_procedure;
+
+DELETE newer
+FROM task newer
+JOIN task older
+  ON older.recurring_task_id = newer.recurring_task_id
+  AND older.due_date = newer.due_date
+  AND older.task_id < newer.task_id;
+
+ALTER TABLE `task` ADD UNIQUE INDEX `task_recurring_due_date_unique` (`recurring_task_id`, `due_date`);
+ALTER TABLE `task` DROP INDEX `fk_task_recurring_task_idx`;
@@ -0,0 +1,39 @@
+-- -----------------------------------------------------
+-- Migration 009: recurring_task ETag scope
+-- -----------------------------------------------------
+-- GET /task?expand_recurring=1 merges not-yet-materialized recurring dates into the list, so its
+-- ETag also depends on recurring_task. Requires migration 002.
+--
+--   mysql -u root -p thebrownbottle < migrations/009_recurring_task_version.sql
+
+USE thebrownbottle;
+
+DROP TRIGGER IF EXISTS recurring_task_bump_version_insert;
+DROP TRIGGER IF EXISTS recurring_task_bump_version_update;
+DROP TRIGGER IF EXISTS recurring_task_bump_version_delete;
+
+DELIMITER $$
+CREATE TRIGGER recurring_task_bump_version_insert
+AFTER INSERT ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', NEW.recurring_task_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER recurring_task_bump_version_update
+AFTER UPDATE ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', NEW.recurring_task_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER recurring_task_bump_version_delete
+AFTER DELETE ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', OLD.recurring_task_id % 8, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
@@ -0,0 +1,20 @@
+-- -----------------------------------------------------
+-- Migration 010: recurring_task weekday bitmask
+-- -----------------------------------------------------
+-- Adds weekday_mask, a stored generated column holding mon..sun as one bitmask in DAYOFWEEK() order
+-- (Sunday = 1, Monday = 2, ... Saturday = 64), plus indexes on it. MySQL keeps it in sync with the day
+-- columns, which stay the API's read/write fields. Weekday filters are sent as the IN list of masks that
+-- satisfy them (see api/task_materializer.py), so "recurs on Fridays in section X" is an index range
+-- lookup. recurring_task_section_weekday_idx leads with section_id and takes over the foreign key's index.
+--
+--   mysql -u root -p thebrownbottle < migrations/010_recurring_task_weekday_mask.sql
+
+USE thebrownbottle;
+
+ALTER TABLE `recurring_task`
+  ADD COLUMN `weekday_mask` TINYINT UNSIGNED AS (
+    (`sun` <> 0) * 1 + (`mon` <> 0) * 2 + (`tue` <> 0) * 4 + (`wed` <> 0) * 8 +
+    (`thu` <> 0) * 16 + (`fri` <> 0) * 32 + (`sat` <> 0) * 64
+  ) STORED AFTER `sun`,
+  ADD INDEX `recurring_task_weekday_idx` (`weekday_mask`),
+  ADD INDEX `recurring_task_section_weekday_idx` (`section_id`, `weekday_mask`);
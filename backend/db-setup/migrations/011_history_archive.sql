@@ -0,0 +1,77 @@
+-- -----------------------------------------------------
+-- Migration 011: task / shift history archive
+-- -----------------------------------------------------
+-- Archive tables for api/archive.py, which the worker runs daily to move completed tasks and past shifts
+-- older than ARCHIVE_TASK_DAYS / ARCHIVE_SHIFT_DAYS out of the hot tables. GET /task and GET /shift
+-- read them only with include_history=1 and a date range.
+--
+--   mysql -u root -p thebrownbottle < migrations/011_history_archive.sql
+
+USE thebrownbottle;
+
+-- -----------------------------------------------------
+-- Table `task_archive`
+-- -----------------------------------------------------
+-- Completed tasks moved out of `task` once they are older than the archive horizon (see api/archive.py).
+-- Same columns as `task`; read only by GET /task?include_history=1.
+CREATE TABLE IF NOT EXISTS `task_archive` (
+  `task_id` INT UNSIGNED NOT NULL,
+  `type` VARCHAR(20) NOT NULL DEFAULT 'normal',
+  `title` VARCHAR(500) NOT NULL,
+  `description` TEXT NOT NULL,
+  `author_id` INT UNSIGNED NOT NULL,
+  `section_id` INT UNSIGNED NOT NULL,
+  `due_date` DATE NOT NULL,
+  `complete` TINYINT(1) NOT NULL DEFAULT 0,
+  `recurring_task_id` INT UNSIGNED DEFAULT NULL, -- No foreign key: the template may be deleted later
+  `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `last_modified_at` TIMESTAMP NULL DEFAULT NULL,
+  `last_modified_by` INT UNSIGNED DEFAULT NULL,
+  `archived_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`task_id`),
+  INDEX `task_archive_due_date_idx` (`due_date`),
+  INDEX `task_archive_author_idx` (`author_id`),
+  INDEX `task_archive_section_idx` (`section_id`),
+  CONSTRAINT `fk_task_archive_author`
+    FOREIGN KEY (`author_id`)
+    REFERENCES `employee` (`employee_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  CONSTRAINT `fk_task_archive_section`
+    FOREIGN KEY (`section_id`)
+    REFERENCES `section` (`section_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
+
+-- -----------------------------------------------------
+-- Table `shift_archive`
+-- -----------------------------------------------------
+-- Past shifts moved out of `shift` once they are older than the archive horizon (see api/archive.py).
+-- Same columns as `shift`; read only by GET /shift?include_history=1.
+CREATE TABLE IF NOT EXISTS `shift_archive` (
+  `shift_id` INT UNSIGNED NOT NULL,
+  `employee_id` INT UNSIGNED NOT NULL,
+  `start_time` TIME NULL DEFAULT NULL,
+  `date` DATE NULL DEFAULT NULL,
+  `section_id` INT UNSIGNED NOT NULL,
+  `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `version` INT UNSIGNED NOT NULL DEFAULT 1,
+  `archived_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`shift_id`),
+  INDEX `shift_archive_employee_date_idx` (`employee_id`, `date`),
+  INDEX `shift_archive_date_section_idx` (`date`, `section_id`),
+  CONSTRAINT `fk_shift_archive_employee`
+    FOREIGN KEY (`employee_id`)
+    REFERENCES `employee` (`employee_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  CONSTRAINT `fk_shift_archive_section`
+    FOREIGN KEY (`section_id`)
+    REFERENCES `section` (`section_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
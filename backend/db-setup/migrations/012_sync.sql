@@ -0,0 +1,122 @@
+-- -----------------------------------------------------
+-- Migration 012: incremental sync (GET /sync)
+-- -----------------------------------------------------
+-- Adds updated_at (maintained by MySQL) to the tables the app keeps locally, the sync_tombstone table
+-- and the delete triggers that fill it, so GET /sync can return only rows changed since a client's
+-- watermark. Existing rows get the migration time as updated_at, so the first sync is a full one.
+-- worker.py purges tombstones older than SYNC_TOMBSTONE_DAYS.
+--
+--   mysql -u root -p thebrownbottle < migrations/012_sync.sql
+
+USE thebrownbottle;
+
+ALTER TABLE `shift`
+  ADD COLUMN `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  ADD INDEX `shift_updated_at_idx` (`updated_at`);
+
+ALTER TABLE `task`
+  ADD COLUMN `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  ADD INDEX `task_updated_at_idx` (`updated_at`);
+
+ALTER TABLE `announcement`
+  ADD COLUMN `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  ADD INDEX `announcement_updated_at_idx` (`updated_at`);
+
+ALTER TABLE `shift_cover_request`
+  ADD COLUMN `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  ADD INDEX `scr_updated_at_idx` (`updated_at`);
+
+ALTER TABLE `time_off_request`
+  ADD COLUMN `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  ADD INDEX `tor_updated_at_idx` (`updated_at`);
+
+-- -----------------------------------------------------
+-- Table `sync_tombstone`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `sync_tombstone` (
+  `tombstone_id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  `entity` VARCHAR(32) NOT NULL, -- Table name, or '*'
+  `entity_id` INT UNSIGNED NOT NULL,
+  `deleted_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (`tombstone_id`),
+  INDEX `sync_tombstone_entity_idx` (`entity`, `tombstone_id`),
+  INDEX `sync_tombstone_deleted_at_idx` (`deleted_at`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
+DROP TRIGGER IF EXISTS shift_sync_tombstone_delete;
+DROP TRIGGER IF EXISTS shift_sync_tombstone_cascade;
+DROP TRIGGER IF EXISTS task_sync_tombstone_delete;
+DROP TRIGGER IF EXISTS announcement_sync_tombstone_delete;
+DROP TRIGGER IF EXISTS scr_sync_tombstone_delete;
+DROP TRIGGER IF EXISTS time_off_sync_tombstone_delete;
+DROP TRIGGER IF EXISTS employee_sync_tombstone_delete;
+DROP TRIGGER IF EXISTS section_sync_tombstone_delete;
+DROP TRIGGER IF EXISTS role_sync_tombstone_delete;
+
+DELIMITER $$
+CREATE TRIGGER shift_sync_tombstone_delete
+AFTER DELETE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('shift', OLD.shift_id);
+END$$
+
+-- BEFORE: the cover requests are still there to be read when the cascade is about to remove them
+CREATE TRIGGER shift_sync_tombstone_cascade
+BEFORE DELETE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id)
+    SELECT 'shift_cover_request', cover_request_id FROM shift_cover_request WHERE shift_id = OLD.shift_id;
+END$$
+
+CREATE TRIGGER task_sync_tombstone_delete
+AFTER DELETE ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('task', OLD.task_id);
+END$$
+
+CREATE TRIGGER announcement_sync_tombstone_delete
+AFTER DELETE ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('announcement', OLD.announcement_id);
+END$$
+
+CREATE TRIGGER scr_sync_tombstone_delete
+AFTER DELETE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('shift_cover_request', OLD.cover_request_id);
+END$$
+
+CREATE TRIGGER time_off_sync_tombstone_delete
+AFTER DELETE ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('time_off_request', OLD.request_id);
+END$$
+
+CREATE TRIGGER employee_sync_tombstone_delete
+AFTER DELETE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.employee_id);
+END$$
+
+CREATE TRIGGER section_sync_tombstone_delete
+AFTER DELETE ON section
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.section_id);
+END$$
+
+CREATE TRIGGER role_sync_tombstone_delete
+AFTER DELETE ON role
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.role_id);
+END$$
+DELIMITER ;
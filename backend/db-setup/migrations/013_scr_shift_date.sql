@@ -0,0 +1,50 @@
+-- -----------------------------------------------------
+-- Migration 013: shift date on shift_cover_request
+-- -----------------------------------------------------
+-- GET /scr pages sorted by shift date (the default order) used to sort across the shift join, so every
+-- page was a filesort over all matching requests. shift_date copies shift.date onto the request
+-- (kept current by triggers) and is indexed, so each page is an index range scan.
+--
+--   mysql -u root -p thebrownbottle < migrations/013_scr_shift_date.sql
+
+USE thebrownbottle;
+
+ALTER TABLE `shift_cover_request`
+  ADD COLUMN `shift_date` DATE NOT NULL DEFAULT '1000-01-01' AFTER `is_open`,
+  ADD INDEX `scr_shift_date_idx` (`shift_date`),
+  ADD INDEX `scr_status_shift_date_idx` (`status`, `shift_date`);
+
+UPDATE shift_cover_request scr
+JOIN shift s ON s.shift_id = scr.shift_id
+SET scr.shift_date = IFNULL(s.date, '1000-01-01');
+
+DROP TRIGGER IF EXISTS scr_set_shift_date_insert;
+DROP TRIGGER IF EXISTS scr_set_shift_date_update;
+DROP TRIGGER IF EXISTS shift_update_scr_shift_date;
+
+DELIMITER $$
+CREATE TRIGGER scr_set_shift_date_insert
+BEFORE INSERT ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    SET NEW.shift_date = (SELECT IFNULL(date, '1000-01-01') FROM shift WHERE shift_id = NEW.shift_id);
+END$$
+
+CREATE TRIGGER scr_set_shift_date_update
+BEFORE UPDATE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    IF NEW.shift_id <> OLD.shift_id THEN
+        SET NEW.shift_date = (SELECT IFNULL(date, '1000-01-01') FROM shift WHERE shift_id = NEW.shift_id);
+    END IF;
+END$$
+
+CREATE TRIGGER shift_update_scr_shift_date
+AFTER UPDATE ON shift
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.date <=> OLD.date) THEN
+        UPDATE shift_cover_request SET shift_date = IFNULL(NEW.date, '1000-01-01') WHERE shift_id = NEW.shift_id;
+    END IF;
+END$$
+DELIMITER ;
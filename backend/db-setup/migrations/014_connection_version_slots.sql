@@ -0,0 +1,197 @@
+-- -----------------------------------------------------
+-- Migration 014: per-connection table_version slots
+-- -----------------------------------------------------
+-- The /schedule version triggers striped each scope over 8 counter rows keyed by the written row's id,
+-- and every row lock was held until commit. Multi-row writers (publish_shifts, copy_week, approve_scr, archive,
+-- the task materializer) took those locks in data-dependent order, so concurrent batches could
+-- deadlock (1213) and all writers to a table queued on 8 rows. Each connection now bumps its own row
+-- (slot = CONNECTION_ID()); no two open transactions share a counter. Existing counts are folded into
+-- slot 0 first, so every scope keeps its SUM and no cached ETag changes. The list ETag triggers
+-- follow in migration 015.
+--
+--   mysql -u root -p thebrownbottle < migrations/014_connection_version_slots.sql
+
+USE thebrownbottle;
+
+ALTER TABLE `table_version`
+  MODIFY COLUMN `slot` BIGINT UNSIGNED NOT NULL;
+
+CREATE TEMPORARY TABLE table_version_fold AS
+SELECT table_name, SUM(version) AS version
+FROM table_version
+GROUP BY table_name;
+
+DELETE FROM table_version;
+
+INSERT INTO table_version (table_name, slot, version)
+SELECT table_name, 0, version FROM table_version_fold;
+
+DROP TEMPORARY TABLE table_version_fold;
+
+DROP TRIGGER IF EXISTS shift_bump_version_insert;
+DROP TRIGGER IF EXISTS shift_bump_version_update;
+DROP TRIGGER IF EXISTS shift_bump_version_delete;
+DROP TRIGGER IF EXISTS availability_bump_version_insert;
+DROP TRIGGER IF EXISTS availability_bump_version_update;
+DROP TRIGGER IF EXISTS availability_bump_version_delete;
+DROP TRIGGER IF EXISTS time_off_bump_version_insert;
+DROP TRIGGER IF EXISTS time_off_bump_version_update;
+DROP TRIGGER IF EXISTS time_off_bump_version_delete;
+DROP TRIGGER IF EXISTS employee_bump_version_insert;
+DROP TRIGGER IF EXISTS employee_bump_version_update;
+DROP TRIGGER IF EXISTS employee_bump_version_delete;
+DROP TRIGGER IF EXISTS role_bump_version_update;
+DROP TRIGGER IF EXISTS role_bump_version_delete;
+DROP TRIGGER IF EXISTS section_bump_version_update;
+DROP TRIGGER IF EXISTS section_bump_version_delete;
+
+-- -----------------------------------------------------
+-- Event: bump table_version for schedule cache scopes
+-- -----------------------------------------------------
+-- Scopes read by GET /schedule: shift, availability, time_off_accepted, employee_roster, role, section.
+-- time_off_accepted only moves when accepted time off changes, employee_roster only when
+-- fields shown on the schedule (active flag, role, name) change.
+-- Each connection bumps its own counter row (slot = CONNECTION_ID()), so concurrent transactions
+-- never wait on or deadlock over a shared counter; readers SUM the slots and the notification
+-- worker folds rows of closed connections into slot 0 (data_version.compact).
+DELIMITER $$
+CREATE TRIGGER shift_bump_version_insert
+AFTER INSERT ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER shift_bump_version_update
+AFTER UPDATE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER shift_bump_version_delete
+AFTER DELETE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_insert
+AFTER INSERT ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_update
+AFTER UPDATE ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_delete
+AFTER DELETE ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_version_insert
+AFTER INSERT ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'Accepted' THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', CONNECTION_ID(), 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER time_off_bump_version_update
+AFTER UPDATE ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF (NEW.status != OLD.status
+        OR (NEW.status = 'Accepted' AND (NEW.start_date != OLD.start_date OR NEW.end_date != OLD.end_date OR NEW.employee_id != OLD.employee_id))) THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', CONNECTION_ID(), 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER time_off_bump_version_delete
+AFTER DELETE ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF OLD.status = 'Accepted' THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', CONNECTION_ID(), 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER employee_bump_version_insert
+AFTER INSERT ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_version_update
+AFTER UPDATE ON employee
+FOR EACH ROW
+BEGIN
+    IF (NEW.is_active != OLD.is_active
+        OR NEW.primary_role != OLD.primary_role
+        OR NEW.first_name != OLD.first_name
+        OR NEW.last_name != OLD.last_name) THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', CONNECTION_ID(), 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER employee_bump_version_delete
+AFTER DELETE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER role_bump_version_update
+AFTER UPDATE ON role
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('role', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER role_bump_version_delete
+AFTER DELETE ON role
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('role', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER section_bump_version_update
+AFTER UPDATE ON section
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('section', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER section_bump_version_delete
+AFTER DELETE ON section
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('section', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
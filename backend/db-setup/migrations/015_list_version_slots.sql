@@ -0,0 +1,182 @@
+-- -----------------------------------------------------
+-- Migration 015: per-connection slots for list ETag versions
+-- -----------------------------------------------------
+-- Moves the list endpoint version triggers (employee, time_off_request, task, announcement,
+-- shift_cover_request, recurring_task) onto slot = CONNECTION_ID(), as migration 014 did for the
+-- /schedule scopes, so batch writers such as approve_scr, archive and the task materializer no longer
+-- take shared counter locks in row order. Run after 014 (which widens slot and folds existing counts).
+--
+--   mysql -u root -p thebrownbottle < migrations/015_list_version_slots.sql
+
+USE thebrownbottle;
+
+DROP TRIGGER IF EXISTS employee_bump_list_version_insert;
+DROP TRIGGER IF EXISTS employee_bump_list_version_update;
+DROP TRIGGER IF EXISTS employee_bump_list_version_delete;
+DROP TRIGGER IF EXISTS time_off_bump_list_version_insert;
+DROP TRIGGER IF EXISTS time_off_bump_list_version_update;
+DROP TRIGGER IF EXISTS time_off_bump_list_version_delete;
+DROP TRIGGER IF EXISTS task_bump_version_insert;
+DROP TRIGGER IF EXISTS task_bump_version_update;
+DROP TRIGGER IF EXISTS task_bump_version_delete;
+DROP TRIGGER IF EXISTS announcement_bump_version_insert;
+DROP TRIGGER IF EXISTS announcement_bump_version_update;
+DROP TRIGGER IF EXISTS announcement_bump_version_delete;
+DROP TRIGGER IF EXISTS scr_bump_version_insert;
+DROP TRIGGER IF EXISTS scr_bump_version_update;
+DROP TRIGGER IF EXISTS scr_bump_version_delete;
+DROP TRIGGER IF EXISTS recurring_task_bump_version_insert;
+DROP TRIGGER IF EXISTS recurring_task_bump_version_update;
+DROP TRIGGER IF EXISTS recurring_task_bump_version_delete;
+
+-- -----------------------------------------------------
+-- Event: bump table_version for list endpoint ETags
+-- -----------------------------------------------------
+-- Every write to these tables moves its scope, unlike the narrower schedule scopes above.
+-- FK cascades do not fire triggers, but each cascade starts from a parent write that
+-- already bumps a scope the affected endpoint depends on.
+DELIMITER $$
+CREATE TRIGGER employee_bump_list_version_insert
+AFTER INSERT ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_list_version_update
+AFTER UPDATE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_list_version_delete
+AFTER DELETE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_insert
+AFTER INSERT ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_update
+AFTER UPDATE ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_delete
+AFTER DELETE ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_insert
+AFTER INSERT ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_update
+AFTER UPDATE ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_delete
+AFTER DELETE ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_insert
+AFTER INSERT ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_update
+AFTER UPDATE ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_delete
+AFTER DELETE ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_insert
+AFTER INSERT ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_update
+AFTER UPDATE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_delete
+AFTER DELETE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER recurring_task_bump_version_insert
+AFTER INSERT ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER recurring_task_bump_version_update
+AFTER UPDATE ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER recurring_task_bump_version_delete
+AFTER DELETE ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
@@ -0,0 +1,15 @@
+-- -----------------------------------------------------
+-- Migration 016: receipt poll cursor on push_ticket
+-- -----------------------------------------------------
+-- poll_receipts always took the oldest pending tickets first, so under a backlog tickets whose receipts
+-- stayed pending were re-polled every cycle and newer tickets could age past Expo's receipt window
+-- unpolled. polled_at sends a not-ready ticket to the back of the queue; the index serves the new order.
+--
+--   mysql -u root -p thebrownbottle < migrations/016_push_ticket_polled_at.sql
+
+USE thebrownbottle;
+
+ALTER TABLE `push_ticket`
+  ADD COLUMN `polled_at` DATETIME NULL DEFAULT NULL AFTER `checked_at`,
+  DROP INDEX `push_ticket_poll_idx`,
+  ADD INDEX `push_ticket_poll_idx` (`status`, `polled_at`, `created_at`);
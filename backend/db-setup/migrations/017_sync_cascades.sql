@@ -0,0 +1,72 @@
+-- -----------------------------------------------------
+-- Migration 017: /sync coverage for FK cascades
+-- -----------------------------------------------------
+-- FK cascades fire no triggers and do not move updated_at, so rows they change vanish from or go stale
+-- in GET /sync. Deleting a recurring task now detaches its tasks with a normal UPDATE first (their
+-- updated_at moves, so /sync resends them), and a primary key change on employee, section, role, shift
+-- or recurring_task (ON UPDATE CASCADE) records a '*' reset tombstone, as deletes of the first three do.
+--
+--   mysql -u root -p thebrownbottle < migrations/017_sync_cascades.sql
+
+USE thebrownbottle;
+
+DROP TRIGGER IF EXISTS recurring_task_sync_detach_tasks;
+DROP TRIGGER IF EXISTS employee_sync_reset_key_update;
+DROP TRIGGER IF EXISTS section_sync_reset_key_update;
+DROP TRIGGER IF EXISTS role_sync_reset_key_update;
+DROP TRIGGER IF EXISTS shift_sync_reset_key_update;
+DROP TRIGGER IF EXISTS recurring_task_sync_reset_key_update;
+
+DELIMITER $$
+CREATE TRIGGER recurring_task_sync_detach_tasks
+BEFORE DELETE ON recurring_task
+FOR EACH ROW
+BEGIN
+    UPDATE task SET recurring_task_id = NULL WHERE recurring_task_id = OLD.recurring_task_id;
+END$$
+
+CREATE TRIGGER employee_sync_reset_key_update
+AFTER UPDATE ON employee
+FOR EACH ROW
+BEGIN
+    IF NEW.employee_id <> OLD.employee_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.employee_id);
+    END IF;
+END$$
+
+CREATE TRIGGER section_sync_reset_key_update
+AFTER UPDATE ON section
+FOR EACH ROW
+BEGIN
+    IF NEW.section_id <> OLD.section_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.section_id);
+    END IF;
+END$$
+
+CREATE TRIGGER role_sync_reset_key_update
+AFTER UPDATE ON role
+FOR EACH ROW
+BEGIN
+    IF NEW.role_id <> OLD.role_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.role_id);
+    END IF;
+END$$
+
+CREATE TRIGGER shift_sync_reset_key_update
+AFTER UPDATE ON shift
+FOR EACH ROW
+BEGIN
+    IF NEW.shift_id <> OLD.shift_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.shift_id);
+    END IF;
+END$$
+
+CREATE TRIGGER recurring_task_sync_reset_key_update
+AFTER UPDATE ON recurring_task
+FOR EACH ROW
+BEGIN
+    IF NEW.recurring_task_id <> OLD.recurring_task_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.recurring_task_id);
+    END IF;
+END$$
+DELIMITER ;
@@ -114,11 +114,18 @@ CREATE TABLE IF NOT EXISTS `thebrownbottle`.`recurring_task` (
   `fri` TINYINT(1) NOT NULL,
   `sat` TINYINT(1) NOT NULL,
   `sun` TINYINT(1) NOT NULL,
+  -- Same days as one bitmask in DAYOFWEEK() order (Sunday = 1, Monday = 2, ... Saturday = 64), kept in sync by MySQL
+  `weekday_mask` TINYINT UNSIGNED AS (
+    (`sun` <> 0) * 1 + (`mon` <> 0) * 2 + (`tue` <> 0) * 4 + (`wed` <> 0) * 8 +
+    (`thu` <> 0) * 16 + (`fri` <> 0) * 32 + (`sat` <> 0) * 64
+  ) STORED,
   `start_date` DATE NOT NULL,  -- The start date for the task
   `end_date` DATE NULL,  -- Optional: the end date for recurring tasks
   `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`recurring_task_id`),
   INDEX `fk_recurring_task_author_idx` (`author_id`), -- Indexes improves query performance
+  INDEX `recurring_task_weekday_idx` (`weekday_mask`), -- Weekday filters (IN list of matching masks)
+  INDEX `recurring_task_section_weekday_idx` (`section_id`, `weekday_mask`), -- Section + weekday filters
   CONSTRAINT `fk_recurring_task_author`
     FOREIGN KEY (`author_id`)
     REFERENCES `thebrownbottle`.`employee` (`employee_id`)
@@ -150,10 +157,14 @@ CREATE TABLE IF NOT EXISTS `thebrownbottle`.`task` (
   `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- creation time
   `last_modified_at` TIMESTAMP NULL DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP, -- last updated time
   `last_modified_by` INT UNSIGNED DEFAULT NULL,  -- Tracks the employee who last modified the task
+  `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Last insert/update, read by GET /sync
   PRIMARY KEY (`task_id`),
   INDEX `fk_task_author_idx` (`author_id`),
-  INDEX `fk_task_recurring_task_idx` (`recurring_task_id`),
+  UNIQUE INDEX `task_recurring_due_date_unique` (`recurring_task_id`, `due_date`), -- One row per template per day (materializer de-duplication)
   INDEX `fk_task_last_modified_by_idx` (`last_modified_by`),
+  INDEX `task_timestamp_idx` (`timestamp`), -- Keyset pagination (InnoDB appends task_id)
+  INDEX `task_due_date_complete_idx` (`due_date`, `complete`, `timestamp`), -- today/past/future lists by completion, newest first
+  INDEX `task_updated_at_idx` (`updated_at`), -- /sync change feed (InnoDB appends task_id)
   CONSTRAINT `fk_task_author`
     FOREIGN KEY (`author_id`)
     REFERENCES `thebrownbottle`.`employee` (`employee_id`)
@@ -189,8 +200,12 @@ CREATE TABLE IF NOT EXISTS `thebrownbottle`.`announcement` (
   `description` TEXT NOT NULL,
   `role_id` INT UNSIGNED NOT NULL,
   `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Last insert/update, read by GET /sync
   PRIMARY KEY (`announcement_id`),
   UNIQUE INDEX `announcement_id_UNIQUE` (`announcement_id` ASC) VISIBLE,
+  INDEX `announcement_timestamp_idx` (`timestamp`), -- Keyset pagination (InnoDB appends announcement_id)
+  INDEX `announcement_role_timestamp_idx` (`role_id`, `timestamp`), -- Per-role feed, newest first
+  INDEX `announcement_updated_at_idx` (`updated_at`), -- /sync change feed (InnoDB appends announcement_id)
   CONSTRAINT `fk_author`
     FOREIGN KEY (`author_id`)
     REFERENCES `thebrownbottle`.`employee` (`employee_id`)
@@ -231,9 +246,13 @@ CREATE TABLE IF NOT EXISTS `thebrownbottle`.`shift` (
   `date` DATE NULL DEFAULT NULL,
   `section_id` INT UNSIGNED NOT NULL,
   `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `version` INT UNSIGNED NOT NULL DEFAULT 1, -- Optimistic concurrency: bumped on every update
+  `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Last insert/update, read by GET /sync
   PRIMARY KEY (`shift_id`),
   UNIQUE INDEX employee_date_idx (employee_id, date),
   INDEX `section_id_idx` (`section_id`),
+  INDEX `shift_date_section_idx` (`date`, `section_id`), -- Schedule / date-range lookups filtered by section
+  INDEX `shift_updated_at_idx` (`updated_at`), -- /sync change feed (InnoDB appends shift_id)
   CONSTRAINT `sch_employee_id`
     FOREIGN KEY (`employee_id`)
     REFERENCES `thebrownbottle`.`employee` (`employee_id`)
@@ -258,8 +277,18 @@ CREATE TABLE IF NOT EXISTS `thebrownbottle`.`shift_cover_request` (
   `requested_employee_id` INT UNSIGNED NOT NULL,
   `status` ENUM('Pending', 'Awaiting Approval', 'Accepted', 'Denied') NOT NULL DEFAULT 'Pending',
   `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `version` INT UNSIGNED NOT NULL DEFAULT 1, -- Optimistic concurrency: bumped on every update
+  `is_open` TINYINT(1) NULL DEFAULT 1, -- 1 while Pending/Awaiting Approval, NULL once resolved (maintained by triggers)
+  `shift_date` DATE NOT NULL DEFAULT '1000-01-01', -- Copy of shift.date for date-sorted pages ('1000-01-01' = undated; maintained by triggers)
+  `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Last insert/update, read by GET /sync
   PRIMARY KEY (`cover_request_id`),
   INDEX `fk_shift_cover_request_shift1_idx` (`shift_id` ASC),
+  UNIQUE INDEX `scr_one_open_per_requester` (`shift_id`, `requested_employee_id`, `is_open`),
+  INDEX `scr_timestamp_idx` (`timestamp`), -- Keyset pagination (InnoDB appends cover_request_id)
+  INDEX `scr_status_timestamp_idx` (`status`, `timestamp`), -- Status-filtered lists ordered by timestamp
+  INDEX `scr_shift_date_idx` (`shift_date`), -- Date-sorted keyset pages (InnoDB appends cover_request_id)
+  INDEX `scr_status_shift_date_idx` (`status`, `shift_date`), -- Status-filtered lists ordered by shift date
+  INDEX `scr_updated_at_idx` (`updated_at`), -- /sync change feed (InnoDB appends cover_request_id)
   CONSTRAINT `fk_cover_shift`
     FOREIGN KEY (`shift_id`)
     REFERENCES `thebrownbottle`.`shift` (`shift_id`)
@@ -291,7 +320,13 @@ CREATE TABLE IF NOT EXISTS `thebrownbottle`.`time_off_request` (
   `reason` TEXT NOT NULL,
   `status` ENUM('Pending', 'Accepted', 'Denied') NOT NULL DEFAULT 'Pending',
   `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), -- Last insert/update, read by GET /sync
   PRIMARY KEY (`request_id`),
+  INDEX `tor_start_date_idx` (`start_date`), -- Keyset pagination (InnoDB appends request_id)
+  INDEX `tor_timestamp_idx` (`timestamp`),
+  INDEX `tor_employee_status_dates_idx` (`employee_id`, `status`, `start_date`, `end_date`), -- An employee's requests by status/date
+  INDEX `tor_status_start_date_idx` (`status`, `start_date`), -- Manager views by status, ordered by start_date
+  INDEX `tor_updated_at_idx` (`updated_at`), -- /sync change feed (InnoDB appends request_id)
   CONSTRAINT `fk_employee_id`
     FOREIGN KEY (`employee_id`)
     REFERENCES `thebrownbottle`.`employee` (`employee_id`)
@@ -325,6 +360,149 @@ DEFAULT CHARACTER SET = utf8mb3;
 
 
 
+
+-- -----------------------------------------------------
+-- Table `thebrownbottle`.`table_version`
+-- -----------------------------------------------------
+-- Change counters bumped by triggers (see triggers.sql) whenever data behind a cached
+-- API response changes. Each connection bumps its own slot (its CONNECTION_ID()), so
+-- concurrent writers never share a counter row; readers SUM the slots. Slot 0 holds the
+-- folded counts of closed connections (see api/data_version.py compact()).
+CREATE TABLE IF NOT EXISTS `thebrownbottle`.`table_version` (
+  `table_name` VARCHAR(64) NOT NULL, -- Cache scope, usually a table name
+  `slot` BIGINT UNSIGNED NOT NULL, -- CONNECTION_ID() of the writer, 0 = folded
+  `version` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  PRIMARY KEY (`table_name`, `slot`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
+-- -----------------------------------------------------
+-- Table `thebrownbottle`.`notification_outbox`
+-- -----------------------------------------------------
+-- Push notification events queued by API write handlers in the same transaction as
+-- their data change and delivered afterwards by the notification worker (api/worker.py).
+CREATE TABLE IF NOT EXISTS `thebrownbottle`.`notification_outbox` (
+  `outbox_id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  `event` VARCHAR(64) NOT NULL, -- NotificationEvent value, e.g. 'shift.created'
+  `payload` JSON NOT NULL,
+  `status` ENUM('pending', 'processing', 'sent', 'failed') NOT NULL DEFAULT 'pending',
+  `attempts` SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  `available_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, -- Not picked up before this time (retry backoff)
+  `locked_at` DATETIME NULL DEFAULT NULL, -- When a worker claimed the row
+  `delivered_at` DATETIME NULL DEFAULT NULL,
+  `messages` INT UNSIGNED NULL DEFAULT NULL, -- Device messages produced on delivery
+  `last_error` VARCHAR(1000) NULL DEFAULT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`outbox_id`),
+  INDEX `outbox_claim_idx` (`status`, `available_at`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
+-- -----------------------------------------------------
+-- Table `thebrownbottle`.`push_ticket`
+-- -----------------------------------------------------
+-- Expo push tickets awaiting their delivery receipt (see api/notifications/receipts.py).
+-- Rows with an ok receipt are deleted; error rows are kept briefly for diagnostics.
+CREATE TABLE IF NOT EXISTS `thebrownbottle`.`push_ticket` (
+  `ticket_id` VARCHAR(64) NOT NULL, -- Expo ticket id
+  `expo_push_token` VARCHAR(255) NOT NULL,
+  `outbox_id` BIGINT UNSIGNED NULL DEFAULT NULL, -- notification_outbox event that produced the message
+  `status` ENUM('pending', 'error') NOT NULL DEFAULT 'pending',
+  `error` VARCHAR(64) NULL DEFAULT NULL, -- Expo receipt error code, e.g. 'DeviceNotRegistered'
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `checked_at` DATETIME NULL DEFAULT NULL,
+  `polled_at` DATETIME NULL DEFAULT NULL, -- Last receipt request that came back not ready (NULL = never polled)
+  PRIMARY KEY (`ticket_id`),
+  INDEX `push_ticket_poll_idx` (`status`, `polled_at`, `created_at`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
+-- -----------------------------------------------------
+-- Table `thebrownbottle`.`task_archive`
+-- -----------------------------------------------------
+-- Completed tasks moved out of `task` once they are older than the archive horizon (see api/archive.py).
+-- Same columns as `task`; read only by GET /task?include_history=1.
+CREATE TABLE IF NOT EXISTS `thebrownbottle`.`task_archive` (
+  `task_id` INT UNSIGNED NOT NULL,
+  `type` VARCHAR(20) NOT NULL DEFAULT 'normal',
+  `title` VARCHAR(500) NOT NULL,
+  `description` TEXT NOT NULL,
+  `author_id` INT UNSIGNED NOT NULL,
+  `section_id` INT UNSIGNED NOT NULL,
+  `due_date` DATE NOT NULL,
+  `complete` TINYINT(1) NOT NULL DEFAULT 0,
+  `recurring_task_id` INT UNSIGNED DEFAULT NULL, -- No foreign key: the template may be deleted later
+  `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `last_modified_at` TIMESTAMP NULL DEFAULT NULL,
+  `last_modified_by` INT UNSIGNED DEFAULT NULL,
+  `archived_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`task_id`),
+  INDEX `task_archive_due_date_idx` (`due_date`),
+  INDEX `task_archive_author_idx` (`author_id`),
+  INDEX `task_archive_section_idx` (`section_id`),
+  CONSTRAINT `fk_task_archive_author`
+    FOREIGN KEY (`author_id`)
+    REFERENCES `thebrownbottle`.`employee` (`employee_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  CONSTRAINT `fk_task_archive_section`
+    FOREIGN KEY (`section_id`)
+    REFERENCES `thebrownbottle`.`section` (`section_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
+
+-- -----------------------------------------------------
+-- Table `thebrownbottle`.`shift_archive`
+-- -----------------------------------------------------
+-- Past shifts moved out of `shift` once they are older than the archive horizon (see api/archive.py).
+-- Same columns as `shift`; read only by GET /shift?include_history=1.
+CREATE TABLE IF NOT EXISTS `thebrownbottle`.`shift_archive` (
+  `shift_id` INT UNSIGNED NOT NULL,
+  `employee_id` INT UNSIGNED NOT NULL,
+  `start_time` TIME NULL DEFAULT NULL,
+  `date` DATE NULL DEFAULT NULL,
+  `section_id` INT UNSIGNED NOT NULL,
+  `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `version` INT UNSIGNED NOT NULL DEFAULT 1,
+  `archived_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`shift_id`),
+  INDEX `shift_archive_employee_date_idx` (`employee_id`, `date`),
+  INDEX `shift_archive_date_section_idx` (`date`, `section_id`),
+  CONSTRAINT `fk_shift_archive_employee`
+    FOREIGN KEY (`employee_id`)
+    REFERENCES `thebrownbottle`.`employee` (`employee_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  CONSTRAINT `fk_shift_archive_section`
+    FOREIGN KEY (`section_id`)
+    REFERENCES `thebrownbottle`.`section` (`section_id`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
+
+-- -----------------------------------------------------
+-- Table `thebrownbottle`.`sync_tombstone`
+-- -----------------------------------------------------
+-- One row per deleted shift / task / announcement / cover request / time off request, written by the
+-- AFTER DELETE triggers in triggers.sql so GET /sync can tell clients what to drop. entity '*' marks a
+-- deleted employee, section or role, whose cascades remove rows without firing their triggers; clients
+-- past one start over. Purged after SYNC_TOMBSTONE_DAYS by worker.py.
+CREATE TABLE IF NOT EXISTS `thebrownbottle`.`sync_tombstone` (
+  `tombstone_id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  `entity` VARCHAR(32) NOT NULL, -- Table name, or '*'
+  `entity_id` INT UNSIGNED NOT NULL,
+  `deleted_at` TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (`tombstone_id`),
+  INDEX `sync_tombstone_entity_idx` (`entity`, `tombstone_id`), -- Per-entity deletes after a watermark
+  INDEX `sync_tombstone_deleted_at_idx` (`deleted_at`)) -- Retention purge
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb3;
+
 SET SQL_MODE=@OLD_SQL_MODE;
 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
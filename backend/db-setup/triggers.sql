@@ -114,4 +114,494 @@ BEGIN
         END IF;
     END IF;
 END$$
-DELIMITER ;
\ No newline at end of file
+DELIMITER ;
+
+-- -----------------------------------------------------
+-- Event: shift cover request open flag insert + update
+-- -----------------------------------------------------
+-- is_open backs the unique key that allows only one open request per (shift, requester).
+-- Resolved requests store NULL so any number of them can coexist.
+DELIMITER $$
+CREATE TRIGGER scr_set_open_flag_insert
+BEFORE INSERT ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    SET NEW.is_open = IF(NEW.status IN ('Pending', 'Awaiting Approval'), 1, NULL);
+END$$
+
+CREATE TRIGGER scr_set_open_flag_update
+BEFORE UPDATE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    SET NEW.is_open = IF(NEW.status IN ('Pending', 'Awaiting Approval'), 1, NULL);
+END$$
+DELIMITER ;
+
+
+-- -----------------------------------------------------
+-- Event: shift cover request shift date insert + update
+-- -----------------------------------------------------
+-- shift_date copies the shift's date onto the request so GET /scr can page by date on its own index.
+-- Undated shifts store '1000-01-01', which sorts where NULL did.
+DELIMITER $$
+CREATE TRIGGER scr_set_shift_date_insert
+BEFORE INSERT ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    SET NEW.shift_date = (SELECT IFNULL(date, '1000-01-01') FROM shift WHERE shift_id = NEW.shift_id);
+END$$
+
+CREATE TRIGGER scr_set_shift_date_update
+BEFORE UPDATE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    IF NEW.shift_id <> OLD.shift_id THEN
+        SET NEW.shift_date = (SELECT IFNULL(date, '1000-01-01') FROM shift WHERE shift_id = NEW.shift_id);
+    END IF;
+END$$
+
+CREATE TRIGGER shift_update_scr_shift_date
+AFTER UPDATE ON shift
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.date <=> OLD.date) THEN
+        UPDATE shift_cover_request SET shift_date = IFNULL(NEW.date, '1000-01-01') WHERE shift_id = NEW.shift_id;
+    END IF;
+END$$
+DELIMITER ;
+
+
+-- -----------------------------------------------------
+-- Event: bump table_version for schedule cache scopes
+-- -----------------------------------------------------
+-- Scopes read by GET /schedule: shift, availability, time_off_accepted, employee_roster, role, section.
+-- time_off_accepted only moves when accepted time off changes, employee_roster only when
+-- fields shown on the schedule (active flag, role, name) change.
+-- Each connection bumps its own counter row (slot = CONNECTION_ID()), so concurrent transactions
+-- never wait on or deadlock over a shared counter; readers SUM the slots and the notification
+-- worker folds rows of closed connections into slot 0 (data_version.compact).
+DELIMITER $$
+CREATE TRIGGER shift_bump_version_insert
+AFTER INSERT ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER shift_bump_version_update
+AFTER UPDATE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER shift_bump_version_delete
+AFTER DELETE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_insert
+AFTER INSERT ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_update
+AFTER UPDATE ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER availability_bump_version_delete
+AFTER DELETE ON availability
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('availability', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_version_insert
+AFTER INSERT ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'Accepted' THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', CONNECTION_ID(), 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER time_off_bump_version_update
+AFTER UPDATE ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF (NEW.status != OLD.status
+        OR (NEW.status = 'Accepted' AND (NEW.start_date != OLD.start_date OR NEW.end_date != OLD.end_date OR NEW.employee_id != OLD.employee_id))) THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', CONNECTION_ID(), 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER time_off_bump_version_delete
+AFTER DELETE ON time_off_request
+FOR EACH ROW
+BEGIN
+    IF OLD.status = 'Accepted' THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_accepted', CONNECTION_ID(), 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER employee_bump_version_insert
+AFTER INSERT ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_version_update
+AFTER UPDATE ON employee
+FOR EACH ROW
+BEGIN
+    IF (NEW.is_active != OLD.is_active
+        OR NEW.primary_role != OLD.primary_role
+        OR NEW.first_name != OLD.first_name
+        OR NEW.last_name != OLD.last_name) THEN
+        INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', CONNECTION_ID(), 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER employee_bump_version_delete
+AFTER DELETE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee_roster', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER role_bump_version_update
+AFTER UPDATE ON role
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('role', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER role_bump_version_delete
+AFTER DELETE ON role
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('role', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER section_bump_version_update
+AFTER UPDATE ON section
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('section', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER section_bump_version_delete
+AFTER DELETE ON section
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('section', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
+
+
+-- -----------------------------------------------------
+-- Event: bump table_version for list endpoint ETags
+-- -----------------------------------------------------
+-- Every write to these tables moves its scope, unlike the narrower schedule scopes above.
+-- FK cascades do not fire triggers, but each cascade starts from a parent write that
+-- already bumps a scope the affected endpoint depends on.
+DELIMITER $$
+CREATE TRIGGER employee_bump_list_version_insert
+AFTER INSERT ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_list_version_update
+AFTER UPDATE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER employee_bump_list_version_delete
+AFTER DELETE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('employee', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_insert
+AFTER INSERT ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_update
+AFTER UPDATE ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER time_off_bump_list_version_delete
+AFTER DELETE ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('time_off_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_insert
+AFTER INSERT ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_update
+AFTER UPDATE ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER task_bump_version_delete
+AFTER DELETE ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_insert
+AFTER INSERT ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_update
+AFTER UPDATE ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER announcement_bump_version_delete
+AFTER DELETE ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('announcement', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_insert
+AFTER INSERT ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_update
+AFTER UPDATE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER scr_bump_version_delete
+AFTER DELETE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('shift_cover_request', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER recurring_task_bump_version_insert
+AFTER INSERT ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER recurring_task_bump_version_update
+AFTER UPDATE ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+
+CREATE TRIGGER recurring_task_bump_version_delete
+AFTER DELETE ON recurring_task
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_version (table_name, slot, version) VALUES ('recurring_task', CONNECTION_ID(), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
+
+
+-- -----------------------------------------------------
+-- Event: record deletes for GET /sync
+-- -----------------------------------------------------
+-- Each delete leaves a sync_tombstone row so clients syncing incrementally can drop it. FK cascades do
+-- not fire triggers or move updated_at, so every cascade into a synced table is handled on its parent:
+--   shift delete            its cover requests are recorded before the shift goes
+--   recurring_task delete   its tasks are detached by a normal UPDATE first (updated_at moves, /sync
+--                           resends them) so the FK's SET NULL has nothing left to change
+--   employee, section or role delete, or a primary key change on those, shift or recurring_task
+--                           (ON UPDATE CASCADE) records '*', which makes clients past it start over
+-- Availability and push tokens are not synced, so their cascades need nothing.
+DELIMITER $$
+CREATE TRIGGER shift_sync_tombstone_delete
+AFTER DELETE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('shift', OLD.shift_id);
+END$$
+
+-- BEFORE: the cover requests are still there to be read when the cascade is about to remove them
+CREATE TRIGGER shift_sync_tombstone_cascade
+BEFORE DELETE ON shift
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id)
+    SELECT 'shift_cover_request', cover_request_id FROM shift_cover_request WHERE shift_id = OLD.shift_id;
+END$$
+
+CREATE TRIGGER task_sync_tombstone_delete
+AFTER DELETE ON task
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('task', OLD.task_id);
+END$$
+
+CREATE TRIGGER announcement_sync_tombstone_delete
+AFTER DELETE ON announcement
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('announcement', OLD.announcement_id);
+END$$
+
+CREATE TRIGGER scr_sync_tombstone_delete
+AFTER DELETE ON shift_cover_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('shift_cover_request', OLD.cover_request_id);
+END$$
+
+CREATE TRIGGER time_off_sync_tombstone_delete
+AFTER DELETE ON time_off_request
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('time_off_request', OLD.request_id);
+END$$
+
+CREATE TRIGGER employee_sync_tombstone_delete
+AFTER DELETE ON employee
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.employee_id);
+END$$
+
+CREATE TRIGGER section_sync_tombstone_delete
+AFTER DELETE ON section
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.section_id);
+END$$
+
+CREATE TRIGGER role_sync_tombstone_delete
+AFTER DELETE ON role
+FOR EACH ROW
+BEGIN
+    INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.role_id);
+END$$
+
+CREATE TRIGGER recurring_task_sync_detach_tasks
+BEFORE DELETE ON recurring_task
+FOR EACH ROW
+BEGIN
+    UPDATE task SET recurring_task_id = NULL WHERE recurring_task_id = OLD.recurring_task_id;
+END$$
+
+CREATE TRIGGER employee_sync_reset_key_update
+AFTER UPDATE ON employee
+FOR EACH ROW
+BEGIN
+    IF NEW.employee_id <> OLD.employee_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.employee_id);
+    END IF;
+END$$
+
+CREATE TRIGGER section_sync_reset_key_update
+AFTER UPDATE ON section
+FOR EACH ROW
+BEGIN
+    IF NEW.section_id <> OLD.section_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.section_id);
+    END IF;
+END$$
+
+CREATE TRIGGER role_sync_reset_key_update
+AFTER UPDATE ON role
+FOR EACH ROW
+BEGIN
+    IF NEW.role_id <> OLD.role_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.role_id);
+    END IF;
+END$$
+
+CREATE TRIGGER shift_sync_reset_key_update
+AFTER UPDATE ON shift
+FOR EACH ROW
+BEGIN
+    IF NEW.shift_id <> OLD.shift_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.shift_id);
+    END IF;
+END$$
+
+CREATE TRIGGER recurring_task_sync_reset_key_update
+AFTER UPDATE ON recurring_task
+FOR EACH ROW
+BEGIN
+    IF NEW.recurring_task_id <> OLD.recurring_task_id THEN
+        INSERT INTO sync_tombstone (entity, entity_id) VALUES ('*', OLD.recurring_task_id);
+    END IF;
+END$$
+DELIMITER ;
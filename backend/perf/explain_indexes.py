@@ -0,0 +1,129 @@
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from flask import Flask, request  # noqa: E402
+
+import db_pool  # noqa: E402
+import announcement  # noqa: E402
+import recurring_task  # noqa: E402
+import schedule  # noqa: E402
+import shift  # noqa: E402
+import shift_cover_request  # noqa: E402
+import task  # noqa: E402
+import time_off_request  # noqa: E402
+
+# EXPLAIN Index Check -----------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Runs each GET handler for its hot filter shape against a real database, captures the SELECT it builds
+# through db_pool's cursor hook, and EXPLAINs it. A case fails when the handler's main table is read with
+# a full scan (type ALL) or through none of the indexes meant for that shape.
+#
+#   DB_HOST=... DB_USER=... DB_PASSWORD=... DB_NAME=thebrownbottle python explain_indexes.py
+#
+# The optimizer prefers a scan on nearly empty tables, so run it against realistic data (seed.py) after
+# ANALYZE TABLE. Exits non-zero on any failure.
+
+TODAY = date.today()
+WEEK_START = (TODAY - timedelta(days=(TODAY.weekday() + 1) % 7)).isoformat()
+WEEK_END = (TODAY - timedelta(days=(TODAY.weekday() + 1) % 7) + timedelta(days=6)).isoformat()
+
+# (name, handler, query string, table alias in the handler's SELECT, indexes that satisfy the shape)
+CASES = [
+    ("task: today's open tasks", task.get_tasks, "today=1&complete=0",
+     "t", {"task_due_date_complete_idx"}),
+    ("task: overdue", task.get_tasks, "past=1&complete=0",
+     "t", {"task_due_date_complete_idx"}),
+    ("announcement: role feed", announcement.get_announcements, "role_id=1",
+     "a", {"announcement_role_timestamp_idx"}),
+    ("scr: open requests", shift_cover_request.get_scr,
+     "status=Pending&status=Awaiting%20Approval&timestamp_sort=Newest",
+     "scr", {"scr_status_timestamp_idx", "scr_timestamp_idx"}),
+    ("tor: employee's pending requests", time_off_request.get_tor, "employee_id=1&status=Pending",
+     "tor", {"tor_employee_status_dates_idx"}),
+    ("tor: pending for managers", time_off_request.get_tor, "status=Pending",
+     "tor", {"tor_status_start_date_idx", "tor_start_date_idx"}),
+    ("shift: week by section", shift.get_shifts, f"start_date={WEEK_START}&end_date={WEEK_END}&section_id=1",
+     "sh", {"shift_date_section_idx"}),
+    ("schedule: week by section", schedule.get_schedule_data,
+     f"start_date={WEEK_START}&end_date={WEEK_END}&section_id=1",
+     "s", {"shift_date_section_idx"}),
+    ("recurring_task: Fridays in a section", recurring_task.get_recurring_tasks, "section_id=1&fri=1",
+     "r", {"recurring_task_section_weekday_idx"}),
+]
+
+
+def capture_selects(handler, query_string, app):
+    """
+    Runs handler for query_string and returns every (statement, params) SELECT it executed.
+    """
+    statements = []
+
+    def hook(statement, params, seconds):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, params))
+
+    db_pool.register_cursor_hook(hook)
+    try:
+        with app.test_request_context(f"/?{query_string}"):
+            handler(db_pool.get_pool().get_connection(), request)
+    finally:
+        db_pool.unregister_cursor_hook(hook)
+    return statements
+
+
+def explain(statement, params):
+    conn = db_pool.get_pool().get_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("EXPLAIN " + statement.strip().rstrip(";"), params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+
+def check_case(app, name, handler, query_string, alias, indexes):
+    """
+    Returns (ok, detail) for one case.
+    """
+    for statement, params in capture_selects(handler, query_string, app):
+        plan = [row for row in explain(statement, params) if row["table"] == alias]
+        if not plan:
+            continue
+
+        row = plan[0]
+        detail = f"type={row['type']} key={row['key']} rows={row['rows']} extra={row['Extra']}"
+        if row["type"] == "ALL" or row["key"] not in indexes:
+            return False, f"{detail} (possible_keys={row['possible_keys']})"
+        return True, detail
+
+    return False, f"no SELECT reading alias '{alias}' was executed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot list queries and check their indexes")
+    parser.add_argument("--case", help="Only run cases whose name contains this text")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    failures = 0
+
+    for name, handler, query_string, alias, indexes in CASES:
+        if args.case and args.case not in name:
+            continue
+        ok, detail = check_case(app, name, handler, query_string, alias, indexes)
+        failures += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {name:36} {detail}")
+
+    db_pool.get_pool().close_idle()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
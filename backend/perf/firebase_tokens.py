@@ -0,0 +1,114 @@
+import argparse
+import os
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt
+from google.auth import jwt as google_jwt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+os.environ.setdefault("FIREBASE_PROJECT_ID", "thebrownbottle-local")
+
+from auth import verify_firebase  # noqa: E402
+
+# Offline Firebase Token Check --------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Mints Firebase-shaped ID tokens with a locally generated RSA key, points auth.verify_firebase at that
+# key instead of Google's endpoint, and checks/benchmarks verification without network access:
+#
+#   python firebase_tokens.py --iterations 5000
+
+
+def generate_key(kid="local-key"):
+    """
+    Returns (signer, {kid: public key PEM}) for a fresh 2048-bit key.
+    """
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return crypt.RSASigner.from_string(private_pem, key_id=kid), {kid: public_pem.decode("ascii")}
+
+
+def mint_token(signer, email, project_id=None, lifetime=3600, **claims):
+    project_id = project_id or os.environ["FIREBASE_PROJECT_ID"]
+    now = int(time.time())
+    payload = {
+        "iss": verify_firebase.ISSUER_PREFIX + project_id,
+        "aud": project_id,
+        "sub": f"uid-{email}",
+        "email": email,
+        "email_verified": True,
+        "iat": now,
+        "auth_time": now,
+        "exp": now + lifetime,
+    }
+    payload.update(claims)
+    return google_jwt.encode(signer, payload).decode("ascii")
+
+
+def install_local_keys(keys, max_age=3600):
+    """
+    Replaces the process-wide key cache with one serving `keys`; also clears verified tokens.
+    """
+    verify_firebase.public_keys.stop()
+    verify_firebase.public_keys = verify_firebase.PublicKeyCache(fetch=lambda: (keys, max_age))
+    verify_firebase.token_cache.clear()
+
+
+def expect_invalid(token, reason):
+    try:
+        verify_firebase.verify_id_token(token)
+    except verify_firebase.InvalidTokenError:
+        return
+    raise AssertionError(f"accepted a token with {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify locally minted Firebase ID tokens")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    signer, keys = generate_key()
+    other_signer, _ = generate_key()
+    install_local_keys(keys)
+
+    token = mint_token(signer, "manager@thebrownbottle.local")
+    claims = verify_firebase.verify_id_token(token)
+    assert claims["email"] == "manager@thebrownbottle.local" and claims["uid"] == claims["sub"]
+
+    expect_invalid(mint_token(signer, "a@b.c", lifetime=-60), "an expired exp")
+    expect_invalid(mint_token(signer, "a@b.c", project_id="other-project"), "a foreign audience")
+    expect_invalid(mint_token(other_signer, "a@b.c"), "a signature from an unpublished key")
+    expect_invalid(token[:-4] + "AAAA", "a tampered signature")
+    expect_invalid(mint_token(signer, "a@b.c", auth_time=int(time.time()) + 3600), "a future auth_time")
+    expect_invalid(mint_token(signer, "a@b.c", auth_time=None), "no auth_time")
+    expect_invalid(mint_token(signer, "a@b.c", iss="https://example.com/other"), "a foreign issuer")
+    print("Verification checks passed")
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        verify_firebase.token_cache.clear()
+        verify_firebase.verify_id_token(token)
+    uncached = (time.perf_counter() - start) / args.iterations
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        verify_firebase.verify_id_token(token)
+    cached = (time.perf_counter() - start) / args.iterations
+
+    print(f"Signature verification: {uncached * 1e6:8.1f} us/token")
+    print(f"Cached lookup:          {cached * 1e6:8.1f} us/token")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import requests
+
+# Synthetic Load Test -----------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Replays a compressed restaurant day against a running API and reports p50/p95/p99 per route plus
+# throughput at each concurrency level:
+#
+#   python stub_expo.py --port 4000 &                       # stand-in for Expo push
+#   python seed.py --reset                                  # synthetic staff, shifts, tasks, ...
+#   EXPO_API_BASE=http://localhost:4000/--/api/v2 gunicorn -c gunicorn.conf.py main:app   (and worker.py)
+#   python loadtest.py --base-url http://localhost:5000 --concurrency 1,8,32,64 --day-seconds 60
+#
+# A "day" runs four phases in order, each with its own request mix (PHASES):
+#   open      staff open the app: schedule/shift polling, today's tasks, announcements
+#   storm     pre-weekend cover storm: employees post cover requests, others race to pick them up
+#   service   task toggles during service while the schedule keeps being polled
+#   close     managers post announcements (fan-out through the outbox worker to the stub Expo)
+#
+# Virtual users keep an ETag per URL like the app does, so unchanged lists come back as 304s.
+# The same --seed gives the same sequence of requests per virtual user.
+
+PHASES = [
+    ("open", 0.30, {
+        "schedule_poll": 5, "next_shift": 3, "tasks_today": 3, "announcements": 2, "cover_list": 1,
+    }),
+    ("storm", 0.20, {
+        "cover_post": 4, "cover_pickup": 4, "cover_list": 4, "schedule_poll": 2, "next_shift": 1,
+    }),
+    ("service", 0.35, {
+        "task_toggle": 5, "tasks_today": 4, "schedule_poll": 2, "cover_list": 1, "time_off_list": 1,
+    }),
+    ("close", 0.15, {
+        "announcement_post": 1, "announcements": 4, "schedule_poll": 2, "tasks_today": 2,
+    }),
+]
+
+THINK_SECONDS = (0.05, 0.25)  # Pause between a virtual user's requests
+
+
+class Fixture:
+    """
+    Ids the scenarios pick from, loaded once through the API itself.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        today = date.today()
+        self.week_start = (today - timedelta(days=(today.weekday() + 1) % 7)).isoformat()
+        self.week_end = (today - timedelta(days=(today.weekday() + 1) % 7) + timedelta(days=6)).isoformat()
+
+        employees = self._get("/employee", is_active=1)
+        self.employee_ids = [e["employee_id"] for e in employees]
+        self.admin_ids = [e["employee_id"] for e in employees if e.get("admin")] or self.employee_ids[:1]
+        self.role_ids = sorted({e["primary_role"] for e in employees})
+        self.section_ids = [s["section_id"] for s in self._get("/section")]
+
+        horizon = (today + timedelta(days=14)).isoformat()
+        shifts = self._get("/shift", start_date=today.isoformat(), end_date=horizon)
+        self.upcoming_shifts = [(s["shift_id"], s["employee_id"]) for s in shifts]
+        self.task_ids = [t["task_id"] for t in self._get("/task", today=1)]
+
+        if not self.employee_ids or not self.upcoming_shifts or not self.task_ids:
+            raise SystemExit("No employees, upcoming shifts or tasks for today - run seed.py first")
+
+        self.open_cover_requests = []
+        self._lock = threading.Lock()
+
+    def _get(self, path, **params):
+        response = requests.get(self.base_url + path, params=params, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def register_push_tokens(self, dead_share=0.05):
+        """
+        Gives every employee a device; a few are "dead" so receipt pruning is exercised too.
+        """
+        rng = random.Random(0)
+        for employee_id in self.employee_ids:
+            kind = "dead" if rng.random() < dead_share else "ok"
+            requests.post(f"{self.base_url}/push-token/register", json={
+                "user_id": employee_id,
+                "expo_push_token": f"ExponentPushToken[perf-{kind}-{employee_id}]",
+            }, timeout=30)
+
+    def add_cover_request(self, cover_request_id):
+        with self._lock:
+            self.open_cover_requests.append(cover_request_id)
+            del self.open_cover_requests[:-500]
+
+    def pick_cover_request(self, rng):
+        with self._lock:
+            return rng.choice(self.open_cover_requests) if self.open_cover_requests else None
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)   # route -> [seconds]
+        self.statuses = defaultdict(lambda: defaultdict(int))  # route -> status -> count
+
+    def record(self, route, seconds, status):
+        with self._lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][status] += 1
+
+    def total(self):
+        return sum(len(v) for v in self.latencies.values())
+
+
+class VirtualUser:
+    def __init__(self, index, fixture, recorder, seed):
+        self.rng = random.Random(seed * 1000 + index)
+        self.fixture = fixture
+        self.recorder = recorder
+        self.session = requests.Session()
+        self.etags = {}
+        self.employee_id = fixture.employee_ids[index % len(fixture.employee_ids)]
+
+    # -----------------------------
+    # HTTP
+    # -----------------------------
+    def request(self, method, route, path, params=None, body=None):
+        url = self.fixture.base_url + path
+        headers = {}
+        cache_key = (path, tuple(sorted((params or {}).items())))
+        if method == "GET" and cache_key in self.etags:
+            headers["If-None-Match"] = self.etags[cache_key]
+
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, params=params, json=body, headers=headers, timeout=30)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, "error"
+        self.recorder.record(f"{method} {route}", time.perf_counter() - started, status)
+
+        if response is not None and method == "GET" and response.headers.get("ETag"):
+            self.etags[cache_key] = response.headers["ETag"]
+        return response
+
+    # -----------------------------
+    # Scenarios
+    # -----------------------------
+    def schedule_poll(self):
+        params = {"start_date": self.fixture.week_start, "end_date": self.fixture.week_end}
+        if self.rng.random() < 0.3:
+            params["section_id"] = self.rng.choice(self.fixture.section_ids)
+        self.request("GET", "/schedule", "/schedule", params)
+
+    def next_shift(self):
+        self.request("GET", "/shift", "/shift", {"employee_id": self.employee_id, "next_shift": 1, "next_count": 3})
+
+    def tasks_today(self):
+        self.request("GET", "/task", "/task", {"today": 1, "section_id": self.rng.choice(self.fixture.section_ids)})
+
+    def task_toggle(self):
+        task_id = self.rng.choice(self.fixture.task_ids)
+        self.request("PATCH", "/task/update/<id>", f"/task/update/{task_id}", body={
+            "complete": self.rng.randint(0, 1), "last_modified_by": self.employee_id,
+        })
+
+    def announcements(self):
+        self.request("GET", "/announcement", "/announcement", {"recent_only": 1})
+
+    def announcement_post(self):
+        self.request("POST", "/announcement/insert", "/announcement/insert", body={
+            "author_id": self.rng.choice(self.fixture.admin_ids),
+            "title": "Load test announcement",
+            "description": "Synthetic announcement from loadtest.py",
+            "role_id": self.rng.choice(self.fixture.role_ids),
+        })
+
+    def cover_list(self):
+        self.request("GET", "/scr", "/scr", {"status": ["Pending", "Awaiting Approval"], "limit": 50})
+
+    def cover_post(self):
+        shift_id, owner_id = self.rng.choice(self.fixture.upcoming_shifts)
+        response = self.request("POST", "/scr/insert", "/scr/insert", body={
+            "requested_employee_id": owner_id, "shift_id": shift_id,
+        })
+        if response is not None and response.status_code == 201:
+            inserted = (response.json() or {}).get("inserted_id")
+            if inserted:
+                self.fixture.add_cover_request(inserted)
+
+    def cover_pickup(self):
+        cover_request_id = self.fixture.pick_cover_request(self.rng)
+        if cover_request_id is None:
+            return self.cover_list()
+        # Several users race for the same request; the losers get 409
+        self.request("PATCH", "/scr/update/<id>", f"/scr/update/{cover_request_id}", body={
+            "status": "Awaiting Approval", "accepted_employee_id": self.employee_id,
+        })
+
+    def time_off_list(self):
+        self.request("GET", "/tor", "/tor", {"status": "Pending", "limit": 50})
+
+    def run(self, phase_schedule, stop_at):
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                return
+            mix = next(mix for ends_at, mix in phase_schedule if now < ends_at)
+            scenario = self.rng.choices(list(mix), weights=list(mix.values()))[0]
+            getattr(self, scenario)()
+            time.sleep(self.rng.uniform(*THINK_SECONDS))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def run_level(fixture, concurrency, day_seconds, seed):
+    """
+    Runs one simulated day with `concurrency` virtual users. Returns the level summary.
+    """
+    recorder = Recorder()
+    started = time.monotonic()
+
+    phase_schedule = []
+    ends_at = started
+    for _, share, mix in PHASES:
+        ends_at += day_seconds * share
+        phase_schedule.append((ends_at, mix))
+    stop_at = ends_at
+
+    users = [VirtualUser(i, fixture, recorder, seed) for i in range(concurrency)]
+    threads = [threading.Thread(target=user.run, args=(phase_schedule, stop_at)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.monotonic() - started
+    routes = {}
+    for route, values in sorted(recorder.latencies.items()):
+        values.sort()
+        routes[route] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "statuses": {str(k): v for k, v in recorder.statuses[route].items()},
+        }
+
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests": recorder.total(),
+        "throughput_rps": round(recorder.total() / elapsed, 2),
+        "routes": routes,
+    }
+
+
+def print_level(summary):
+    print(f"\n== concurrency {summary['concurrency']}: {summary['requests']} requests in {summary['seconds']}s "
+          f"({summary['throughput_rps']} req/s)")
+    print(f"{'route':28} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for route, stats in summary["routes"].items():
+        statuses = " ".join(f"{k}:{v}" for k, v in sorted(stats["statuses"].items()))
+        print(f"{route:28} {stats['count']:>7} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}  {statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a synthetic restaurant day against the API")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated virtual-user counts, run in order")
+    parser.add_argument("--day-seconds", type=float, default=60, help="Wall time of one simulated day per level")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-push-tokens", action="store_true", help="Skip registering a device per employee")
+    parser.add_argument("--json", help="Also write the summaries to this file")
+    args = parser.parse_args()
+
+    fixture = Fixture(args.base_url)
+    if not args.no_push_tokens:
+        fixture.register_push_tokens()
+    print(f"{len(fixture.employee_ids)} employees, {len(fixture.upcoming_shifts)} upcoming shifts, "
+          f"{len(fixture.task_ids)} tasks today")
+
+    summaries = []
+    for level in (int(c) for c in args.concurrency.split(",")):
+        summary = run_level(fixture, level, args.day_seconds, args.seed)
+        print_level(summary)
+        summaries.append(summary)
+
+    print(f"\n{'concurrency':>11} {'req/s':>9}")
+    for summary in summaries:
+        print(f"{summary['concurrency']:>11} {summary['throughput_rps']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
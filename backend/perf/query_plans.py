@@ -0,0 +1,346 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from flask import Flask, request  # noqa: E402
+
+import db_pool  # noqa: E402
+import seed  # noqa: E402
+import announcement  # noqa: E402
+import employee  # noqa: E402
+import schedule  # noqa: E402
+import shift  # noqa: E402
+import shift_cover_request  # noqa: E402
+import task  # noqa: E402
+import time_off_request  # noqa: E402
+
+# Query-Plan Regression Harness -------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Runs every GET list handler over representative parameter combinations against a seeded local MySQL,
+# records wall time and the rows each statement examined (from EXPLAIN ANALYZE), and compares them with
+# baseline.json. Exits non-zero when a case regresses beyond the baseline's tolerances.
+#
+#   python seed.py --reset                  # synthetic volumes (see seed.DEFAULT_VOLUMES)
+#   python query_plans.py                   # check against baseline.json
+#   python query_plans.py --update          # re-record the baseline after an intended change
+#   python query_plans.py --report plans.json   # also dump every EXPLAIN ANALYZE tree
+#
+# Needs MySQL 8.0.18+ (EXPLAIN ANALYZE). Record and check on the same machine and seed volumes; the
+# baseline stores the table sizes it was recorded at and warns when the database differs.
+#
+# A case without a baseline entry fails the check (pass --allow-new while adding a case, then re-record),
+# so an empty or stale baseline.json can never pass silently. The committed baseline.json only carries
+# the tolerances: timings are machine-specific, so record your own before the first local check
+# (seed.py --reset, then --update, on the commit you want to compare against). CI does the same on one
+# runner: .github/workflows/query-plans.yml records the base branch into a temporary baseline and
+# checks the pull request against it.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+DEFAULT_TOLERANCES = {
+    "rows_examined": 0.20,  # Allowed relative growth in rows examined
+    "rows_slack": 100,      # ...ignored below this absolute difference
+    "latency": 0.50,        # Allowed relative growth in median wall time
+    "latency_slack_ms": 2.0,
+}
+
+# handler name -> (handler, [query string templates]); {placeholders} are filled by case_values()
+CASES = {
+    "get_shifts": (shift.get_shifts, [
+        "",
+        "is_today=1",
+        "date={today}",
+        "start_date={week_start}&end_date={week_end}",
+        "start_date={week_start}&end_date={week_end}&section_id={section}",
+        "employee_id={employee}&next_shift=1&next_count=3",
+        "primary_role={role}&start_date={week_start}&end_date={week_end}",
+    ]),
+    "get_scr": (shift_cover_request.get_scr, [
+        "",
+        "status=Pending&status=Awaiting%20Approval",
+        "status=Pending&timestamp_sort=Newest&limit=50",
+        "employee_id={employee}",
+        "requested_primary_role={role}&status=Pending",
+        "date_sort=Newest&limit=50",
+    ]),
+    "get_tor": (time_off_request.get_tor, [
+        "",
+        "status=Pending",
+        "status=Pending&date_sort=Oldest&limit=50",
+        "employee_id={employee}",
+        "employee_id={employee}&status=Accepted",
+        "start_date={week_start}&end_date={week_end}",
+        "primary_role={role}&status=Pending",
+    ]),
+    "get_tasks": (task.get_tasks, [
+        "limit=50",
+        "today=1",
+        "today=1&complete=0",
+        "past=1&complete=0",
+        "future=1",
+        "section_id={section}&today=1",
+        "due_date={today}",
+        "expand_recurring=1&start_date={today}&end_date={week_end}",
+    ]),
+    "get_announcements": (announcement.get_announcements, [
+        "limit=50",
+        "recent_only=1",
+        "role_id={role}",
+        "role_id={role}&limit=20",
+        "author_id={admin}",
+    ]),
+    "get_employees": (employee.get_employees, [
+        "",
+        "is_active=1",
+        "employee_id={employee}",
+        "role_id={role}",
+        "full_name=Perf1",
+        "admin=1",
+    ]),
+    "get_schedule_data": (schedule.get_schedule_data, [
+        "start_date={week_start}&end_date={week_end}",
+        "start_date={week_start}&end_date={week_end}&section_id={section}",
+        "start_date={week_start}&end_date={week_end}&role_id={role}",
+        "is_today=1",
+    ]),
+}
+
+# EXPLAIN ANALYZE nodes that read rows from a table or index
+ACCESS_NODE = re.compile(r"(Table scan|Index scan|Index range scan|Index lookup|Single-row index lookup|"
+                         r"Covering index|Full-text index|Multi-range index)")
+ACTUAL_ROWS = re.compile(r"\(actual time=[\d.]+\.\.[\d.]+ rows=([\d.]+) loops=(\d+)\)")
+
+
+def case_values(conn):
+    """
+    Placeholder values for the query templates, picked from the seeded data.
+    """
+    today = date.today()
+    week_start = today - timedelta(days=(today.weekday() + 1) % 7)
+
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT MIN(employee_id) AS employee,
+               MIN(CASE WHEN admin = 1 THEN employee_id END) AS admin,
+               MIN(primary_role) AS role
+        FROM employee
+        WHERE email LIKE %s
+    """, (f"%@{seed.SEED_EMAIL_DOMAIN}",))
+    row = cursor.fetchone()
+    cursor.execute("SELECT MIN(section_id) AS section FROM section")
+    section = cursor.fetchone()["section"]
+    cursor.close()
+
+    return {
+        "today": today.isoformat(),
+        "week_start": week_start.isoformat(),
+        "week_end": (week_start + timedelta(days=6)).isoformat(),
+        "employee": row["employee"] or 1,
+        "admin": row["admin"] or row["employee"] or 1,
+        "role": row["role"] or 1,
+        "section": section or 1,
+    }
+
+
+def table_counts(conn):
+    cursor = conn.cursor()
+    counts = {}
+    for table in ("employee", "shift", "shift_cover_request", "time_off_request", "task", "announcement"):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    cursor.close()
+    return counts
+
+
+def run_handler(app, handler, query_string):
+    """
+    Runs handler once; returns (seconds, [(statement, params)] of the SELECTs it executed).
+    """
+    statements = []
+
+    def hook(statement, params, seconds):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, params))
+
+    # Measure the queries, not the /schedule result cache
+    schedule.schedule_cache.clear()
+
+    db_pool.register_cursor_hook(hook)
+    try:
+        with app.test_request_context(f"/?{query_string}"):
+            started = time.perf_counter()
+            response = handler(db_pool.get_pool().get_connection(), request)
+            elapsed = time.perf_counter() - started
+    finally:
+        db_pool.unregister_cursor_hook(hook)
+
+    status = response[1] if isinstance(response, tuple) else response.status_code
+    if status >= 400:
+        raise RuntimeError(f"handler returned HTTP {status}")
+    return elapsed, statements
+
+
+def explain_analyze(conn, statement, params):
+    """
+    Returns (plan text, rows examined) for one SELECT.
+    """
+    cursor = conn.cursor()
+    cursor.execute("EXPLAIN ANALYZE " + statement.strip().rstrip(";"), params)
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+    cursor.close()
+
+    examined = 0
+    for line in plan.splitlines():
+        if ACCESS_NODE.search(line):
+            match = ACTUAL_ROWS.search(line)
+            if match:
+                examined += float(match.group(1)) * int(match.group(2))
+    return plan, int(examined)
+
+
+def measure(app, conn, handler, query_string, repeat):
+    run_handler(app, handler, query_string)  # warm-up (buffer pool, pool connections)
+
+    timings = []
+    statements = []
+    for _ in range(repeat):
+        elapsed, statements = run_handler(app, handler, query_string)
+        timings.append(elapsed)
+
+    plans = []
+    rows_examined = 0
+    for statement, params in statements:
+        plan, examined = explain_analyze(conn, statement, params)
+        plans.append({"sql": " ".join(statement.split()), "rows_examined": examined, "plan": plan})
+        rows_examined += examined
+
+    return {
+        "ms": round(statistics.median(timings) * 1000, 3),
+        "rows_examined": rows_examined,
+        "statements": len(statements),
+    }, plans
+
+
+def compare(result, base, tolerances):
+    """
+    Returns the list of regressions of result against its baseline entry.
+    """
+    problems = []
+
+    rows_limit = base["rows_examined"] * (1 + tolerances["rows_examined"])
+    if result["rows_examined"] > rows_limit and \
+            result["rows_examined"] - base["rows_examined"] > tolerances["rows_slack"]:
+        problems.append(f"rows examined {base['rows_examined']} -> {result['rows_examined']}")
+
+    ms_limit = base["ms"] * (1 + tolerances["latency"])
+    if result["ms"] > ms_limit and result["ms"] - base["ms"] > tolerances["latency_slack_ms"]:
+        problems.append(f"latency {base['ms']}ms -> {result['ms']}ms")
+
+    return problems
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {"tolerances": DEFAULT_TOLERANCES, "cases": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-plan regression check for the GET handlers")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="Record the results as the new baseline")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (median is kept)")
+    parser.add_argument("--handler", help="Only run one handler, e.g. get_tasks")
+    parser.add_argument("--report", help="Write every case's EXPLAIN ANALYZE trees to this JSON file")
+    parser.add_argument("--allow-new", action="store_true", help="Do not fail on cases missing from the baseline")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    tolerances = dict(DEFAULT_TOLERANCES, **baseline.get("tolerances", {}))
+
+    app = Flask(__name__)
+    conn = db_pool.get_pool().get_connection()
+    values = case_values(conn)
+    counts = table_counts(conn)
+
+    if not baseline.get("cases") and not args.update:
+        print(f"No baseline recorded in {args.baseline}: on the commit to compare against, run "
+              "seed.py --reset and query_plans.py --update first (CI records one per run, see "
+              ".github/workflows/query-plans.yml)")
+        sys.exit(1)
+
+    if baseline.get("table_counts") and not args.update:
+        for table, count in baseline["table_counts"].items():
+            if abs(counts.get(table, 0) - count) > max(10, count * 0.1):
+                print(f"WARNING: {table} has {counts.get(table, 0)} rows, baseline was recorded with {count}")
+
+    results = {}
+    report = {}
+    failures = 0
+
+    for handler_name, (handler, templates) in CASES.items():
+        if args.handler and args.handler != handler_name:
+            continue
+
+        for template in templates:
+            key = f"{handler_name}?{template}"
+            try:
+                result, plans = measure(app, conn, handler, template.format(**values), args.repeat)
+            except Exception as e:
+                failures += 1
+                print(f"ERROR {key}: {e}")
+                continue
+
+            results[key] = result
+            report[key] = plans
+
+            base = baseline.get("cases", {}).get(key)
+            if args.update:
+                status = "RECORD"
+            elif base is None:
+                status = "NEW"
+                failures += not args.allow_new
+            else:
+                problems = compare(result, base, tolerances)
+                status = "FAIL" if problems else "ok"
+                failures += bool(problems)
+                if problems:
+                    key = f"{key}  ({'; '.join(problems)})"
+
+            print(f"{status:6} {result['ms']:9.2f}ms {result['rows_examined']:>10} rows  {key}")
+
+    conn.close()
+    db_pool.get_pool().close_idle()
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update:
+        if failures:
+            print(f"{failures} case(s) failed to run; baseline not written")
+            sys.exit(1)
+
+        baseline["tolerances"] = tolerances
+        baseline["table_counts"] = counts
+        baseline["cases"] = dict(baseline.get("cases", {}), **results) if args.handler else results
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
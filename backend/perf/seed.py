@@ -0,0 +1,226 @@
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+import db_pool  # noqa: E402
+
+# Synthetic Data Seeder ---------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Fills a local MySQL (schema + triggers + migrations applied) with deterministic, configurable volumes so
+# query plans and latency can be measured at realistic sizes:
+#
+#   DB_HOST=... DB_USER=... DB_PASSWORD=... DB_NAME=thebrownbottle python seed.py --employees 80 --years 3
+#
+# Every seeded employee has an @perf.local email; --reset deletes them first, and the foreign-key cascades
+# take their shifts, tasks, announcements, cover requests and time off with them. Dates are laid out
+# relative to today (history before it, two weeks of schedule after it) so CURDATE()-based filters hit
+# data. The same --seed and volumes always produce the same rows.
+
+SEED_EMAIL_DOMAIN = "perf.local"
+INSERT_CHUNK = 1000
+
+DEFAULT_VOLUMES = {
+    "employees": 60,
+    "years": 2,                 # Years of history ending today
+    "shift_rate": 0.7,          # Probability an employee works a given day
+    "tasks_per_day": 12,
+    "announcements_per_week": 6,
+    "cover_request_rate": 0.03, # Fraction of shifts with a cover request
+    "time_off_per_year": 6,     # Requests per employee per year
+}
+
+SECTIONS = ['Prep', 'Dishroom', 'Kitchen', 'Front', 'New Back', 'Old Back', 'Bar', 'Patio', 'Lounge', 'Upstairs']
+ROLES = ['Prep', 'Manager', 'Host', 'Server', 'Bartender', 'Kitchen', 'Dish']
+SHIFT_STARTS = [time(8), time(9), time(10), time(11), time(14), time(16), time(17)]
+SCR_STATUSES = ['Pending', 'Awaiting Approval', 'Accepted', 'Denied']
+TOR_STATUSES = ['Pending', 'Accepted', 'Denied']
+
+
+def _insert_many(cursor, statement, rows):
+    for i in range(0, len(rows), INSERT_CHUNK):
+        cursor.executemany(statement, rows[i:i + INSERT_CHUNK])
+
+
+def _ensure_lookup(cursor, table, column, names):
+    cursor.execute(f"SELECT {table}_id AS id FROM {table} ORDER BY {table}_id")
+    ids = [row["id"] for row in cursor.fetchall()]
+    if ids:
+        return ids
+
+    _insert_many(cursor, f"INSERT INTO {table} ({column}) VALUES (%s)", [(name,) for name in names])
+    cursor.execute(f"SELECT {table}_id AS id FROM {table} ORDER BY {table}_id")
+    return [row["id"] for row in cursor.fetchall()]
+
+
+def reset(conn):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM employee WHERE email LIKE %s", (f"%@{SEED_EMAIL_DOMAIN}",))
+    removed = cursor.rowcount
+    conn.commit()
+    cursor.close()
+    return removed
+
+
+def seed(conn, volumes=None, rng_seed=42, today=None):
+    """
+    Inserts one synthetic data set and returns {table: rows inserted}.
+    """
+    volumes = dict(DEFAULT_VOLUMES, **(volumes or {}))
+    rng = random.Random(rng_seed)
+    today = today or date.today()
+    first_day = today - timedelta(days=int(365 * volumes["years"]))
+    last_day = today + timedelta(days=14)
+    days = [first_day + timedelta(days=n) for n in range((last_day - first_day).days + 1)]
+    counts = {}
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        section_ids = _ensure_lookup(cursor, "section", "section_name", SECTIONS)
+        role_ids = _ensure_lookup(cursor, "role", "role_name", ROLES)
+
+        # Employees (a trigger adds their default availability)
+        employees = []
+        for n in range(volumes["employees"]):
+            roles = rng.sample(role_ids, k=min(3, len(role_ids)))
+            employees.append((
+                f"Perf{n}", f"Employee{n}", f"perf{n}@{SEED_EMAIL_DOMAIN}", f"999-{n // 10000:03d}-{n % 10000:04d}",
+                round(rng.uniform(12, 25), 2), int(n < max(1, volumes["employees"] // 10)),
+                roles[0], roles[1] if rng.random() < 0.6 else None, roles[2] if rng.random() < 0.3 else None
+            ))
+        _insert_many(cursor, """
+            INSERT INTO employee (first_name, last_name, email, phone_number, wage, admin,
+                                  primary_role, secondary_role, tertiary_role)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, employees)
+        cursor.execute("SELECT employee_id, admin FROM employee WHERE email LIKE %s ORDER BY employee_id",
+                       (f"%@{SEED_EMAIL_DOMAIN}",))
+        rows = cursor.fetchall()
+        employee_ids = [row["employee_id"] for row in rows]
+        admin_ids = [row["employee_id"] for row in rows if row["admin"]] or employee_ids[:1]
+        counts["employee"] = len(employee_ids)
+
+        # Time off first, so accepted ranges can be kept free of shifts (the shift triggers reject overlaps)
+        time_off = []
+        blocked = set()
+        for employee_id in employee_ids:
+            for _ in range(int(volumes["time_off_per_year"] * volumes["years"])):
+                start = rng.choice(days)
+                end = start + timedelta(days=rng.choice([0, 0, 1, 2, 4]))
+                status = rng.choices(TOR_STATUSES, weights=[2, 5, 3])[0] if start < today else \
+                    rng.choices(TOR_STATUSES, weights=[6, 3, 1])[0]
+                time_off.append((employee_id, start, end, "Synthetic request", status,
+                                 datetime.combine(start - timedelta(days=rng.randint(3, 30)), time(12))))
+                if status == 'Accepted':
+                    blocked.update((employee_id, start + timedelta(days=d)) for d in range((end - start).days + 1))
+
+        # Shifts
+        shifts = []
+        for day in days:
+            for employee_id in employee_ids:
+                if (employee_id, day) in blocked or rng.random() >= volumes["shift_rate"]:
+                    continue
+                shifts.append((employee_id, rng.choice(SHIFT_STARTS), day, rng.choice(section_ids),
+                               datetime.combine(day - timedelta(days=7), time(9))))
+        _insert_many(cursor, """
+            INSERT INTO shift (employee_id, start_time, date, section_id, timestamp)
+            VALUES (%s, %s, %s, %s, %s)
+        """, shifts)
+        counts["shift"] = len(shifts)
+
+        _insert_many(cursor, """
+            INSERT INTO time_off_request (employee_id, start_date, end_date, reason, status, timestamp)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, time_off)
+        counts["time_off_request"] = len(time_off)
+
+        # Cover requests on a sample of the seeded shifts (one per shift, so the open-request key holds)
+        placeholders = ','.join(['%s'] * len(employee_ids))
+        cursor.execute(f"SELECT shift_id, employee_id, date FROM shift WHERE employee_id IN ({placeholders})",
+                       tuple(employee_ids))
+        cover_requests = []
+        for row in cursor.fetchall():
+            if rng.random() >= volumes["cover_request_rate"]:
+                continue
+            status = rng.choice(SCR_STATUSES) if row["date"] >= today else rng.choice(['Accepted', 'Denied'])
+            accepted = rng.choice(employee_ids) if status != 'Pending' else None
+            if accepted == row["employee_id"]:
+                accepted = None
+            cover_requests.append((row["shift_id"], accepted, row["employee_id"], status,
+                                   datetime.combine(row["date"] - timedelta(days=rng.randint(1, 6)), time(15))))
+        _insert_many(cursor, """
+            INSERT INTO shift_cover_request (shift_id, accepted_employee_id, requested_employee_id, status, timestamp)
+            VALUES (%s, %s, %s, %s, %s)
+        """, cover_requests)
+        counts["shift_cover_request"] = len(cover_requests)
+
+        # Tasks: past ones are mostly complete
+        tasks = []
+        for day in days:
+            for n in range(volumes["tasks_per_day"]):
+                tasks.append((f"Task {day.isoformat()} #{n}", "Synthetic task", rng.choice(admin_ids),
+                              rng.choice(section_ids), day, int(day < today and rng.random() < 0.9),
+                              datetime.combine(day - timedelta(days=rng.randint(0, 7)), time(rng.randint(6, 22)))))
+        _insert_many(cursor, """
+            INSERT INTO task (title, description, author_id, section_id, due_date, complete, timestamp)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, tasks)
+        counts["task"] = len(tasks)
+
+        # Announcements spread over the history window
+        announcements = []
+        for _ in range(int(volumes["announcements_per_week"] * len(days) / 7)):
+            posted = datetime.combine(rng.choice(days[:-14] or days), time(rng.randint(6, 22), rng.randint(0, 59)))
+            announcements.append((rng.choice(admin_ids), "Synthetic announcement", "Synthetic body",
+                                  rng.choice(role_ids), posted))
+        _insert_many(cursor, """
+            INSERT INTO announcement (author_id, title, description, role_id, timestamp)
+            VALUES (%s, %s, %s, %s, %s)
+        """, announcements)
+        counts["announcement"] = len(announcements)
+
+        conn.commit()
+    finally:
+        cursor.close()
+
+    analyze(conn)
+    return counts
+
+
+def analyze(conn):
+    """
+    Refreshes index statistics so the optimizer sees the new volumes.
+    """
+    cursor = conn.cursor()
+    cursor.execute("ANALYZE TABLE employee, shift, time_off_request, shift_cover_request, task, announcement")
+    cursor.fetchall()
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic data for performance testing")
+    for name, default in DEFAULT_VOLUMES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed = same data)")
+    parser.add_argument("--reset", action="store_true", help="Delete previously seeded employees first")
+    args = parser.parse_args()
+
+    volumes = {name: getattr(args, name) for name in DEFAULT_VOLUMES}
+    conn = db_pool.get_pool().get_connection()
+    try:
+        if args.reset:
+            print(f"Removed {reset(conn)} seeded employees (and their rows)")
+        counts = seed(conn, volumes, args.seed)
+    finally:
+        conn.close()
+
+    for table, count in counts.items():
+        print(f"{table:22} {count:>9,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local Expo Push Stand-in ------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------------------
+#
+# Speaks the two Expo endpoints the API and notification worker use, so push delivery and receipt
+# polling can be exercised without real devices:
+#
+#   python stub_expo.py --port 4000
+#   EXPO_API_BASE=http://localhost:4000/--/api/v2 EXPO_RECEIPT_DELAY_SECONDS=0 python worker.py
+#
+# Token behaviour:
+#   contains "invalid"   ticket is rejected immediately with DeviceNotRegistered
+#   contains "dead"      ticket is accepted, its receipt reports DeviceNotRegistered
+#   anything else        ticket and receipt are ok
+#
+# GET /stats returns request/message counters; POST /reset clears them.
+#
+# Environment:
+#   STUB_LATENCY_MS     Added to every response to mimic Expo round-trips (default 0)
+
+LATENCY_MS = float(os.environ.get("STUB_LATENCY_MS", 0))
+
+_lock = threading.Lock()
+_receipts = {}  # ticket_id -> receipt
+_stats = {"send_requests": 0, "messages": 0, "receipt_requests": 0, "receipts_returned": 0}
+
+
+def _ticket_for(token):
+    if "invalid" in token:
+        return {
+            "status": "error",
+            "message": f"\"{token}\" is not a registered push notification recipient",
+            "details": {"error": "DeviceNotRegistered"}
+        }
+
+    ticket_id = str(uuid.uuid4())
+    if "dead" in token:
+        _receipts[ticket_id] = {
+            "status": "error",
+            "message": "The recipient device is not registered with FCM.",
+            "details": {"error": "DeviceNotRegistered"}
+        }
+    else:
+        _receipts[ticket_id] = {"status": "ok"}
+    return {"status": "ok", "id": ticket_id}
+
+
+def _expand(payload):
+    # Expo accepts one message, an array of messages, and a list of tokens in "to"
+    messages = payload if isinstance(payload, list) else [payload]
+    for message in messages:
+        to = message.get("to")
+        for token in (to if isinstance(to, list) else [to]):
+            yield token or ""
+
+
+class StubExpoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body):
+        if LATENCY_MS:
+            time.sleep(LATENCY_MS / 1000)
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with _lock:
+                return self._reply(200, dict(_stats, pending_receipts=len(_receipts)))
+        self._reply(404, {"errors": [{"code": "NOT_FOUND", "message": self.path}]})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+        except ValueError:
+            return self._reply(400, {"errors": [{"code": "VALIDATION_ERROR", "message": "Invalid JSON"}]})
+
+        path = self.path.rstrip("/")
+
+        if path.endswith("/push/send"):
+            with _lock:
+                tickets = [_ticket_for(token) for token in _expand(payload)]
+                _stats["send_requests"] += 1
+                _stats["messages"] += len(tickets)
+            return self._reply(200, {"data": tickets})
+
+        if path.endswith("/push/getReceipts"):
+            ids = (payload or {}).get("ids") or []
+            with _lock:
+                # Like Expo, a receipt is handed out and then forgotten
+                found = {i: _receipts.pop(i) for i in ids if i in _receipts}
+                _stats["receipt_requests"] += 1
+                _stats["receipts_returned"] += len(found)
+            return self._reply(200, {"data": found})
+
+        if path == "/reset":
+            with _lock:
+                _receipts.clear()
+                for key in _stats:
+                    _stats[key] = 0
+            return self._reply(200, {"ok": True})
+
+        self._reply(404, {"errors": [{"code": "NOT_FOUND", "message": self.path}]})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=4000):
+    """
+    Starts the stand-in on a background thread and returns the server (call shutdown() to stop it).
+    """
+    server = ThreadingHTTPServer((host, port), StubExpoHandler)
+    threading.Thread(target=server.serve_forever, name="stub-expo", daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for the Expo push API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), StubExpoHandler)
+    print(f"Stub Expo listening on http://{args.host}:{args.port}/--/api/v2")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -13,6 +13,7 @@ import type { Employee } from '@/types/iEmployee';
 
 // EmployeeSessionFields:
 // Keeps the mapping stable by only depending on the fields we actually store in session.
+// The login response is a lean identity record and does not include wage.
 type EmployeeSessionFields = Pick<
   Employee,
   | 'employee_id'
@@ -20,7 +21,6 @@ type EmployeeSessionFields = Pick<
   | 'last_name'
   | 'email'
   | 'phone_number'
-  | 'wage'
   | 'admin'
   | 'primary_role'
   | 'secondary_role'
@@ -40,7 +40,6 @@ const toSessionUser = (currentUser: EmployeeSessionFields) => {
     last_name: currentUser.last_name.toString(),
     email: currentUser.email.toString(),
     phone_number: currentUser.phone_number.toString(),
-    wage: currentUser.wage.toString(),
     admin: Number(currentUser.admin),
     primary_role: Number(currentUser.primary_role),
     secondary_role: Number(currentUser.secondary_role),
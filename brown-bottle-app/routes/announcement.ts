@@ -1,6 +1,6 @@
 import Constants from "expo-constants";
 
-import { buildQueryString } from "@/utils/apiHelpers";
+import { buildQueryString, conditionalGet } from "@/utils/apiHelpers";
 import {
   Announcement,
   GetAnnouncement,
@@ -20,16 +20,13 @@ export async function getAnnouncement(params?: Partial<GetAnnouncement>) {
   const url = `${API_BASE_URL}/announcement?${queryString}`;
 
   try {
-    const response = await fetch(url, {
-      method: "GET",
-      headers: { "Content-Type": "application/json" },
-    });
+    const response = await conditionalGet(url);
 
     if (!response.ok) {
       throw new Error(`[Announcement API] Failed to GET: ${response.status}`);
     }
 
-    const data = await response.json();
+    const data = response.data;
     return data as Announcement[];
   } catch (error) {
     console.error("Failed to fetch announcement data:", error);
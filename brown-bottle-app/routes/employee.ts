@@ -1,6 +1,6 @@
 import Constants from "expo-constants";
 
-import { buildQueryString } from "@/utils/apiHelpers";
+import { buildQueryString, conditionalGet } from "@/utils/apiHelpers";
 
 import { Employee, GetEmployee, InsertEmployee, UpdateEmployee } from "@/types/iEmployee";
 
@@ -16,18 +16,13 @@ export async function getEmployee(params?: Partial<GetEmployee>) {
   const url = `${API_BASE_URL}/employee?${queryString}`;
 
   try {
-    const response = await fetch(url, {
-      method: "GET",
-      headers: {
-        "Content-Type": "application/json",
-      },
-    });
+    const response = await conditionalGet(url);
 
     if (!response.ok) {
       throw new Error(`[Employee API] Failed to GET: ${response.status}`);
     }
 
-    const data = await response.json();
+    const data = response.data;
 
     return data as Employee[]; // JSON Response
 
@@ -1,6 +1,6 @@
 import Constants from "expo-constants";
 
-import { buildQueryString } from "@/utils/apiHelpers";
+import { buildQueryString, conditionalGet } from "@/utils/apiHelpers";
 
 import { ScheduleAPI, ScheduleEmployee } from "@/types/iSchedule";
 
@@ -15,18 +15,13 @@ export async function getSchedule(params?: Partial<ScheduleAPI>) {
   const url = `${API_BASE_URL}/schedule?${queryString}`;
 
   try {
-    const response = await fetch(url, {
-      method: "GET",
-      headers: {
-        "Content-Type": "application/json",
-      },
-    });
+    const response = await conditionalGet(url);
 
     if (!response.ok) {
       throw new Error(`[Shift API] Failed to GET: ${response.status}`);
     }
 
-    const data = await response.json();
+    const data = response.data;
 
     return data as ScheduleEmployee[]; // JSON Response
     
@@ -1,6 +1,6 @@
 import Constants from "expo-constants";
 
-import { buildQueryString } from "@/utils/apiHelpers";
+import { buildQueryString, conditionalGet } from "@/utils/apiHelpers";
 
 import { Shift, GetShift, InsertShift, UpdateShift } from "@/types/iShift";
 
@@ -16,16 +16,13 @@ export async function getShift(params?: Partial<GetShift>) {
   const url = `${API_BASE_URL}/shift?${queryString}`;
 
   try {
-    const response = await fetch(url, {
-      method: "GET",
-      headers: { "Content-Type": "application/json" },
-    });
+    const response = await conditionalGet(url);
 
     if (!response.ok) {
       throw new Error(`[Shift API] Failed to GET: ${response.status}`);
     }
 
-    const data = await response.json();
+    const data = response.data;
 
     return data as Shift[]; // JSON Response
 
@@ -76,6 +73,73 @@ export async function insertShift(fields: InsertShift) {
 }
 
 
+// POST: Publishes a batch of shifts (e.g. a whole week) in one request
+// Responds 409 with a "conflicts" list when any shift double-books or overlaps approved time off
+export async function publishShifts(shifts: InsertShift[]) {
+
+  const { API_BASE_URL } = Constants.expoConfig?.extra || {};
+
+  const url = `${API_BASE_URL}/shift/publish`;
+
+  try {
+    const response = await fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ shifts }),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      const error: any = new Error(`[Shift API] Failed to POST publish: ${response.status}`);
+      error.conflicts = data?.conflicts ?? [];
+      throw error;
+    }
+
+    return data;
+
+  } catch (error) {
+    console.error("Failed to publish shifts:", error);
+    throw error;
+  }
+
+}
+
+
+// POST: Copies one week's shifts onto another week (dates are each week's first day, 'YYYY-MM-DD')
+// Shifts that would conflict are skipped and listed in the response's "skipped" report
+export async function copyWeek(fields: {
+  source_week_start: string;
+  target_week_start: string;
+  section_id?: number;
+  dry_run?: boolean;
+}) {
+
+  const { API_BASE_URL } = Constants.expoConfig?.extra || {};
+
+  const url = `${API_BASE_URL}/shift/copy-week`;
+
+  try {
+    const response = await fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(fields),
+    });
+
+    if (!response.ok) {
+      throw new Error(`[Shift API] Failed to POST copy-week: ${response.status}`);
+    }
+
+    return await response.json();
+
+  } catch (error) {
+    console.error("Failed to copy week:", error);
+    throw error;
+  }
+
+}
+
+
 // PATCH: Updates an shift record within the shift table
 export async function updateShift(id: number, fields: UpdateShift) {
 
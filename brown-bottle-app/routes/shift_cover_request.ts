@@ -1,6 +1,6 @@
 import Constants from "expo-constants";
 
-import { buildQueryString } from "@/utils/apiHelpers";
+import { buildQueryString, conditionalGet } from "@/utils/apiHelpers";
 import {
   ShiftCoverRequest,
   GetShiftCoverRequest,
@@ -18,18 +18,13 @@ export async function getShiftCoverRequest(params?: Partial<GetShiftCoverRequest
   const url = `${API_BASE_URL}/scr?${queryString}`;
 
   try {
-    const response = await fetch(url, {
-      method: "GET",
-      headers: {
-        "Content-Type": "application/json",
-      },
-    });
+    const response = await conditionalGet(url);
 
     if (!response.ok) {
       throw new Error(`[SCR API] Failed to GET: ${response.status}`);
     }
 
-    const data = await response.json();
+    const data = response.data;
 
     return data as ShiftCoverRequest[]; // JSON Response
 
@@ -0,0 +1,31 @@
+import Constants from "expo-constants";
+
+import { buildQueryString } from "@/utils/apiHelpers";
+
+import { SyncWatermarks, SyncResponse } from "@/types/iSync";
+
+// GET: Fetches rows inserted, updated or deleted since each entity's watermark
+// Only the entities passed are synced; pass "" for an entity not stored locally yet
+export async function getSync(watermarks: SyncWatermarks, limit?: number) {
+
+  const { API_BASE_URL } = Constants.expoConfig?.extra || {};
+
+  const queryString = buildQueryString({ ...watermarks, limit });
+
+  const url = `${API_BASE_URL}/sync?${queryString}`;
+
+  try {
+    const response = await fetch(url);
+
+    if (!response.ok) {
+      throw new Error(`[Sync API] Failed to GET: ${response.status}`);
+    }
+
+    const data = await response.json();
+    return data as SyncResponse;
+  } catch (error) {
+    console.error("Failed to sync data:", error);
+    throw error;
+  }
+
+}
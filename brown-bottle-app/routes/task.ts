@@ -1,6 +1,6 @@
 import Constants from "expo-constants";
 
-import { buildQueryString } from "@/utils/apiHelpers";
+import { buildQueryString, conditionalGet } from "@/utils/apiHelpers";
 import {
   Task,
   GetTask,
@@ -20,16 +20,13 @@ export async function getTask(params?: Partial<GetTask>) {
   const url = `${API_BASE_URL}/task?${queryString}`;
 
   try {
-    const response = await fetch(url, {
-      method: "GET",
-      headers: { "Content-Type": "application/json" },
-    });
+    const response = await conditionalGet(url);
 
     if (!response.ok) {
       throw new Error(`[Task API] Failed to GET: ${response.status}`);
     }
 
-    const data = await response.json();
+    const data = response.data;
     return data as Task[];
   } catch (error) {
     console.error("Failed to fetch task data:", error);
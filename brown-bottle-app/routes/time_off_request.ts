@@ -1,5 +1,5 @@
 import Constants from "expo-constants";
-import { buildQueryString } from "@/utils/apiHelpers";
+import { buildQueryString, conditionalGet } from "@/utils/apiHelpers";
 import {
   TimeOffRequest,
   GetTimeOffRequest,
@@ -17,16 +17,13 @@ export async function getTimeOffRequest(params?: Partial<GetTimeOffRequest>) {
   const url = `${API_BASE_URL}/tor?${queryString}`;
 
   try {
-    const response = await fetch(url, {
-      method: "GET",
-      headers: { "Content-Type": "application/json" },
-    });
+    const response = await conditionalGet(url);
 
     if (!response.ok) {
       throw new Error(`[TOR API] Failed to GET: ${response.status}`);
     }
 
-    const data = await response.json();
+    const data = response.data;
     return data as TimeOffRequest[];
   } catch (error) {
     console.error("Failed to fetch time off request data:", error);
@@ -18,6 +18,8 @@ export interface GetAnnouncement {
   // Filters only the last 14 days worth of announcements
   recent_only: number; // 1=True, 0=False
   timestamp_sort: "Newest" | "Oldest";
+  limit: number; // Page size; the next page cursor comes back in the X-Next-Cursor header
+  after: string;
 }
 
 export interface InsertAnnouncement {
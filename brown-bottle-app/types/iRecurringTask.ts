@@ -13,6 +13,7 @@ export interface RecurringTask {
     fri: number;
     sat: number;
     sun: number;
+    weekday_mask: number; // Read-only: the days above as bits (Sunday = 1, Monday = 2, ... Saturday = 64)
     start_date: string; // YYYY-MM-DD
     end_date?: string; // YYYY-MM-DD (optional)
     timestamp: string,
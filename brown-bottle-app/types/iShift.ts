@@ -13,6 +13,7 @@ export interface Shift {
   section_name: string;
   day_name: string; // String representing weekday (Monday, Tuesday, etc.)
   day_index: number; // Integer from 1–7 representing weekday (1 = Sunday to 7 = Saturday)
+  version: number; // Row version for optimistic concurrency
 }
 
 export interface GetShift {
@@ -28,6 +29,7 @@ export interface GetShift {
   is_today: 1 | 0; // Shift's only Today?
   next_shift: 1 | 0; // Get next shift
   next_count: number; // Max number of next shifts to return
+  include_history: 1 | 0; // Also read archived shifts (needs start_date/end_date or date)
 }
 
 export interface InsertShift {
@@ -42,4 +44,5 @@ export interface UpdateShift {
   section_id: number;
   date: string;       // 'YYYY-MM-DD'
   start_time: string; // 'HH:MM'
+  version?: number;   // Rejected with 409 if the shift changed since it was read
 }
@@ -22,6 +22,7 @@ export interface ShiftCoverRequest {
   shift_start: string;
   status: Status
   timestamp: string; 
+  version: number; // Row version for optimistic concurrency
 }
 
 export interface GetShiftCoverRequest {
@@ -36,6 +37,8 @@ export interface GetShiftCoverRequest {
   status: Status[] | null; // <-- list of allowed texts
   date_sort: "Newest" | "Oldest" | null;
   timestamp_sort: "Newest" | "Oldest" | null;
+  limit: number; // Page size; the next page cursor comes back in the X-Next-Cursor header
+  after: string;
 }
 
 export interface InsertShiftCoverRequest {
@@ -47,4 +50,5 @@ export interface UpdateShiftCoverRequest {
   accepted_employee_id: number | null;
   shift_id?: number; // Should never really have to update this!!!
   status: "Pending" | "Awaiting Approval" | "Accepted" | "Denied";
+  version?: number; // Rejected with 409 if the request changed since it was read
 }
\ No newline at end of file
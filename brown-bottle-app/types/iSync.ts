@@ -0,0 +1,28 @@
+import { Shift } from "@/types/iShift";
+import { Task } from "@/types/iTask";
+import { Announcement } from "@/types/iAnnouncement";
+import { ShiftCoverRequest } from "@/types/iShiftCover";
+import { TimeOffRequest } from "@/types/iTimeOff";
+
+export interface SyncRows {
+  shift: Shift;
+  task: Task;
+  announcement: Announcement;
+  scr: ShiftCoverRequest;
+  tor: TimeOffRequest;
+}
+
+export type SyncEntity = keyof SyncRows;
+
+// Watermark per entity from the previous /sync response; "" requests a full snapshot
+export type SyncWatermarks = Partial<Record<SyncEntity, string>>;
+
+export interface SyncChanges<T> {
+  upserts: T[];       // Inserted or updated rows, shaped like the list endpoint's
+  deletes: number[];  // Primary keys to drop from the local copy
+  watermark: string;  // Send back as this entity's parameter next time
+  more: boolean;      // Page was full: call again right away
+  reset: boolean;     // Drop the local copy first; upserts are a fresh snapshot
+}
+
+export type SyncResponse = { [K in SyncEntity]?: SyncChanges<SyncRows[K]> };
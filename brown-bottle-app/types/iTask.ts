@@ -14,6 +14,7 @@ export interface Task {
   last_modified_at: string;
   last_modified_name: string;
   timestamp: string,
+  is_virtual?: 1 | 0; // Only with expand_recurring: 1 = recurring date not in the task table yet (task_id is null, type is "recurring")
 }
 
 export interface GetTask {
@@ -26,7 +27,13 @@ export interface GetTask {
   future: 1 | 0;
   recurring: 1 | 0;
   due_date: string; // YYYY-MM-DD
+  expand_recurring: 1 | 0; // Merge upcoming recurring dates in (needs start_date/end_date or due_date, no paging)
+  start_date: string; // YYYY-MM-DD (due_date range)
+  end_date: string; // YYYY-MM-DD (due_date range)
+  include_history: 1 | 0; // Also read archived tasks (needs start_date/end_date or due_date)
   timestamp_sort: "Newest" | "Oldest";
+  limit: number; // Page size; the next page cursor comes back in the X-Next-Cursor header
+  after: string;
 }
 
 export interface InsertTask {
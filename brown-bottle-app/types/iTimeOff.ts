@@ -26,6 +26,8 @@ export interface GetTimeOffRequest {
   status: Status[];
   date_sort: "Newest" | "Oldest";
   timestamp_sort: "Newest" | "Oldest";
+  limit: number; // Page size; the next page cursor comes back in the X-Next-Cursor header
+  after: string;
 }
 
 export interface InsertTimeOffRequest {
@@ -39,4 +39,43 @@ export function buildPatchData<T extends Record<string, any>>(
 
 export type Nullable<T> = {
   [P in keyof T]: T[P] | null;
-};
\ No newline at end of file
+};
+
+// Conditional GET for list endpoints that return an ETag
+// Remembers the last body per URL and sends If-None-Match, so an unchanged list comes back as a bodiless 304
+// Output: { ok, status, data } where data is the parsed JSON (from cache on 304)
+const ETAG_CACHE_LIMIT = 100;
+const etagCache = new Map<string, { etag: string; data: any }>();
+
+export async function conditionalGet(url: string) {
+  const cached = etagCache.get(url);
+
+  const headers: Record<string, string> = { "Content-Type": "application/json" };
+  if (cached) headers["If-None-Match"] = cached.etag;
+
+  const response = await fetch(url, { method: "GET", headers });
+
+  if (response.status === 304 && cached) {
+    // Refresh recency so frequently polled lists stay cached
+    etagCache.delete(url);
+    etagCache.set(url, cached);
+    return { ok: true, status: 200, data: cached.data };
+  }
+
+  if (!response.ok) {
+    return { ok: false, status: response.status, data: null };
+  }
+
+  const data = await response.json();
+  const etag = response.headers.get("ETag");
+
+  if (etag) {
+    etagCache.delete(url);
+    etagCache.set(url, { etag, data });
+    if (etagCache.size > ETAG_CACHE_LIMIT) {
+      etagCache.delete(etagCache.keys().next().value as string);
+    }
+  }
+
+  return { ok: true, status: response.status, data };
+}